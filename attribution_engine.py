@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Windowed Attribution Engine for Attribution Dashboard
+Keeps running mention counts for fixed day windows (1/7/30/90 days) so the
+attribution score is updated in O(1) as mentions arrive and age out
+"""
+
+import hashlib
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOWS = (1, 7, 30, 90)
+
+
+def attribution_score(total: int, positive: int) -> float:
+    """Attribution score on a 0-10 scale from mention volume and positive ratio"""
+    if total <= 0:
+        return 0.0
+    positive_ratio = positive / total
+    activity_score = min(total / 10, 1.0)  # Normalize to 0-1
+    return round((positive_ratio * 0.6 + activity_score * 0.4) * 10, 1)
+
+
+def mention_key(mention: Dict[str, Any]) -> str:
+    """Stable identity of a stored mention: platform plus id or URL"""
+    key = mention.get('id') or mention.get('url')
+    if key:
+        return f"{mention.get('platform', '')}:{key}"
+    content_hash = hashlib.sha1((mention.get('content') or '').encode('utf-8')).hexdigest()[:16]
+    return f"{mention.get('timestamp', '')}:{content_hash}"
+
+
+def mention_day(mention: Dict[str, Any]) -> Optional[date]:
+    """Calendar day of a mention's timestamp, or None if it has no valid timestamp"""
+    timestamp = mention.get('timestamp') or mention.get('created_at') or ''
+    try:
+        return datetime.fromisoformat(str(timestamp).replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+
+def in_window(mention: Dict[str, Any], days_back: int, today: Optional[date] = None) -> bool:
+    """Whether a mention falls in the last days_back days, counted like the engine's windows"""
+    day = mention_day(mention)
+    return day is None or day >= (today or date.today()) - timedelta(days=days_back)
+
+
+class WindowedAttributionEngine:
+    """
+    Running (total, positive) mention counts per day window
+
+    Each window W covers the days [today - W, today], the same days
+    `in_window` keeps for the dashboard's `days_back` filter. Mentions are
+    bucketed by day; when the day rolls over each window adds the day
+    entering it and subtracts the day leaving it, so no update ever rescans
+    the raw mentions. Mentions without a valid timestamp count towards every
+    window, as in the dashboard's own filtering; mentions dated after today
+    (a UTC timestamp read on a local clock) count as today.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = DEFAULT_WINDOWS, retention_days: int = 365):
+        self.windows = tuple(sorted(windows))
+        self.retention_days = max(retention_days, self.windows[-1])
+        self._lock = threading.Lock()
+        self._today = date.today()
+
+        # day -> [total, positive]
+        self._buckets: Dict[date, List[int]] = {}
+        # window -> [total, positive] over [today - window, today]
+        self._window_counts: Dict[int, List[int]] = {window: [0, 0] for window in self.windows}
+        # Mentions without a usable timestamp
+        self._undated = [0, 0]
+        # mention key -> (day, is_positive), so re-adding a mention is idempotent
+        self._seen: Dict[str, Tuple[Optional[date], bool]] = {}
+
+    def _in_window(self, day: date, window: int) -> bool:
+        return self._today - timedelta(days=window) <= day <= self._today
+
+    def _apply(self, day: Optional[date], is_positive: bool, sign: int):
+        """Add (sign=1) or remove (sign=-1) one mention from its bucket and windows"""
+        delta_positive = sign if is_positive else 0
+        if day is None:
+            self._undated[0] += sign
+            self._undated[1] += delta_positive
+            return
+
+        if day < self._today - timedelta(days=self.retention_days):
+            return
+
+        bucket = self._buckets.setdefault(day, [0, 0])
+        bucket[0] += sign
+        bucket[1] += delta_positive
+        for window in self.windows:
+            if self._in_window(day, window):
+                counts = self._window_counts[window]
+                counts[0] += sign
+                counts[1] += delta_positive
+
+    def _advance(self, today: date):
+        """Roll every window forward to today, one day at a time"""
+        if today <= self._today:
+            return
+
+        if (today - self._today).days > self.windows[-1]:
+            # Long gap: every window is entirely new, rebuild from the buckets
+            self._today = today
+            for window in self.windows:
+                counts = [0, 0]
+                for day, bucket in self._buckets.items():
+                    if self._in_window(day, window):
+                        counts[0] += bucket[0]
+                        counts[1] += bucket[1]
+                self._window_counts[window] = counts
+        else:
+            while self._today < today:
+                self._today += timedelta(days=1)
+                entering = self._buckets.get(self._today, (0, 0))
+                for window in self.windows:
+                    leaving = self._buckets.get(self._today - timedelta(days=window + 1), (0, 0))
+                    counts = self._window_counts[window]
+                    counts[0] += entering[0] - leaving[0]
+                    counts[1] += entering[1] - leaving[1]
+
+        cutoff = self._today - timedelta(days=self.retention_days)
+        for day in [day for day in self._buckets if day < cutoff]:
+            del self._buckets[day]
+        for key in [key for key, (day, _) in self._seen.items() if day is not None and day < cutoff]:
+            del self._seen[key]
+
+    def _set(self, key: str, day: Optional[date], is_positive: bool) -> bool:
+        """Record a mention under key, replacing what was recorded before; True if counts changed"""
+        previous = self._seen.get(key)
+        if previous == (day, is_positive):
+            return False
+        if previous is not None:
+            self._apply(previous[0], previous[1], -1)
+            del self._seen[key]
+        if day is not None and day < self._today - timedelta(days=self.retention_days):
+            # Older than every window; not worth remembering
+            return previous is not None
+        self._apply(day, is_positive, 1)
+        self._seen[key] = (day, is_positive)
+        return True
+
+    def _entry(self, mention: Dict[str, Any]) -> Tuple[str, Optional[date], bool]:
+        day = mention_day(mention)
+        if day is not None and day > self._today:
+            day = self._today
+        return mention_key(mention), day, mention.get('sentiment') == 'positive'
+
+    def add_mention(self, mention: Dict[str, Any]) -> bool:
+        """
+        Add or update one mention
+
+        Returns:
+            True if the engine's counts changed
+        """
+        with self._lock:
+            self._advance(date.today())
+            return self._set(*self._entry(mention))
+
+    def add_mentions(self, mentions: List[Dict[str, Any]]) -> int:
+        """Add or update many mentions; returns how many changed the counts"""
+        return sum(1 for mention in mentions if self.add_mention(mention))
+
+    def replace_mentions(self, mentions: List[Dict[str, Any]]) -> int:
+        """
+        Make the engine count exactly these mentions
+
+        Used when the mentions cache is rewritten, so the windows keep
+        matching the cached mentions the dashboard counts.
+
+        Returns:
+            Number of mentions added, updated or removed
+        """
+        with self._lock:
+            self._advance(date.today())
+            entries = [self._entry(mention) for mention in mentions]
+            keep = {key for key, _, _ in entries}
+            changed = 0
+            for key in [key for key in self._seen if key not in keep]:
+                day, is_positive = self._seen.pop(key)
+                self._apply(day, is_positive, -1)
+                changed += 1
+            changed += sum(1 for entry in entries if self._set(*entry))
+            return changed
+
+    def has_window(self, window: int) -> bool:
+        return window in self._window_counts
+
+    def get_counts(self, window: int) -> Dict[str, int]:
+        """Current (total, positive) mention counts for a window"""
+        with self._lock:
+            self._advance(date.today())
+            total, positive = self._window_counts[window]
+            return {
+                'total': total + self._undated[0],
+                'positive': positive + self._undated[1]
+            }
+
+    def get_score(self, window: int) -> float:
+        """Current attribution score for a window"""
+        counts = self.get_counts(window)
+        return attribution_score(counts['total'], counts['positive'])
+
+    def get_series(self, window: int, points: int = 30) -> List[Dict[str, Any]]:
+        """
+        Historical score series for a window, one point per day
+
+        Built from the daily buckets with a sliding sum (O(points + window)),
+        never from the raw mentions.
+        """
+        with self._lock:
+            self._advance(date.today())
+            first_day = self._today - timedelta(days=points - 1)
+
+            # Window ending the day before the series starts
+            total = 0
+            positive = 0
+            for offset in range(window + 1):
+                bucket = self._buckets.get(first_day - timedelta(days=1 + offset), (0, 0))
+                total += bucket[0]
+                positive += bucket[1]
+
+            series = []
+            for offset in range(points):
+                day = first_day + timedelta(days=offset)
+                entering = self._buckets.get(day, (0, 0))
+                leaving = self._buckets.get(day - timedelta(days=window + 1), (0, 0))
+                total += entering[0] - leaving[0]
+                positive += entering[1] - leaving[1]
+                series.append({
+                    'date': day.isoformat(),
+                    'total_mentions': total + self._undated[0],
+                    'positive_mentions': positive + self._undated[1],
+                    'attribution_score': attribution_score(total + self._undated[0], positive + self._undated[1])
+                })
+            return series
+
+    def summary(self, points: int = 30) -> Dict[str, Any]:
+        """Current score, counts and series for every window"""
+        return {
+            str(window): {
+                **self.get_counts(window),
+                'attribution_score': self.get_score(window),
+                'series': self.get_series(window, points)
+            }
+            for window in self.windows
+        }
@@ -8,6 +8,7 @@ from flask import Flask, jsonify, request, send_from_directory, send_file, sessi
 from flask_cors import CORS
 import os
 import json
+import threading
 from datetime import datetime, timedelta
 import logging
 from dotenv import load_dotenv
@@ -16,6 +17,14 @@ from typing import Dict, List, Any
 # Import our existing integrations
 from scrape_creators_integration import ScrapeCreatorsIntegration
 from exa_search_integration import ExaSearchIntegration
+from web_mention_store import WebMentionStore
+from near_duplicates import cluster_mentions
+from mention_summary import DEFAULT_TOP_K, SummaryAccumulator
+from leaderboards import DIMENSIONS, WEIGHTS, LeaderboardIndex
+from mention_sketches import WindowedSketches
+from mention_search_index import MentionSearchIndex
+from keyword_matcher import find_keywords
+from attribution_engine import WindowedAttributionEngine, in_window
 
 # Load environment variables
 load_dotenv()
@@ -27,6 +36,7 @@ logger = logging.getLogger(__name__)
 # Import GA4 integration
 try:
     from google_analytics_integration import GoogleAnalyticsIntegration
+    from ga4_daily_store import GA4DailyStore
     GA4_AVAILABLE = True
 except ImportError:
     GA4_AVAILABLE = False
@@ -34,7 +44,10 @@ except ImportError:
 
 # Import enhanced sentiment analysis
 try:
-    from openrouter_sentiment_integration import OpenRouterSentimentAnalyzer, analyze_sentiment_enhanced
+    from openrouter_sentiment_integration import configure_analyzer, analyze_sentiment_enhanced
+    from sentiment_cache import SentimentCache
+    from local_sentiment_model import LocalSentimentModel
+    from sentiment_rescoring import SentimentRescoringJob
     OPENROUTER_SENTIMENT_AVAILABLE = True
 except ImportError:
     OPENROUTER_SENTIMENT_AVAILABLE = False
@@ -67,6 +80,12 @@ OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', 'google/gemini-2.0-flash-exp')
 # Cache configuration
 CACHE_DIR = 'data_cache'
 MENTIONS_CACHE_FILE = os.path.join(CACHE_DIR, 'mentions_cache.json')
+GA4_DAILY_STORE_FILE = os.path.join(CACHE_DIR, 'ga4_daily_rows.sqlite3')
+WEB_MENTION_STORE_FILE = os.path.join(CACHE_DIR, 'web_mentions.sqlite3')
+MENTION_INDEX_FILE = os.path.join(CACHE_DIR, 'mention_index.sqlite3')
+SENTIMENT_CACHE_FILE = os.path.join(CACHE_DIR, 'sentiment_cache.sqlite3')
+LOCAL_SENTIMENT_MODEL_FILE = os.path.join(CACHE_DIR, 'local_sentiment_model.npz')
+RESCORING_CHECKPOINT_FILE = os.path.join(CACHE_DIR, 'sentiment_rescoring_checkpoint.json')
 
 # Ensure cache directory exists
 os.makedirs(CACHE_DIR, exist_ok=True)
@@ -79,8 +98,30 @@ def get_brand_name():
 scrape_creators = None
 exa_search = None
 ga4_analytics = None
+ga4_daily_store = None
+web_mention_store = None
+mention_index = None
 openrouter_sentiment = None
 
+if GA4_AVAILABLE:
+    try:
+        # Shared by every GA4 integration so overlapping windows reuse stored days
+        ga4_daily_store = GA4DailyStore(GA4_DAILY_STORE_FILE)
+    except Exception as e:
+        logger.error(f"Failed to open GA4 daily store: {e}")
+
+try:
+    # Shared by every Exa integration so refreshes only search the uncovered dates
+    web_mention_store = WebMentionStore(WEB_MENTION_STORE_FILE)
+except Exception as e:
+    logger.error(f"Failed to open web mention store: {e}")
+
+try:
+    # Full-text index behind /api/search-mentions, mirroring each brand's stored mentions
+    mention_index = MentionSearchIndex(MENTION_INDEX_FILE)
+except Exception as e:
+    logger.error(f"Failed to open mention search index: {e}")
+
 if SCRAPE_CREATORS_API_KEY:
     try:
         scrape_creators = ScrapeCreatorsIntegration(SCRAPE_CREATORS_API_KEY, BRAND_NAME)
@@ -90,7 +131,7 @@ if SCRAPE_CREATORS_API_KEY:
 
 if EXA_API_KEY:
     try:
-        exa_search = ExaSearchIntegration(EXA_API_KEY, BRAND_NAME)
+        exa_search = ExaSearchIntegration(EXA_API_KEY, BRAND_NAME, store=web_mention_store)
         logger.info("Exa Search integration initialized")
     except Exception as e:
         logger.error(f"Failed to initialize Exa Search: {e}")
@@ -100,7 +141,8 @@ if GA4_AVAILABLE and (GA4_PROPERTY_ID or GA4_CREDENTIALS_PATH or GA4_CREDENTIALS
         ga4_analytics = GoogleAnalyticsIntegration(
             property_id=GA4_PROPERTY_ID,
             credentials_path=GA4_CREDENTIALS_PATH,
-            credentials_json=GA4_CREDENTIALS_JSON
+            credentials_json=GA4_CREDENTIALS_JSON,
+            daily_store=ga4_daily_store
         )
         logger.info("GA4 Analytics integration initialized")
     except Exception as e:
@@ -109,13 +151,72 @@ if GA4_AVAILABLE and (GA4_PROPERTY_ID or GA4_CREDENTIALS_PATH or GA4_CREDENTIALS
 # Initialize OpenRouter sentiment analysis
 if OPENROUTER_SENTIMENT_AVAILABLE and OPENROUTER_API_KEY:
     try:
-        openrouter_sentiment = OpenRouterSentimentAnalyzer(OPENROUTER_API_KEY, OPENROUTER_MODEL)
-        logger.info(f"OpenRouter sentiment analysis initialized with model: {OPENROUTER_MODEL}")
+        # Trained with: python local_sentiment_model.py train
+        local_model = None
+        if os.path.exists(LOCAL_SENTIMENT_MODEL_FILE):
+            local_model = LocalSentimentModel.load(LOCAL_SENTIMENT_MODEL_FILE)
+            logger.info(f"Loaded local sentiment model (agreement {local_model.agreement:.1%})")
+        
+        # Shared with the integrations; credentials are probed in the background
+        openrouter_sentiment = configure_analyzer(
+            OPENROUTER_API_KEY, OPENROUTER_MODEL, cache=SentimentCache(SENTIMENT_CACHE_FILE),
+            local_model=local_model
+        )
+        logger.info(f"OpenRouter sentiment analysis configured with model: {OPENROUTER_MODEL}")
     except Exception as e:
         logger.error(f"Failed to initialize OpenRouter sentiment: {e}")
 else:
     logger.info("Using fallback rule-based sentiment analysis")
 
+def brand_key(brand_name):
+    """Normalized brand name keying per-brand state"""
+    return (brand_name or BRAND_NAME).strip().lower()
+
+def brand_state(states, brand_name, factory):
+    """A brand's entry in a per-brand dict, created with factory on first use"""
+    key = brand_key(brand_name)
+    if key not in states:
+        states.setdefault(key, factory())
+    return states[key]
+
+# Windowed attribution score per brand, mirroring that brand's cached mentions
+attribution_engines = {}
+
+def get_attribution_engine(brand_name):
+    """Attribution engine for a brand, created empty on first use"""
+    return brand_state(attribution_engines, brand_name, WindowedAttributionEngine)
+
+# Top authors, subreddits, domains and hashtags per window and brand, updated on refresh
+leaderboard_indexes = {}
+
+def get_leaderboard_index(brand_name):
+    """Leaderboards for a brand, created empty on first use"""
+    return brand_state(leaderboard_indexes, brand_name, LeaderboardIndex)
+
+# Unique authors, hashtag/keyword frequencies and engagement percentiles per window and brand
+mention_sketch_sets = {}
+
+def get_mention_sketches(brand_name):
+    """Mention sketches for a brand, created empty on first use"""
+    return brand_state(mention_sketch_sets, brand_name, WindowedSketches)
+
+def index_rescored_mentions(mentions, brand_name):
+    """Apply re-scored sentiment to the brand's attribution engine and the search index"""
+    get_attribution_engine(brand_name).add_mentions(mentions)
+    if mention_index:
+        mention_index.upsert_mentions(mentions, brand_key(brand_name))
+
+# Held by every writer of the mentions cache (refreshes and the re-scoring job)
+mentions_cache_lock = threading.Lock()
+
+# Background re-scoring of stored mentions when the sentiment model changes
+rescoring_job = None
+if openrouter_sentiment:
+    rescoring_job = SentimentRescoringJob(
+        openrouter_sentiment, MENTIONS_CACHE_FILE, RESCORING_CHECKPOINT_FILE,
+        brand_name=BRAND_NAME, on_chunk=index_rescored_mentions, cache_lock=mentions_cache_lock
+    )
+
 # Serve static files (frontend)
 @app.route('/')
 def serve_index():
@@ -247,11 +348,13 @@ def test_api_connection():
             try:
                 brand_name = get_brand_name()
                 test_integration = ExaSearchIntegration(api_key, brand_name)
-                # Test with a simple search
-                result = test_integration._execute_search(brand_name, 
-                                                        datetime.now() - timedelta(days=1),
-                                                        datetime.now(), 
-                                                        5)
+                # Test with a simple metadata-only search (no page text, no sentiment)
+                result = test_integration._search_raw(brand_name,
+                                                      datetime.now() - timedelta(days=1),
+                                                      datetime.now(),
+                                                      5, include_text=False)
+                if result is None:
+                    raise ValueError('search request failed')
                 
                 # Store successful key in session
                 if 'api_keys' not in session:
@@ -371,6 +474,39 @@ def load_cached_mentions(max_age_hours=24):
         logger.error(f"Error loading cached mentions: {e}")
         return None
 
+def seed_attribution_engine():
+    """Load every cached mention into the attribution engine, leaderboards, sketches and search index, regardless of cache age"""
+    cached_data = load_cached_mentions(max_age_hours=24 * 365)
+    if cached_data:
+        get_attribution_engine(cached_data.get('brand_name')).replace_mentions(cached_data.get('mentions', []))
+        get_leaderboard_index(cached_data.get('brand_name')).replace_mentions(cached_data.get('mentions', []))
+        get_mention_sketches(cached_data.get('brand_name')).replace_mentions(cached_data.get('mentions', []))
+        if mention_index:
+            mention_index.replace_mentions(cached_data.get('mentions', []), brand_key(cached_data.get('brand_name')))
+
+seed_attribution_engine()
+
+def filter_mentions_by_days(mentions, days_back):
+    """Mentions dated within the last days_back days, by calendar day like the attribution engine (invalid timestamps are kept)"""
+    return [mention for mention in mentions if in_window(mention, days_back)]
+
+def int_arg(name, default=None):
+    """Integer query parameter, or default when absent; ValueError names the parameter when it is not an integer"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+def bad_request(error):
+    """JSON 400 response for an invalid request parameter"""
+    return jsonify({
+        'status': 'error',
+        'message': str(error)
+    }), 400
+
 def save_mentions_to_cache(mentions_data):
     """Save mentions data to cache file"""
     try:
@@ -381,8 +517,9 @@ def save_mentions_to_cache(mentions_data):
             'mentions': mentions_data
         }
         
-        with open(MENTIONS_CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2, default=str)
+        with mentions_cache_lock:
+            with open(MENTIONS_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f, indent=2, default=str)
             
         logger.info(f"Saved {len(mentions_data)} mentions to cache")
         return True
@@ -410,16 +547,7 @@ def fetch_mentions():
                     mentions = [m for m in mentions if m.get('platform') == platform]
                 
                 # Filter by timeframe
-                cutoff_date = datetime.now() - timedelta(days=days_back)
-                filtered_mentions = []
-                for mention in mentions:
-                    try:
-                        mention_date = datetime.fromisoformat(mention.get('timestamp', '').replace('Z', '+00:00'))
-                        if mention_date >= cutoff_date:
-                            filtered_mentions.append(mention)
-                    except:
-                        # Include mentions with invalid timestamps
-                        filtered_mentions.append(mention)
+                filtered_mentions = filter_mentions_by_days(mentions, days_back)
                 
                 return jsonify({
                     'status': 'success',
@@ -489,7 +617,7 @@ def refresh_mentions():
         if exa_key and (platform == 'all' or platform == 'web'):
             try:
                 brand_name = get_brand_name()
-                exa_integration = ExaSearchIntegration(exa_key, brand_name)
+                exa_integration = ExaSearchIntegration(exa_key, brand_name, store=web_mention_store)
                 exa_mentions = exa_integration.search_mentions(days_back, 50)
                 # Convert to standard format
                 for mention in exa_mentions:
@@ -499,21 +627,36 @@ def refresh_mentions():
                         'platform': 'web',
                         'source': mention.get('domain'),
                         'content': mention.get('content', '')[:200] + '...',
+                        # Page text for re-scoring; 'content' is only a display excerpt
+                        'full_content': mention.get('content', ''),
                         'title': mention.get('title'),
                         'url': mention.get('url'),
                         'author': mention.get('author'),
                         'sentiment': mention.get('sentiment'),
-                        'relevance_score': mention.get('relevance_score')
+                        'sentiment_confidence': mention.get('sentiment_confidence'),
+                        'sentiment_method': mention.get('sentiment_method'),
+                        'sentiment_model': mention.get('sentiment_model'),
+                        'relevance_score': mention.get('relevance_score'),
+                        'duplicate_count': mention.get('duplicate_count', 0),
+                        'duplicate_urls': mention.get('duplicate_urls', [])
                     })
                 logger.info(f"Fetched {len(exa_mentions)} mentions from Exa Search")
             except Exception as e:
                 logger.error(f"Error fetching from Exa Search: {e}")
         
+        # Collapse the same content found by both sources (e.g. a Reddit post indexed by Exa)
+        all_mentions = cluster_mentions(all_mentions)
+        
         # Sort by timestamp (most recent first)
         all_mentions.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         
         # Save to cache
         save_mentions_to_cache(all_mentions)
+        get_attribution_engine(get_brand_name()).replace_mentions(all_mentions)
+        get_leaderboard_index(get_brand_name()).replace_mentions(all_mentions)
+        get_mention_sketches(get_brand_name()).replace_mentions(all_mentions)
+        if mention_index:
+            mention_index.replace_mentions(all_mentions, brand_key(get_brand_name()))
         
         return jsonify({
             'status': 'success',
@@ -602,18 +745,8 @@ def get_dashboard_metrics():
         # Try to use cached data first
         cached_data = load_cached_mentions(max_age_hours=24)
         if cached_data:
-            all_mentions = cached_data['mentions']
             # Filter by timeframe
-            cutoff_date = datetime.now() - timedelta(days=days_back)
-            filtered_mentions = []
-            for mention in all_mentions:
-                try:
-                    mention_date = datetime.fromisoformat(mention.get('timestamp', '').replace('Z', '+00:00'))
-                    if mention_date >= cutoff_date:
-                        filtered_mentions.append(mention)
-                except:
-                    filtered_mentions.append(mention)
-            all_mentions = filtered_mentions
+            all_mentions = filter_mentions_by_days(cached_data['mentions'], days_back)
             logger.info(f"Using {len(all_mentions)} cached mentions for metrics")
         else:
             logger.info("No cached data available for metrics, using estimated values")
@@ -625,15 +758,17 @@ def get_dashboard_metrics():
         community_mentions = [m for m in all_mentions if m.get('platform') in ['tiktok', 'youtube', 'reddit', 'discord']]
         metrics['community_engagement'] = len(community_mentions)
         
-        # Inbound messages (web mentions that look like inquiries)
-        web_mentions = [m for m in all_mentions if m.get('platform') == 'web']
-        inquiry_keywords = ['contact', 'inquiry', 'question', 'demo', 'trial', 'pricing']
-        inbound_mentions = []
-        for mention in web_mentions:
-            content = mention.get('content', '').lower()
-            if any(keyword in content for keyword in inquiry_keywords):
-                inbound_mentions.append(mention)
-        metrics['inbound_messages'] = len(inbound_mentions)
+        # Inbound messages (web mentions that look like inquiries) and
+        # first party data (high-intent mentions), from one keyword pass per mention
+        inbound_count = 0
+        first_party_count = 0
+        for mention in all_mentions:
+            hits = find_keywords(mention.get('content', ''))
+            if mention.get('platform') == 'web' and hits['inquiry']:
+                inbound_count += 1
+            if hits['high_intent']:
+                first_party_count += 1
+        metrics['inbound_messages'] = inbound_count
         
         # Get real GA4 data if available
         using_real_ga4_data = False
@@ -648,7 +783,8 @@ def get_dashboard_metrics():
                     ga4_integration = GoogleAnalyticsIntegration(
                         property_id=session_ga4['property_id'],
                         credentials_path=session_ga4.get('credentials_path'),
-                        credentials_json=session_ga4.get('credentials_json')
+                        credentials_json=session_ga4.get('credentials_json'),
+                        daily_store=ga4_daily_store
                     )
                 else:
                     ga4_integration = None
@@ -678,21 +814,29 @@ def get_dashboard_metrics():
             metrics['direct_traffic'] = total_mentions * 8
         
         # First party data (estimated from high-intent mentions)
-        high_intent_keywords = ['signup', 'register', 'trial', 'demo', 'pricing', 'buy']
-        first_party_mentions = []
-        for mention in all_mentions:
-            content = mention.get('content', '').lower()
-            if any(keyword in content for keyword in high_intent_keywords):
-                first_party_mentions.append(mention)
-        metrics['first_party_data'] = len(first_party_mentions)
+        metrics['first_party_data'] = first_party_count
         
         # Attribution score (based on overall activity and sentiment)
         positive_mentions = [m for m in all_mentions if m.get('sentiment') == 'positive']
-        if total_mentions > 0:
+        attribution_engine = get_attribution_engine(cached_data.get('brand_name')) if cached_data else None
+        if attribution_engine and attribution_engine.has_window(days_back):
+            # Served from the running window counts of the engine mirroring the cache,
+            # which count the same mentions as the filter above
+            metrics['attribution_score'] = attribution_engine.get_score(days_back)
+            series = attribution_engine.get_series(days_back, points=2)
+            metrics['attribution_score_change'] = round(
+                series[-1]['attribution_score'] - series[0]['attribution_score'], 1
+            )
+        elif total_mentions > 0:
             positive_ratio = len(positive_mentions) / total_mentions
             activity_score = min(total_mentions / 10, 1.0)  # Normalize to 0-1
             metrics['attribution_score'] = round((positive_ratio * 0.6 + activity_score * 0.4) * 10, 1)
         
+        # Unique authors, top hashtags/keywords and engagement percentiles from the window's sketches
+        mention_sketches = get_mention_sketches(cached_data.get('brand_name')) if cached_data else None
+        if mention_sketches and mention_sketches.has_window(days_back):
+            metrics['mention_stats'] = mention_sketches.get_stats(days_back)
+        
         # Add data source flags to metrics
         metrics['data_source'] = 'ga4' if using_real_ga4_data else 'estimated'
         metrics['total_mentions'] = total_mentions
@@ -736,6 +880,240 @@ def get_dashboard_metrics():
             'message': f'Failed to calculate metrics: {str(e)}'
         }), 500
 
+@app.route('/api/attribution-score', methods=['GET'])
+def get_attribution_score():
+    """Get the current attribution score and its daily history for each window"""
+    attribution_engine = get_attribution_engine(get_brand_name())
+    try:
+        days_back = int_arg('days_back')
+        points = min(int_arg('points', 30), attribution_engine.retention_days)
+    except ValueError as e:
+        return bad_request(e)
+    
+    try:
+        if days_back is None:
+            data = attribution_engine.summary(points)
+        else:
+            if not attribution_engine.has_window(days_back):
+                return jsonify({
+                    'status': 'error',
+                    'message': f'days_back must be one of {list(attribution_engine.windows)}'
+                }), 400
+            data = {
+                **attribution_engine.get_counts(days_back),
+                'attribution_score': attribution_engine.get_score(days_back),
+                'series': attribution_engine.get_series(days_back, points)
+            }
+        
+        return jsonify({
+            'status': 'success',
+            'data': data,
+            'windows': list(attribution_engine.windows)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting attribution score: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to get attribution score: {str(e)}'
+        }), 500
+
+@app.route('/api/summary', methods=['GET'])
+def get_mentions_summary():
+    """Get one-pass summary statistics of cached mentions for a source and window"""
+    platform = request.args.get('platform', 'all')
+    try:
+        days_back = int_arg('days_back', 7)
+        top_k = int_arg('top_k', DEFAULT_TOP_K)
+    except ValueError as e:
+        return bad_request(e)
+    
+    try:
+        cached_data = load_cached_mentions(max_age_hours=24)
+        mentions = filter_mentions_by_days(cached_data['mentions'], days_back) if cached_data else []
+        
+        # One accumulator per platform in a single pass, merged for the total
+        by_platform = {}
+        for mention in mentions:
+            mention_platform = mention.get('platform') or 'unknown'
+            if platform != 'all' and mention_platform != platform:
+                continue
+            by_platform.setdefault(mention_platform, SummaryAccumulator()).add(mention)
+        total = SummaryAccumulator()
+        for accumulator in by_platform.values():
+            total.merge(accumulator)
+        
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'summary': total.result(top_k),
+                'by_platform': {name: accumulator.result(top_k) for name, accumulator in by_platform.items()}
+            },
+            'days_back': days_back,
+            'platform': platform,
+            'cache_timestamp': cached_data.get('timestamp') if cached_data else None
+        })
+        
+    except Exception as e:
+        logger.error(f"Error summarizing mentions: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to summarize mentions: {str(e)}'
+        }), 500
+
+@app.route('/api/leaderboards', methods=['GET'])
+def get_leaderboards():
+    """Get top authors, subreddits, domains and hashtags for a window, by count or engagement"""
+    dimension = request.args.get('dimension', 'all')
+    weight = request.args.get('weight', 'count')
+    try:
+        days_back = int_arg('days_back', 7)
+        k = min(int_arg('k', 20), 100)
+    except ValueError as e:
+        return bad_request(e)
+    leaderboards = get_leaderboard_index(get_brand_name())
+    
+    if not leaderboards.has_window(days_back):
+        return jsonify({
+            'status': 'error',
+            'message': f'days_back must be one of {list(leaderboards.windows)}'
+        }), 400
+    if dimension != 'all' and dimension not in DIMENSIONS:
+        return jsonify({
+            'status': 'error',
+            'message': f'dimension must be one of {list(DIMENSIONS)} or all'
+        }), 400
+    if weight not in WEIGHTS:
+        return jsonify({
+            'status': 'error',
+            'message': f'weight must be one of {list(WEIGHTS)}'
+        }), 400
+    
+    try:
+        dimensions = DIMENSIONS if dimension == 'all' else (dimension,)
+        return jsonify({
+            'status': 'success',
+            'data': {name: leaderboards.top(name, days_back, k, weight) for name in dimensions},
+            'days_back': days_back,
+            'weight': weight
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting leaderboards: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to get leaderboards: {str(e)}'
+        }), 500
+
+@app.route('/api/mention-stats', methods=['GET'])
+def get_mention_stats():
+    """Get sketch-based unique authors, hashtag/keyword frequencies and engagement percentiles for a window"""
+    try:
+        days_back = int_arg('days_back', 7)
+        k = min(int_arg('k', 10), 100)
+    except ValueError as e:
+        return bad_request(e)
+    mention_sketches = get_mention_sketches(get_brand_name())
+    
+    if not mention_sketches.has_window(days_back):
+        return jsonify({
+            'status': 'error',
+            'message': f'days_back must be one of {list(mention_sketches.windows)}'
+        }), 400
+    
+    try:
+        return jsonify({
+            'status': 'success',
+            'data': mention_sketches.get_stats(days_back, k),
+            'days_back': days_back
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting mention stats: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to get mention stats: {str(e)}'
+        }), 500
+
+@app.route('/api/search-mentions', methods=['GET'])
+def search_mentions():
+    """Full-text search over stored mentions, ranked by relevance and paginated"""
+    query = request.args.get('q', '')
+    platform = request.args.get('platform', 'all')
+    try:
+        days_back = int_arg('days_back')
+        page = max(int_arg('page', 1), 1)
+        per_page = min(max(int_arg('per_page', 20), 1), 100)
+    except ValueError as e:
+        return bad_request(e)
+    
+    if not mention_index:
+        return jsonify({
+            'status': 'error',
+            'message': 'Mention search index is not available'
+        }), 400
+    
+    try:
+        results = mention_index.search(query, brand_key(get_brand_name()), platform, days_back,
+                                       limit=per_page, offset=(page - 1) * per_page)
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        logger.error(f"Error searching mentions: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to search mentions: {str(e)}'
+        }), 500
+    
+    return jsonify({
+        'status': 'success',
+        'data': results['results'],
+        'total_count': results['total'],
+        'page': page,
+        'per_page': per_page,
+        'total_pages': -(-results['total'] // per_page),
+        'query': query,
+        'platform': platform,
+        'days_back': days_back
+    })
+
+@app.route('/api/ga4-trend', methods=['GET'])
+def get_ga4_trend():
+    """Get a long-range daily trend of direct and organic sessions from the GA4 daily store"""
+    try:
+        days_back = int_arg('days_back', 90)
+    except ValueError as e:
+        return bad_request(e)
+    
+    try:
+        session_ga4 = session.get('api_keys', {}).get('ga4_analytics')
+        if ga4_analytics:
+            ga4_integration = ga4_analytics
+        elif session_ga4:
+            ga4_integration = GoogleAnalyticsIntegration(
+                property_id=session_ga4['property_id'],
+                credentials_path=session_ga4.get('credentials_path'),
+                credentials_json=session_ga4.get('credentials_json'),
+                daily_store=ga4_daily_store
+            )
+        else:
+            return jsonify({
+                'status': 'error',
+                'message': 'GA4 Analytics is not configured'
+            }), 400
+        
+        return jsonify({
+            'status': 'success',
+            'data': ga4_integration.get_daily_trend(days_back)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error building GA4 trend: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to build GA4 trend: {str(e)}'
+        }), 500
+
 @app.route('/api/brand-config', methods=['GET', 'POST'])
 def brand_config():
     """Get or update brand configuration"""
@@ -834,6 +1212,56 @@ def sentiment_analysis_api():
             'message': f'Sentiment analysis failed: {str(e)}'
         }), 500
 
+@app.route('/api/rescore-sentiment', methods=['GET', 'POST'])
+def rescore_sentiment():
+    """Start, resume, stop or check the background sentiment re-scoring job"""
+    if not rescoring_job:
+        return jsonify({
+            'status': 'error',
+            'message': 'OpenRouter sentiment analysis is not configured'
+        }), 400
+    
+    try:
+        if request.method == 'GET':
+            return jsonify({
+                'status': 'success',
+                'data': rescoring_job.status(),
+                'current_model': rescoring_job.analyzer.model,
+                'resumable': bool(rescoring_job.resumable())
+            })
+        
+        data = request.json or {}
+        if data.get('action') == 'stop':
+            rescoring_job.stop()
+            return jsonify({'status': 'success', 'data': rescoring_job.status()})
+        
+        if not os.path.exists(MENTIONS_CACHE_FILE):
+            return jsonify({
+                'status': 'error',
+                'message': 'No cached mentions to re-score'
+            }), 400
+        
+        try:
+            chunk_size = int(data.get('chunk_size', rescoring_job.chunk_size))
+        except (TypeError, ValueError):
+            chunk_size = 0
+        if chunk_size < 1:
+            return jsonify({
+                'status': 'error',
+                'message': 'chunk_size must be a positive integer'
+            }), 400
+        
+        rescoring_job.chunk_size = chunk_size
+        status = rescoring_job.start(only_stale=bool(data.get('only_stale', True)))
+        return jsonify({'status': 'success', 'data': status})
+        
+    except Exception as e:
+        logger.error(f"Sentiment re-scoring error: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Sentiment re-scoring failed: {str(e)}'
+        }), 500
+
 @app.route('/api/sentiment-config', methods=['GET'])
 def sentiment_config():
     """Get sentiment analysis configuration status"""
@@ -842,7 +1270,15 @@ def sentiment_config():
         'openrouter_configured': bool(openrouter_sentiment),
         'openrouter_api_key_set': bool(OPENROUTER_API_KEY),
         'current_model': OPENROUTER_MODEL,
-        'status': 'enhanced' if openrouter_sentiment else 'fallback'
+        'status': 'enhanced' if openrouter_sentiment else 'fallback',
+        'cache': openrouter_sentiment.cache.get_stats() if openrouter_sentiment else None,
+        'cascade': openrouter_sentiment.get_cascade_stats() if openrouter_sentiment else None,
+        'usage': openrouter_sentiment.get_usage_stats() if openrouter_sentiment else None,
+        'local_model': {
+            'loaded': True,
+            'trusted': openrouter_sentiment.local_model.is_trusted(),
+            **openrouter_sentiment.local_model.metadata
+        } if openrouter_sentiment and openrouter_sentiment.local_model else {'loaded': False}
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Batch Scoring for Attribution Dashboard
+Vectorized relevance and rule-based sentiment scoring over many texts at once,
+for backfills and re-scoring the mention store. Results are identical to the
+per-mention scorers in the integrations.
+
+Installation:
+pip install numpy
+"""
+
+from typing import Dict, Any, Sequence, Union
+import logging
+
+from keyword_matcher import PreparedText, keyword_matcher
+from brand_matcher import BrandMatcher
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TextLike = Union[str, PreparedText]
+
+
+class TermDocumentMatrix:
+    """
+    Sparse (COO) term-document matrix of distinct lexicon term hits
+
+    Row i of the matrix is document i; column j is term j of the shared
+    keyword matcher. Only non-zero cells are stored, as parallel arrays.
+    """
+
+    def __init__(self, texts: Sequence[TextLike]):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy not available. Install with: pip install numpy")
+
+        self.matcher = keyword_matcher
+        self.terms = list(self.matcher.term_lexicons)
+        term_index = {term: i for i, term in enumerate(self.terms)}
+
+        # Plain strings skip PreparedText; prepared texts reuse their cached work
+        self.texts = []
+        self._word_counts = []
+        doc_ids = []
+        term_ids = []
+        find_terms = self.matcher.find_terms
+        for doc_id, text in enumerate(texts):
+            if isinstance(text, PreparedText):
+                raw, lower, terms = text.text, text.lower, text.terms
+                word_count = text.word_count
+            else:
+                raw = text or ''
+                lower = raw.lower()
+                terms = find_terms(lower, lowercase=False)
+                word_count = len(raw.split())
+            self.texts.append(raw)
+            self._word_counts.append(word_count)
+            for term in set(terms):
+                doc_ids.append(doc_id)
+                term_ids.append(term_index[term])
+
+        self.n_documents = len(self.texts)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self.term_ids = np.asarray(term_ids, dtype=np.int64)
+
+        # Column indicator vector per lexicon
+        self._lexicon_masks = {}
+        for name, lexicon_terms in self.matcher.lexicons.items():
+            mask = np.zeros(len(self.terms), dtype=bool)
+            mask[[term_index[term] for term in lexicon_terms]] = True
+            self._lexicon_masks[name] = mask
+
+    def lexicon_counts(self, lexicon: str) -> 'np.ndarray':
+        """Distinct terms of a lexicon found in each document (matrix x indicator vector)"""
+        in_lexicon = self._lexicon_masks[lexicon][self.term_ids]
+        return np.bincount(self.doc_ids[in_lexicon], minlength=self.n_documents).astype(np.float64)
+
+    def word_counts(self) -> 'np.ndarray':
+        return np.asarray(self._word_counts, dtype=np.float64)
+
+    def brand_strengths(self, brand_matcher: BrandMatcher) -> 'np.ndarray':
+        """Strongest brand match in each document (0 when not mentioned)"""
+        return np.fromiter((brand_matcher.strength(text) for text in self.texts),
+                           dtype=np.float64, count=self.n_documents)
+
+    def brand_totals(self, brand_matcher: BrandMatcher) -> 'np.ndarray':
+        """Summed brand match strengths in each document"""
+        return np.fromiter((brand_matcher.total_strength(text) for text in self.texts),
+                           dtype=np.float64, count=self.n_documents)
+
+    def non_empty(self) -> 'np.ndarray':
+        return np.fromiter((bool(text) for text in self.texts),
+                           dtype=bool, count=self.n_documents)
+
+    def non_blank(self) -> 'np.ndarray':
+        return np.fromiter((bool(text.strip()) for text in self.texts),
+                           dtype=bool, count=self.n_documents)
+
+
+def social_relevance_scores(texts: Sequence[TextLike], brand: Union[str, BrandMatcher]) -> 'np.ndarray':
+    """
+    Vectorized ScrapeCreatorsIntegration.calculate_relevance
+
+    Args:
+        texts: Mention texts
+        brand: Brand matcher (or brand name) to score against
+
+    Returns:
+        Float array of relevance scores in [0, 1]
+    """
+    brand_matcher = brand if isinstance(brand, BrandMatcher) else BrandMatcher(brand)
+    matrix = TermDocumentMatrix(texts)
+
+    score = np.zeros(matrix.n_documents)
+    score += 0.8 * matrix.brand_strengths(brand_matcher)
+    score += 0.1 * matrix.lexicon_counts('social_context')
+    score = np.where(matrix.word_counts() < 5, score * 0.7, score)
+    score = np.minimum(score, 1.0)
+    return np.where(matrix.non_empty(), score, 0.0)
+
+
+def web_relevance_scores(results: Sequence[Dict[str, Any]], brand: Union[str, BrandMatcher]) -> 'np.ndarray':
+    """
+    Vectorized ExaSearchIntegration._calculate_relevance_score
+
+    Args:
+        results: Raw Exa results (title, text, publishedDate)
+        brand: Brand matcher (or brand name) to score against
+
+    Returns:
+        Float array of relevance scores in [0, 1]
+    """
+    brand_matcher = brand if isinstance(brand, BrandMatcher) else BrandMatcher(brand)
+    titles = [PreparedText(result.get('title', '') or '') for result in results]
+    contents = [PreparedText(result.get('text', '') or '') for result in results]
+    title_matrix = TermDocumentMatrix(titles)
+    content_matrix = TermDocumentMatrix(contents)
+    combined_matrix = TermDocumentMatrix(
+        [PreparedText.concat(title, content) for title, content in zip(titles, contents)]
+    )
+    has_date = np.fromiter((bool(result.get('publishedDate')) for result in results),
+                           dtype=bool, count=len(results))
+
+    score = np.zeros(len(results))
+    score += 0.6 * title_matrix.brand_strengths(brand_matcher)
+    score += np.minimum(content_matrix.brand_totals(brand_matcher) * 0.2, 0.4)
+    score += 0.05 * combined_matrix.lexicon_counts('web_context')
+    score += np.where(content_matrix.word_counts() > 100, 0.1, 0.0)
+    score += np.where(has_date, 0.05, 0.0)
+    return np.minimum(score, 1.0)
+
+
+def fallback_sentiment_scores(texts: Sequence[TextLike], margin: int = 0) -> Dict[str, 'np.ndarray']:
+    """
+    Vectorized rule-based sentiment
+
+    A text is positive (negative) when its distinct positive (negative)
+    keywords outnumber the other side by more than margin. Empty texts are
+    neutral with zero confidence, as in OpenRouterSentimentAnalyzer.analyze_sentiment.
+
+    Args:
+        texts: Texts to score
+        margin: 0 for the analyzer and ScrapeCreators, 1 for Exa
+
+    Returns:
+        Dict of arrays: sentiment labels, confidence, positive and negative keyword counts
+    """
+    matrix = TermDocumentMatrix(texts)
+    positive = matrix.lexicon_counts('positive')
+    negative = matrix.lexicon_counts('negative')
+
+    is_positive = positive > negative + margin
+    is_negative = negative > positive + margin
+    confidence = np.full(matrix.n_documents, 0.3)
+    confidence = np.where(is_positive, np.minimum(0.8, 0.4 + (positive - negative) * 0.1), confidence)
+    confidence = np.where(is_negative, np.minimum(0.8, 0.4 + (negative - positive) * 0.1), confidence)
+
+    sentiment = np.full(matrix.n_documents, 'neutral', dtype=object)
+    sentiment[is_positive] = 'positive'
+    sentiment[is_negative] = 'negative'
+
+    confidence[~matrix.non_blank()] = 0.0
+
+    return {
+        'sentiment': sentiment,
+        'confidence': confidence,
+        'positive_count': positive.astype(np.int64),
+        'negative_count': negative.astype(np.int64)
+    }
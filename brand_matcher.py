@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Brand Matcher for Attribution Dashboard
+One compiled pattern that finds the brand name, aliases, handles, hashtags and
+close misspellings in a single pass over a text, with the position and
+strength of each match, plus the search terms every query builder starts from
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+import logging
+
+from keyword_matcher import PreparedText
+
+logger = logging.getLogger(__name__)
+
+# Strength of each kind of match (scorers scale their brand weights by it)
+MATCH_STRENGTHS = {
+    'name': 1.0,     # The brand name
+    'alias': 0.9,    # A configured alias
+    'handle': 0.9,   # A configured handle, or a name written as one word (#acmecorp)
+    'tag': 0.8,      # A hashtag or handle starting with the brand (#acmelove, @acme_support)
+}
+# A misspelling loses this much strength per edit
+FUZZY_PENALTY_PER_EDIT = 0.2
+
+# Misspellings are only matched for forms at least this long, and must keep the first
+# character. This cuts down but does not avoid collisions with real words: one edit
+# still turns "present" into "prevent" and "notable" into "notably", which is why
+# misspellings are off unless max_edits is set
+MIN_FUZZY_LENGTH = 7
+FUZZY_PREFIX_LENGTH = 1
+
+# Fuzzy lookups remembered per matcher (word frequencies are skewed, so hits are common)
+FUZZY_CACHE_SIZE = 10000
+
+NON_WORD_PATTERN = re.compile(r'\W+')
+
+
+class BrandMatch(NamedTuple):
+    start: int
+    end: int
+    text: str
+    form: str
+    kind: str
+    strength: float
+
+
+def _split_config(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def _deletes(word: str, max_edits: int) -> Set[str]:
+    """Every string left after deleting up to max_edits characters"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_edits):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count once), or limit + 1 if above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous_previous is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class BrandMatcher:
+    """
+    Compiled brand matcher
+
+    Exact forms (name, aliases, handles and one-word spellings), brand
+    hashtags and handles, and candidate misspellings are alternatives of one
+    regular expression, so each text is scanned once, after a substring
+    check for the first word of some form rules most texts out.
+
+    Misspellings are opt-in (max_edits > 0): they match ordinary words one
+    edit away from the brand, and since any word can then be a match the
+    substring pre-check is skipped, making matching an order of magnitude
+    slower. Candidate words are pre-filtered by length and first character
+    in the pattern itself and confirmed with a deletion-neighbourhood lookup
+    and a bounded edit distance.
+    """
+
+    def __init__(self, brand_name: str, aliases: Iterable[str] = (), handles: Iterable[str] = (),
+                 max_edits: int = 0):
+        """
+        Initialize the matcher
+
+        Args:
+            brand_name: Brand to match
+            aliases: Other names of the brand ("Acme Corp", "ACME Inc")
+            handles: Social handles, with or without @ ("acmehq")
+            max_edits: Typos tolerated in one-word forms of at least MIN_FUZZY_LENGTH characters
+                (default 0, exact matching only)
+        """
+        self.brand_name = brand_name.strip()
+        self.aliases = [alias for alias in dict.fromkeys(alias.strip() for alias in aliases)
+                        if alias and alias.lower() != self.brand_name.lower()]
+        self.handles = list(dict.fromkeys(handle.strip().lstrip('@') for handle in handles if handle.strip('@ ')))
+        self.max_edits = max(0, max_edits)
+
+        # Normalized exact form -> (form, kind); handles and one-word spellings never outrank a name
+        self._forms: Dict[str, Tuple[str, str]] = {}
+        for handle in self.handles:
+            self._forms[handle.lower()] = (handle, 'handle')
+        for name, kind in [(self.brand_name, 'name')] + [(alias, 'alias') for alias in self.aliases]:
+            slug = NON_WORD_PATTERN.sub('', name.lower())
+            if slug and slug != ' '.join(name.lower().split()):
+                self._forms.setdefault(slug, (name, 'handle'))
+            if name:
+                self._forms[' '.join(name.lower().split())] = (name, kind)
+
+        # One-word forms matched up to max_edits typos: deletion variant -> forms
+        self._fuzzy_index: Dict[str, Set[str]] = {}
+        fuzzy_forms = [form for form in self._forms
+                       if len(form) >= MIN_FUZZY_LENGTH and not NON_WORD_PATTERN.search(form)]
+        if self.max_edits:
+            for form in fuzzy_forms:
+                for variant in _deletes(form, self.max_edits):
+                    self._fuzzy_index.setdefault(variant, set()).add(form)
+        self._fuzzy_cache: Dict[str, Optional[Tuple[str, int]]] = {}
+
+        # Without misspellings to look for, a text can only match if it contains the
+        # first word of some form, which a substring test rules out far faster than the regex
+        self._anchors = None if self._fuzzy_index else {form.split()[0] for form in self._forms}
+        # Scorers and context extraction often look at the same text in turn
+        self._last_find: Tuple[Optional[str], List[BrandMatch]] = (None, [])
+
+        self.pattern = self._compile(fuzzy_forms if self.max_edits else [])
+
+    def _compile(self, fuzzy_forms: List[str]) -> re.Pattern:
+        if not self._forms:
+            # Nothing to match (no brand configured)
+            return re.compile(r'(?!)')
+
+        # Longest first, so "acme corp" wins over "acme"; words of a form may be split by any whitespace
+        exact = '|'.join(r'\s+'.join(map(re.escape, form.split()))
+                         for form in sorted(self._forms, key=len, reverse=True))
+        alternatives = [rf'(?P<exact>@?(?<!\w)(?:{exact})(?!\w))']
+
+        slugs = sorted({form for form in self._forms if not NON_WORD_PATTERN.search(form)}, key=len, reverse=True)
+        if slugs:
+            alternatives.append(rf'(?P<tag>(?<![\w@#])[@#](?:{"|".join(map(re.escape, slugs))})\w+)')
+
+        if fuzzy_forms:
+            k = self.max_edits
+            shortest = min(map(len, fuzzy_forms)) - k
+            longest = max(map(len, fuzzy_forms)) + k
+            prefixes = '|'.join(sorted({re.escape(form[:FUZZY_PREFIX_LENGTH]) for form in fuzzy_forms}))
+            alternatives.append(rf'(?P<fuzzy>(?<!\w)(?=(?:{prefixes}))\w{{{shortest},{longest}}}(?!\w))')
+
+        # Every alternative starts with one of these characters; the lookahead lets the
+        # regex engine skip other positions without trying each alternative
+        first_chars = {'@', '#'} | {form[0] for form in self._forms}
+        leading = ''.join(sorted(map(re.escape, first_chars)))
+        return re.compile(f'(?=[{leading}])(?:{"|".join(alternatives)})', re.IGNORECASE)
+
+    @classmethod
+    def from_config(cls, brand_name: str) -> 'BrandMatcher':
+        """
+        Matcher configured from the environment
+
+        BRAND_ALIASES and BRAND_HANDLES (comma-separated) describe BRAND_NAME,
+        so they are only applied when brand_name is that brand; BRAND_MAX_EDITS
+        sets the tolerated typos (default 0).
+        """
+        aliases: List[str] = []
+        handles: List[str] = []
+        if brand_name.strip().lower() == os.getenv('BRAND_NAME', '').strip().lower():
+            aliases = _split_config(os.getenv('BRAND_ALIASES'))
+            handles = _split_config(os.getenv('BRAND_HANDLES'))
+        return cls(brand_name, aliases, handles, int(os.getenv('BRAND_MAX_EDITS', '0')))
+
+    def _fuzzy_lookup(self, word: str) -> Optional[Tuple[str, int]]:
+        """(form, edits) of the closest one-word form within max_edits, or None"""
+        if word in self._fuzzy_cache:
+            return self._fuzzy_cache[word]
+        best = None
+        candidates = set()
+        for variant in _deletes(word, self.max_edits):
+            candidates |= self._fuzzy_index.get(variant, set())
+        for form in candidates:
+            if form[:FUZZY_PREFIX_LENGTH] != word[:FUZZY_PREFIX_LENGTH]:
+                continue
+            distance = edit_distance(word, form, self.max_edits)
+            if distance <= self.max_edits and (best is None or distance < best[1]):
+                best = (form, distance)
+        if len(self._fuzzy_cache) >= FUZZY_CACHE_SIZE:
+            self._fuzzy_cache.clear()
+        self._fuzzy_cache[word] = best
+        return best
+
+    def find(self, text: Union[str, PreparedText]) -> List[BrandMatch]:
+        """Every brand match in a text, in order"""
+        if isinstance(text, PreparedText):
+            text = text.text
+        if not text:
+            return []
+        last_text, last_matches = self._last_find
+        if text is last_text:
+            return last_matches
+        if self._anchors is not None:
+            lower = text.lower()
+            if not any(anchor in lower for anchor in self._anchors):
+                return []
+
+        matches = []
+        for match in self.pattern.finditer(text):
+            matched = match.group()
+            kind = match.lastgroup
+            if kind == 'exact':
+                # Case folding can disagree with IGNORECASE for a few characters; treat those as the name
+                form, kind = self._forms.get(' '.join(matched.lower().lstrip('@').split()), (self.brand_name, 'name'))
+                strength = MATCH_STRENGTHS[kind]
+            elif kind == 'tag':
+                form = self.brand_name
+                strength = MATCH_STRENGTHS['tag']
+            else:
+                found = self._fuzzy_lookup(matched.lower())
+                if found is None:
+                    continue
+                form = self._forms[found[0]][0]
+                strength = MATCH_STRENGTHS[self._forms[found[0]][1]] - FUZZY_PENALTY_PER_EDIT * found[1]
+            matches.append(BrandMatch(match.start(), match.end(), matched, form, kind, round(strength, 2)))
+        self._last_find = (text, matches)
+        return matches
+
+    def strength(self, text: Union[str, PreparedText]) -> float:
+        """Strongest brand match in a text (0.0 if the brand is not mentioned)"""
+        return max((match.strength for match in self.find(text)), default=0.0)
+
+    def total_strength(self, text: Union[str, PreparedText]) -> float:
+        """Sum of match strengths: an occurrence count where weak matches count partially"""
+        return sum(match.strength for match in self.find(text))
+
+    def matches_url(self, url: Optional[str]) -> bool:
+        """Whether a URL contains a one-word spelling of the brand, an alias or a handle"""
+        compact = NON_WORD_PATTERN.sub('', (url or '').lower())
+        return any(NON_WORD_PATTERN.sub('', form) in compact for form in self._forms if form.strip())
+
+    def search_terms(self, handles: bool = False) -> List[str]:
+        """
+        Search terms shared by every query builder: the brand name and exact
+        phrases for it and each alias; with handles, the brand hashtag and the
+        handles (@brand when none are configured)
+        """
+        names = [self.brand_name] + self.aliases
+        terms = [self.brand_name] + [f'"{name}"' for name in names]
+        if handles:
+            slug = NON_WORD_PATTERN.sub('', self.brand_name.lower())
+            terms.append(f'#{slug}')
+            terms.extend(f'@{handle}' for handle in (self.handles or [slug]))
+        return list(dict.fromkeys(terms))
@@ -18,14 +18,23 @@ import csv
 import os
 import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
+from keyword_matcher import TOKEN_PATTERN, PreparedText, find_keywords
+from brand_matcher import BrandMatcher
+from batch_scoring import NUMPY_AVAILABLE, web_relevance_scores
+from near_duplicates import canonical_url, cluster_mentions
+from mention_summary import summarize_mentions
+from rate_limiting import shared_rate_limiter
+from web_mention_store import WebMentionStore
+
 # Import enhanced sentiment analysis
 try:
-    from openrouter_sentiment_integration import analyze_sentiment_enhanced, get_sentiment_only
+    from openrouter_sentiment_integration import analyze_sentiment_enhanced, get_sentiment_only, mention_sentiment_fields
     ENHANCED_SENTIMENT_AVAILABLE = True
 except ImportError:
     ENHANCED_SENTIMENT_AVAILABLE = False
@@ -34,10 +43,50 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Exa's default search rate limit; every client using the same API key shares it
+EXA_REQUESTS_PER_SECOND = float(os.getenv('EXA_REQUESTS_PER_SECOND', '5'))
+
+# Search metadata first and download text only for results that look relevant from
+# their metadata. Lossy, so off by default: see _metadata_relevance_score
+EXA_TWO_PHASE = os.getenv('EXA_TWO_PHASE', 'false').lower() == 'true'
+
+# Text requested per result (by /search, or by /contents in two-phase mode)
+TEXT_CONTENTS = {"maxCharacters": 2000, "includeHtmlTags": False}
+
+MIN_RELEVANCE_SCORE = 0.3
+
+# Two-phase pre-scoring: a brand in the URL or domain stands in for a content
+# mention, and every page is given the substantial-content bonus up front
+URL_BRAND_SCORE = 0.2
+CONTENT_ALLOWANCE = 0.1
+
+# Contact details in page text
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b')
+
+# Mention context: words kept either side of a brand mention, and how many mentions
+CONTEXT_WORDS = 10
+MAX_CONTEXTS = 2
+# Characters searched for the surrounding words (far more than 10 words of prose)
+CONTEXT_SCAN_CHARS = 400
+
+# With a mention store, each refresh re-searches this much of the covered window
+# so pages Exa indexes shortly after publication are still found
+COVERAGE_OVERLAP = timedelta(hours=1)
+
+# Stored web mentions and coverage older than this are dropped
+STORE_RETENTION = timedelta(days=365)
+
 class ExaSearchIntegration:
-    def __init__(self, api_key: str, brand_name: str):
+    def __init__(self, api_key: str, brand_name: str, two_phase: Optional[bool] = None,
+                 store: Optional[WebMentionStore] = None, brand_matcher: Optional[BrandMatcher] = None):
         self.api_key = api_key
         self.brand_name = brand_name
+        self.two_phase = EXA_TWO_PHASE if two_phase is None else two_phase
+        # Name, aliases, handles and (with BRAND_MAX_EDITS) misspellings, for relevance, context and search queries
+        self.brand_matcher = brand_matcher or BrandMatcher.from_config(brand_name)
+        # Coverage and mentions from earlier searches; without it every search covers the full range
+        self.store = store
         self.base_url = "https://api.exa.ai"
         self.session = requests.Session()
         self.session.headers.update({
@@ -46,50 +95,124 @@ class ExaSearchIntegration:
             'User-Agent': 'Attribution-Dashboard/1.0'
         })
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 1  # seconds between requests
+        # Rate limiting, shared by every instance using this API key
+        burst = max(1, int(EXA_REQUESTS_PER_SECOND))
+        self.rate_limiter = shared_rate_limiter('exa', api_key, EXA_REQUESTS_PER_SECOND, burst)
     
     def _rate_limit(self):
-        """Enforce rate limiting between API calls"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = time.time()
+        """Wait for a slot under the API key's shared rate limit"""
+        self.rate_limiter.acquire()
+    
+    def _search_query(self, query: str, start_date: datetime, end_date: datetime, num_results: int,
+                      include_text: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run one query under the rate limit
+        
+        Returns:
+            Raw results (metadata only when include_text is False), or None if the search failed
+        """
+        logger.info(f"Searching with query: {query}")
+        try:
+            self._rate_limit()
+            results = self._search_raw(query, start_date, end_date, num_results, include_text)
+            if results is None:
+                return None
+            logger.info(f"Found {len(results)} results for query")
+            return results
+        except Exception as e:
+            logger.error(f"Search failed for query '{query}': {e}")
+            return None
     
     def search_mentions(self, days_back: int = 7, max_results: int = 50) -> List[Dict[str, Any]]:
-        """Search for brand mentions in the last N days"""
+        """
+        Search for brand mentions in the last N days
+        
+        With a mention store, each query only searches the part of the range
+        it has not covered yet, and the result is every stored mention
+        published in the range.
+        """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
         
         # Build comprehensive search queries
         search_queries = self._build_search_queries()
         
-        all_results = []
+        # One task per (query, uncovered interval)
+        tasks = []
+        coverage_updates = {}
         for query in search_queries:
-            logger.info(f"Searching with query: {query}")
-            try:
-                self._rate_limit()
-                results = self._execute_search(query, start_date, end_date, max_results // len(search_queries))
-                all_results.extend(results)
-                logger.info(f"Found {len(results)} results for query")
-            except Exception as e:
-                logger.error(f"Search failed for query '{query}': {e}")
-        
-        # Remove duplicates and filter relevant mentions
-        unique_results = self._deduplicate_results(all_results)
-        relevant_mentions = self._filter_relevant_mentions(unique_results)
-        
-        return relevant_mentions
+            intervals, coverage_updates[query] = self._plan_query_intervals(query, start_date, end_date)
+            tasks.extend((query, interval_start, interval_end) for interval_start, interval_end in intervals)
+        if self.store:
+            logger.info(f"Searching {len(tasks)} uncovered intervals for {len(search_queries)} queries")
+        
+        # Queries run concurrently; the shared limiter still paces them per API key
+        num_results = max_results // len(search_queries)
+        query_results = []
+        if tasks:
+            with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+                query_results = list(executor.map(
+                    lambda task: self._search_query(*task, num_results, include_text=not self.two_phase),
+                    tasks
+                ))
+        all_results = self._deduplicate_results(
+            [result for results in query_results if results for result in results]
+        )
+        
+        if self.two_phase:
+            all_results = self._fetch_candidate_contents(all_results)
+        
+        # Collapse syndicated copies, then score relevance in one batch so sentiment and
+        # classification only run on results that can be kept
+        representatives = cluster_mentions(all_results)
+        processed_results = []
+        for result, score in zip(representatives, self.calculate_relevance_scores(representatives)):
+            if score < MIN_RELEVANCE_SCORE:
+                continue
+            processed_result = self._process_result(result, result.get('search_query', ''), relevance_score=float(score))
+            if processed_result:
+                processed_results.append(processed_result)
+        relevant_mentions = self._filter_relevant_mentions(processed_results)
+        
+        if not self.store:
+            return relevant_mentions
+        
+        added = self.store.add_mentions(self.brand_name, relevant_mentions)
+        # A query's coverage only grows when every one of its searches succeeded
+        failed_queries = {task[0] for task, results in zip(tasks, query_results) if results is None}
+        for query, (covered_start, covered_end) in coverage_updates.items():
+            if query not in failed_queries:
+                self.store.set_coverage(self.brand_name, query, covered_start.timestamp(), covered_end.timestamp())
+        self.store.prune((end_date - STORE_RETENTION).timestamp())
+        logger.info(f"Stored {added} new web mentions")
+        
+        return self._filter_relevant_mentions(self.store.get_mentions(self.brand_name, start_date.timestamp()))
+    
+    def _plan_query_intervals(self, query: str, start_date: datetime, end_date: datetime
+                              ) -> Tuple[List[Tuple[datetime, datetime]], Tuple[datetime, datetime]]:
+        """
+        Intervals of [start_date, end_date] a query still has to search
+        
+        Returns:
+            (intervals to search, coverage once they have been searched)
+        """
+        coverage = self.store.get_coverage(self.brand_name, query) if self.store else None
+        if coverage:
+            covered_start, covered_end = (datetime.fromtimestamp(t) for t in coverage)
+            # Coverage that does not touch the range cannot be extended contiguously
+            if covered_end >= start_date and covered_start <= end_date:
+                intervals = []
+                if start_date < covered_start:
+                    intervals.append((start_date, covered_start))
+                if end_date > covered_end - COVERAGE_OVERLAP:
+                    intervals.append((max(start_date, covered_end - COVERAGE_OVERLAP), end_date))
+                return intervals, (min(start_date, covered_start), max(end_date, covered_end))
+        return [(start_date, end_date)], (start_date, end_date)
     
     def _build_search_queries(self) -> List[str]:
         """Build multiple search queries for comprehensive coverage"""
-        brand_lower = self.brand_name.lower()
-        brand_variations = [
-            self.brand_name,
-            brand_lower,
-            f'"{self.brand_name}"',  # Exact match
+        # The name and exact phrases of it and its aliases first, then intent variations
+        brand_variations = self.brand_matcher.search_terms() + [
             f'{self.brand_name} review',
             f'{self.brand_name} alternative',
             f'{self.brand_name} comparison',
@@ -99,8 +222,18 @@ class ExaSearchIntegration:
         
         return brand_variations[:5]  # Limit to avoid too many API calls
     
-    def _execute_search(self, query: str, start_date: datetime, end_date: datetime, num_results: int) -> List[Dict[str, Any]]:
-        """Execute a single search query"""
+    def _search_raw(self, query: str, start_date: datetime, end_date: datetime, num_results: int,
+                    include_text: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """
+        Call /search and return Exa's results, each tagged with its search query
+        
+        Args:
+            include_text: Request page text; without it only metadata
+                (title, URL, dates, author) comes back
+        
+        Returns:
+            Raw results, or None if the request failed
+        """
         payload = {
             "query": query,
             "type": "neural",
@@ -114,13 +247,11 @@ class ExaSearchIntegration:
                 "instagram.com", 
                 "facebook.com",
                 "spam-domain.com"
-            ],
-            "includeText": True,
-            "text": {
-                "maxCharacters": 2000,
-                "includeHtmlTags": False
-            }
+            ]
         }
+        if include_text:
+            payload["includeText"] = True
+            payload["text"] = TEXT_CONTENTS
         
         try:
             response = self.session.post(f"{self.base_url}/search", json=payload)
@@ -128,30 +259,105 @@ class ExaSearchIntegration:
             
             data = response.json()
             results = data.get('results', [])
-            
-            # Process each result
-            processed_results = []
             for result in results:
-                processed_result = self._process_result(result, query)
-                if processed_result:
-                    processed_results.append(processed_result)
-            
-            return processed_results
+                result['search_query'] = query
+            return results
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Search request failed: {e}")
             if hasattr(e.response, 'text'):
                 logger.error(f"Response: {e.response.text}")
-            return []
+            return None
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
+            return None
+    
+    def _metadata_relevance_score(self, result: Dict[str, Any]) -> float:
+        """
+        Estimated relevance from title, URL and domain alone
+        
+        Mirrors _calculate_relevance_score for the parts metadata can show;
+        content is assumed substantial, and a brand in the URL or domain is
+        counted as a content mention. This is an estimate, not an upper
+        bound: a page whose body alone mentions the brand can score up to
+        0.55 (0.4 for body mentions, 0.1 for substantial content, 0.05 for a
+        date) plus its body context keywords, which clears MIN_RELEVANCE_SCORE
+        for any page, so no bound could skip a fetch without losing results.
+        Two-phase retrieval therefore drops such pages and is opt-in.
+        """
+        title = PreparedText(result.get('title', '') or '')
+        score = CONTENT_ALLOWANCE
+        
+        score += 0.6 * self.brand_matcher.strength(title)
+        
+        if self.brand_matcher.matches_url(result.get('url')):
+            score += URL_BRAND_SCORE
+        
+        score += 0.05 * len(title.hits['web_context'])
+        
+        if result.get('publishedDate'):
+            score += 0.05
+        
+        return min(score, 1.0)
+    
+    def _fetch_candidate_contents(self, results: List[Dict[str, Any]],
+                                  min_relevance: float = MIN_RELEVANCE_SCORE) -> List[Dict[str, Any]]:
+        """
+        Second phase: fetch text in one /contents call for metadata results
+        whose estimated relevance clears min_relevance (results that only
+        mention the brand in their text are dropped)
+        
+        Returns:
+            The candidates, with their text
+        """
+        candidates = [r for r in results if self._metadata_relevance_score(r) >= min_relevance]
+        logger.info(f"Fetching contents for {len(candidates)} of {len(results)} search results")
+        if not candidates:
             return []
+        
+        texts = self._fetch_contents([r.get('id') or r.get('url') for r in candidates])
+        for result in candidates:
+            result['text'] = texts.get(result.get('id') or result.get('url'), '')
+        return candidates
     
-    def _process_result(self, result: Dict[str, Any], search_query: str) -> Optional[Dict[str, Any]]:
-        """Process and standardize search result data"""
+    def _fetch_contents(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Fetch page text for several search results in a single request
+        
+        Returns:
+            Dict of result id -> text (results Exa could not fetch are left out)
+        """
+        try:
+            self._rate_limit()
+            response = self.session.post(f"{self.base_url}/contents", json={"ids": ids, "text": TEXT_CONTENTS})
+            response.raise_for_status()
+            return {item.get('id') or item.get('url'): item.get('text', '') or ''
+                    for item in response.json().get('results', [])}
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Contents request failed: {e}")
+            return {}
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON decode error: {e}")
+            return {}
+    
+    def _prepare_result_text(self, result: Dict[str, Any]) -> Dict[str, PreparedText]:
+        """Lowercase, tokenize and keyword-scan a result's title and text once"""
+        title = PreparedText(result.get('title', '') or '')
+        content = PreparedText(result.get('text', '') or '')
+        return {
+            'title': title,
+            'content': content,
+            # Title and content together, reusing the per-part keyword hits
+            'combined': PreparedText.concat(title, content)
+        }
+    
+    def _process_result(self, result: Dict[str, Any], search_query: str,
+                        relevance_score: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Process and standardize search result data (relevance_score when already batch-scored)"""
         try:
             url = result.get('url', '')
             domain = urlparse(url).netloc if url else ''
+            prepared = self._prepare_result_text(result)
             
             processed = {
                 'id': result.get('id', url),
@@ -162,16 +368,20 @@ class ExaSearchIntegration:
                 'published_date': result.get('publishedDate', ''),
                 'author': result.get('author', ''),
                 'search_query': search_query,
-                'relevance_score': self._calculate_relevance_score(result),
-                'sentiment': self._analyze_sentiment(result.get('text', '') + ' ' + result.get('title', '')),
-                'content_type': self._classify_content_type(result),
+                'relevance_score': (relevance_score if relevance_score is not None
+                                    else self._calculate_relevance_score(result, prepared)),
+                **self._sentiment_fields(PreparedText.concat(prepared['content'], prepared['title'], sep=' ')),
+                'content_type': self._classify_content_type(result, prepared),
                 'extracted_at': datetime.now().isoformat()
             }
             
             # Extract additional metadata
-            processed['word_count'] = len(processed['content'].split()) if processed['content'] else 0
+            processed['duplicate_count'] = result.get('duplicate_count', 0)
+            if result.get('duplicate_urls'):
+                processed['duplicate_urls'] = result['duplicate_urls']
+            processed['word_count'] = prepared['content'].word_count
             processed['has_contact_info'] = self._has_contact_info(processed['content'])
-            processed['mention_context'] = self._extract_mention_context(processed['content'])
+            processed['mention_context'] = self._extract_mention_context(prepared['content'])
             
             return processed
             
@@ -179,35 +389,24 @@ class ExaSearchIntegration:
             logger.error(f"Error processing result: {e}")
             return None
     
-    def _calculate_relevance_score(self, result: Dict[str, Any]) -> float:
+    def _calculate_relevance_score(self, result: Dict[str, Any],
+                                   prepared: Optional[Dict[str, PreparedText]] = None) -> float:
         """Calculate how relevant the result is to brand tracking"""
         score = 0.0
         
-        title = result.get('title', '').lower()
-        content = result.get('text', '').lower()
-        brand_lower = self.brand_name.lower()
-        
-        # Title mentions (higher weight)
-        if brand_lower in title:
-            score += 0.6
+        prepared = prepared or self._prepare_result_text(result)
         
-        # Content mentions
-        content_mentions = content.count(brand_lower)
-        score += min(content_mentions * 0.2, 0.4)
+        # Title mentions (higher weight), scaled by match strength
+        score += 0.6 * self.brand_matcher.strength(prepared['title'])
         
-        # Context relevance
-        relevant_keywords = [
-            'review', 'comparison', 'alternative', 'vs', 'versus',
-            'experience', 'opinion', 'recommend', 'using', 'tried',
-            'features', 'pricing', 'benefits', 'pros', 'cons'
-        ]
+        # Content mentions, weak matches (hashtags, misspellings) counting partially
+        score += min(self.brand_matcher.total_strength(prepared['content']) * 0.2, 0.4)
         
-        for keyword in relevant_keywords:
-            if keyword in content or keyword in title:
-                score += 0.05
+        # Context relevance (distinct keywords across title and content)
+        score += 0.05 * len(prepared['combined'].hits['web_context'])
         
         # Quality indicators
-        if len(content.split()) > 100:  # Substantial content
+        if prepared['content'].word_count > 100:  # Substantial content
             score += 0.1
         
         if result.get('publishedDate'):  # Has publication date
@@ -215,7 +414,18 @@ class ExaSearchIntegration:
         
         return min(score, 1.0)
     
-    def _analyze_sentiment(self, text: str) -> str:
+    def calculate_relevance_scores(self, results: List[Dict[str, Any]]):
+        """
+        Calculate relevance for many raw results at once (same scores as _calculate_relevance_score)
+        
+        Returns:
+            NumPy array of scores, or a list when NumPy is not installed
+        """
+        if NUMPY_AVAILABLE:
+            return web_relevance_scores(results, self.brand_matcher)
+        return [self._calculate_relevance_score(result) for result in results]
+    
+    def _analyze_sentiment(self, text: Union[str, PreparedText]) -> str:
         """Enhanced sentiment analysis with Gemini Flash 2 or fallback to rule-based"""
         if not text:
             return 'neutral'
@@ -234,7 +444,19 @@ class ExaSearchIntegration:
         else:
             return self._analyze_sentiment_fallback(text)
     
-    def _analyze_sentiment_detailed(self, text: str) -> Dict[str, Any]:
+    def _sentiment_fields(self, text: Union[str, PreparedText]) -> Dict[str, Any]:
+        """Sentiment of a page with its confidence and the method and model that produced it"""
+        result = self._analyze_sentiment_detailed(text)
+        if ENHANCED_SENTIMENT_AVAILABLE:
+            return mention_sentiment_fields(result)
+        return {
+            'sentiment': result['sentiment'],
+            'sentiment_confidence': result.get('confidence'),
+            'sentiment_method': result.get('method'),
+            'sentiment_model': None
+        }
+    
+    def _analyze_sentiment_detailed(self, text: Union[str, PreparedText]) -> Dict[str, Any]:
         """Get detailed sentiment analysis with confidence and reasoning"""
         if not text:
             return {
@@ -257,24 +479,14 @@ class ExaSearchIntegration:
         else:
             return self._analyze_sentiment_detailed_fallback(text)
     
-    def _analyze_sentiment_fallback(self, text: str) -> str:
+    def _count_sentiment_keywords(self, text: Union[str, PreparedText]):
+        """Count distinct positive and negative keywords in a single pass"""
+        hits = find_keywords(text)
+        return len(hits['positive']), len(hits['negative'])
+    
+    def _analyze_sentiment_fallback(self, text: Union[str, PreparedText]) -> str:
         """Fallback rule-based sentiment analysis"""
-        text_lower = text.lower()
-        
-        positive_indicators = [
-            'love', 'great', 'awesome', 'excellent', 'amazing', 'fantastic',
-            'recommend', 'best', 'perfect', 'outstanding', 'impressive',
-            'helpful', 'useful', 'valuable', 'effective', 'successful'
-        ]
-        
-        negative_indicators = [
-            'hate', 'terrible', 'awful', 'worst', 'bad', 'disappointed',
-            'avoid', 'sucks', 'horrible', 'useless', 'failed', 'broken',
-            'frustrating', 'annoying', 'expensive', 'overpriced'
-        ]
-        
-        positive_count = sum(1 for word in positive_indicators if word in text_lower)
-        negative_count = sum(1 for word in negative_indicators if word in text_lower)
+        positive_count, negative_count = self._count_sentiment_keywords(text)
         
         if positive_count > negative_count + 1:
             return 'positive'
@@ -283,25 +495,15 @@ class ExaSearchIntegration:
         else:
             return 'neutral'
     
-    def _analyze_sentiment_detailed_fallback(self, text: str) -> Dict[str, Any]:
+    def _analyze_sentiment_detailed_fallback(self, text: Union[str, PreparedText]) -> Dict[str, Any]:
         """Detailed fallback sentiment analysis"""
-        sentiment = self._analyze_sentiment_fallback(text)
-        text_lower = text.lower()
+        positive_count, negative_count = self._count_sentiment_keywords(text)
         
-        positive_indicators = [
-            'love', 'great', 'awesome', 'excellent', 'amazing', 'fantastic',
-            'recommend', 'best', 'perfect', 'outstanding', 'impressive',
-            'helpful', 'useful', 'valuable', 'effective', 'successful'
-        ]
-        
-        negative_indicators = [
-            'hate', 'terrible', 'awful', 'worst', 'bad', 'disappointed',
-            'avoid', 'sucks', 'horrible', 'useless', 'failed', 'broken',
-            'frustrating', 'annoying', 'expensive', 'overpriced'
-        ]
-        
-        positive_count = sum(1 for word in positive_indicators if word in text_lower)
-        negative_count = sum(1 for word in negative_indicators if word in text_lower)
+        sentiment = 'neutral'
+        if positive_count > negative_count + 1:
+            sentiment = 'positive'
+        elif negative_count > positive_count + 1:
+            sentiment = 'negative'
         
         confidence = 0.3
         if positive_count > negative_count + 1:
@@ -321,30 +523,31 @@ class ExaSearchIntegration:
             'timestamp': time.time()
         }
     
-    def _classify_content_type(self, result: Dict[str, Any]) -> str:
+    def _classify_content_type(self, result: Dict[str, Any],
+                               prepared: Optional[Dict[str, PreparedText]] = None) -> str:
         """Classify the type of content"""
-        url = result.get('url', '').lower()
-        title = result.get('title', '').lower()
-        content = result.get('text', '').lower()
+        prepared = prepared or self._prepare_result_text(result)
+        url_hits = find_keywords(result.get('url', ''))
+        text_hits = prepared['combined'].hits
         
         # Blog/Article indicators
-        if any(indicator in url for indicator in ['blog', 'article', 'post', 'news']):
+        if url_hits['blog_url']:
             return 'blog_article'
         
         # Review indicators
-        if any(indicator in title + content for indicator in ['review', 'rating', 'stars']):
+        if text_hits['review_content']:
             return 'review'
         
         # Forum/Discussion
-        if any(indicator in url for indicator in ['forum', 'discussion', 'reddit', 'stackoverflow']):
+        if url_hits['forum_url']:
             return 'forum_discussion'
         
         # Documentation
-        if any(indicator in url for indicator in ['docs', 'documentation', 'help', 'support']):
+        if url_hits['docs_url']:
             return 'documentation'
         
         # News
-        if any(indicator in url for indicator in ['news', 'press', 'announcement']):
+        if url_hits['news_url']:
             return 'news'
         
         return 'general'
@@ -354,49 +557,48 @@ class ExaSearchIntegration:
         if not content:
             return False
         
-        # Simple patterns for email and contact info
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        phone_pattern = r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b'
-        
-        return bool(re.search(email_pattern, content) or re.search(phone_pattern, content))
+        return bool(EMAIL_PATTERN.search(content) or PHONE_PATTERN.search(content))
     
-    def _extract_mention_context(self, content: str) -> str:
+    def _extract_mention_context(self, content: Union[str, PreparedText]) -> str:
         """Extract surrounding context of brand mentions"""
         if not content:
             return ''
         
-        brand_lower = self.brand_name.lower()
-        content_lower = content.lower()
+        text = content.text if isinstance(content, PreparedText) else content
         
-        # Find brand mentions and extract surrounding context
+        # Locate brand mentions by offset and slice the words around each
         contexts = []
-        words = content.split()
-        words_lower = [w.lower() for w in words]
-        
-        for i, word in enumerate(words_lower):
-            if brand_lower in word:
-                # Extract 10 words before and after
-                start = max(0, i - 10)
-                end = min(len(words), i + 11)
-                context = ' '.join(words[start:end])
-                contexts.append(context)
+        for match in self.brand_matcher.find(text):
+            # Widen the match to the whole words it touches ("#acme's")
+            start = match.start
+            while start > 0 and not text[start - 1].isspace():
+                start -= 1
+            end = match.end
+            while end < len(text) and not text[end].isspace():
+                end += 1
+            
+            before = TOKEN_PATTERN.findall(text, max(0, start - CONTEXT_SCAN_CHARS), start)[-CONTEXT_WORDS:]
+            after = TOKEN_PATTERN.findall(text[end:end + CONTEXT_SCAN_CHARS])[:CONTEXT_WORDS]
+            contexts.append(' '.join(before + text[start:end].split() + after))
+            if len(contexts) == MAX_CONTEXTS:
+                break
         
-        return ' ... '.join(contexts[:2])  # Return first 2 contexts
+        return ' ... '.join(contexts)
     
     def _deduplicate_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate results based on URL"""
+        """Remove duplicate results based on canonical URL (AMP, mobile and tracking variants match)"""
         seen_urls = set()
         unique_results = []
         
         for result in results:
-            url = result.get('url', '')
+            url = canonical_url(result.get('url', ''))
             if url and url not in seen_urls:
                 seen_urls.add(url)
                 unique_results.append(result)
         
         return unique_results
     
-    def _filter_relevant_mentions(self, results: List[Dict[str, Any]], min_relevance: float = 0.3) -> List[Dict[str, Any]]:
+    def _filter_relevant_mentions(self, results: List[Dict[str, Any]], min_relevance: float = MIN_RELEVANCE_SCORE) -> List[Dict[str, Any]]:
         """Filter results to only include relevant mentions"""
         relevant = []
         
@@ -486,43 +688,16 @@ class ExaSearchIntegration:
         if not mentions:
             return {}
         
-        # Basic stats
-        total_mentions = len(mentions)
-        domains = [m.get('domain', '') for m in mentions if m.get('domain')]
-        unique_domains = len(set(domains))
-        
-        # Sentiment breakdown
-        sentiments = {}
-        for mention in mentions:
-            sentiment = mention.get('sentiment', 'neutral')
-            sentiments[sentiment] = sentiments.get(sentiment, 0) + 1
-        
-        # Content type breakdown
-        content_types = {}
-        for mention in mentions:
-            content_type = mention.get('content_type', 'general')
-            content_types[content_type] = content_types.get(content_type, 0) + 1
-        
-        # Top domains
-        domain_counts = {}
-        for domain in domains:
-            if domain:
-                domain_counts[domain] = domain_counts.get(domain, 0) + 1
-        
-        top_domains = sorted(domain_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        
-        # Average relevance score
-        relevance_scores = [m.get('relevance_score', 0) for m in mentions]
-        avg_relevance = sum(relevance_scores) / len(relevance_scores) if relevance_scores else 0
-        
+        # Mentions without a content type count as 'general', and without a score as 0
+        summary = summarize_mentions(({'content_type': 'general', 'relevance_score': 0, **m} for m in mentions), k=10)
         return {
-            'total_mentions': total_mentions,
-            'unique_domains': unique_domains,
-            'sentiment_breakdown': sentiments,
-            'content_type_breakdown': content_types,
-            'top_domains': top_domains,
-            'average_relevance_score': round(avg_relevance, 3),
-            'high_relevance_mentions': len([m for m in mentions if m.get('relevance_score', 0) > 0.7])
+            'total_mentions': summary['total'],
+            'unique_domains': summary['unique_domains'],
+            'sentiment_breakdown': summary['sentiment_breakdown'],
+            'content_type_breakdown': summary['content_type_breakdown'],
+            'top_domains': [(domain['name'], domain['count']) for domain in summary['top_domains']],
+            'average_relevance_score': summary['average_relevance_score'],
+            'high_relevance_mentions': summary['high_relevance_count']
         }
 
 def main():
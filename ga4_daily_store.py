@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+GA4 Daily Row Store for Attribution Dashboard
+Persists GA4 report rows per (property, date, dimension set) so that
+overlapping date windows only fetch the dates that are not stored yet
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dimension sets stored by the GA4 integration
+DIRECT_TRAFFIC = 'direct_traffic'
+ORGANIC_BY_SOURCE = 'organic_by_source'
+LANDING_PAGES = 'landing_pages'
+
+
+def parse_ga4_date(value: str) -> date:
+    """Parse a GA4 `date` dimension value (YYYYMMDD) or an ISO date"""
+    if '-' in value:
+        return date.fromisoformat(value)
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+class GA4DailyStore:
+    """SQLite-backed store of GA4 daily rows with gap detection"""
+
+    def __init__(self, db_path: str = ':memory:', recent_days: int = 2, recent_ttl_seconds: int = 3600):
+        """
+        Initialize the daily row store
+
+        Args:
+            db_path: SQLite database path (':memory:' keeps rows for the process lifetime)
+            recent_days: Dates this close to today are still being processed by GA4
+            recent_ttl_seconds: How long fetched rows for recent dates stay valid
+        """
+        self.db_path = db_path
+        self.recent_days = recent_days
+        self.recent_ttl_seconds = recent_ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS ga4_daily_rows (
+                property_id TEXT NOT NULL,
+                dimension_set TEXT NOT NULL,
+                date TEXT NOT NULL,
+                row_json TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_ga4_daily_rows
+                ON ga4_daily_rows (property_id, dimension_set, date);
+            CREATE TABLE IF NOT EXISTS ga4_fetched_dates (
+                property_id TEXT NOT NULL,
+                dimension_set TEXT NOT NULL,
+                date TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (property_id, dimension_set, date)
+            );
+        """)
+        self._conn.commit()
+
+    def missing_dates(self, property_id: str, dimension_set: str, start_date: date, end_date: date) -> List[date]:
+        """Return the dates in [start_date, end_date] that must be (re)fetched"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT date, fetched_at FROM ga4_fetched_dates "
+                "WHERE property_id = ? AND dimension_set = ? AND date BETWEEN ? AND ?",
+                (property_id, dimension_set, start_date.isoformat(), end_date.isoformat())
+            )
+            fetched = dict(cursor.fetchall())
+
+        now = time.time()
+        recent_cutoff = date.today() - timedelta(days=self.recent_days)
+        missing = []
+        current = start_date
+        while current <= end_date:
+            fetched_at = fetched.get(current.isoformat())
+            if fetched_at is None:
+                missing.append(current)
+            elif current >= recent_cutoff and now - fetched_at > self.recent_ttl_seconds:
+                # GA4 keeps updating the last day or two, so recent rows expire
+                missing.append(current)
+            current += timedelta(days=1)
+        return missing
+
+    def put_rows(self, property_id: str, dimension_set: str, start_date: date, end_date: date,
+                 rows: List[Dict[str, Any]]):
+        """
+        Replace stored rows for every date in [start_date, end_date]
+
+        Dates in the range without rows are recorded as fetched so that
+        days with no traffic are not re-requested.
+        """
+        rows_by_date: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            day = parse_ga4_date(row['date']).isoformat()
+            rows_by_date.setdefault(day, []).append(row)
+
+        now = time.time()
+        fetched = []
+        current = start_date
+        while current <= end_date:
+            fetched.append((property_id, dimension_set, current.isoformat(), now))
+            current += timedelta(days=1)
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM ga4_daily_rows "
+                    "WHERE property_id = ? AND dimension_set = ? AND date BETWEEN ? AND ?",
+                    (property_id, dimension_set, start_date.isoformat(), end_date.isoformat())
+                )
+                self._conn.executemany(
+                    "INSERT INTO ga4_daily_rows (property_id, dimension_set, date, row_json) VALUES (?, ?, ?, ?)",
+                    [
+                        (property_id, dimension_set, day, json.dumps(row))
+                        for day, day_rows in rows_by_date.items()
+                        for row in day_rows
+                    ]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO ga4_fetched_dates (property_id, dimension_set, date, fetched_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    fetched
+                )
+
+    def get_rows(self, property_id: str, dimension_set: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Return stored rows for [start_date, end_date], ordered by date"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT row_json FROM ga4_daily_rows "
+                "WHERE property_id = ? AND dimension_set = ? AND date BETWEEN ? AND ? "
+                "ORDER BY date, rowid",
+                (property_id, dimension_set, start_date.isoformat(), end_date.isoformat())
+            )
+            return [json.loads(row_json) for (row_json,) in cursor.fetchall()]
+
+    def get_or_fetch(self, property_id: str, dimension_set: str, start_date: date, end_date: date,
+                     fetch: Callable[[date, date], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Serve rows for a window, fetching only the missing dates
+
+        Args:
+            property_id: GA4 property the rows belong to
+            dimension_set: Which report the rows come from
+            start_date: First date of the window (inclusive)
+            end_date: Last date of the window (inclusive)
+            fetch: Callable that runs a single ranged GA4 query for (start, end)
+
+        Returns:
+            List of row dicts for the whole window, ordered by date
+        """
+        missing = self.missing_dates(property_id, dimension_set, start_date, end_date)
+        if missing:
+            fetch_start, fetch_end = missing[0], missing[-1]
+            logger.info(f"GA4 {dimension_set}: fetching {fetch_start} to {fetch_end} "
+                        f"({len(missing)} missing of {(end_date - start_date).days + 1} days)")
+            rows = fetch(fetch_start, fetch_end)
+            self.put_rows(property_id, dimension_set, fetch_start, fetch_end, rows)
+        return self.get_rows(property_id, dimension_set, start_date, end_date)
+
+    def stored_date_range(self, property_id: str, dimension_set: str) -> Optional[Dict[str, str]]:
+        """Return the earliest and latest fetched dates for a dimension set"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT MIN(date), MAX(date), COUNT(*) FROM ga4_fetched_dates "
+                "WHERE property_id = ? AND dimension_set = ?",
+                (property_id, dimension_set)
+            )
+            first, last, count = cursor.fetchone()
+        if not count:
+            return None
+        return {'start_date': first, 'end_date': last, 'days_stored': count}
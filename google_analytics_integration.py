@@ -10,6 +10,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
 
+from ga4_daily_store import GA4DailyStore, DIRECT_TRAFFIC, ORGANIC_BY_SOURCE, LANDING_PAGES, parse_ga4_date
+
 try:
     from google.analytics.data_v1beta import BetaAnalyticsDataClient
     from google.analytics.data_v1beta.types import (
@@ -30,10 +32,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Rows requested per runReport call; GA4 returns 10,000 when no limit is set
+REPORT_PAGE_SIZE = 100000
+
 class GoogleAnalyticsIntegration:
     """Google Analytics 4 integration for fetching direct traffic and search data"""
     
-    def __init__(self, property_id: str, credentials_path: str = None, credentials_json: str = None):
+    def __init__(self, property_id: str, credentials_path: str = None, credentials_json: str = None,
+                 daily_store: Optional[GA4DailyStore] = None):
         """
         Initialize GA4 integration
         
@@ -41,6 +47,7 @@ class GoogleAnalyticsIntegration:
             property_id: GA4 Property ID (format: properties/123456789)
             credentials_path: Path to service account JSON file
             credentials_json: Service account JSON as string
+            daily_store: Shared store of daily rows (defaults to an in-memory store)
         """
         if not GA4_AVAILABLE:
             raise ImportError("Google Analytics Data API not available. Install with: pip install google-analytics-data")
@@ -52,6 +59,7 @@ class GoogleAnalyticsIntegration:
         # Initialize credentials
         self.credentials = self._setup_credentials(credentials_path, credentials_json)
         self.client = BetaAnalyticsDataClient(credentials=self.credentials)
+        self.daily_store = daily_store or GA4DailyStore()
         
         logger.info(f"GA4 Integration initialized for property: {self.property_id}")
     
@@ -80,6 +88,162 @@ class GoogleAnalyticsIntegration:
             logger.error(f"Failed to setup GA4 credentials: {e}")
             raise
     
+    def _date_window(self, days_back: int):
+        """Return the (start_date, end_date) window for a days_back lookback"""
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days_back)
+        return start_date, end_date
+    
+    def _channel_filter(self, channel: str) -> FilterExpression:
+        """Build a filter on sessionDefaultChannelGrouping"""
+        return FilterExpression(
+            filter=Filter(
+                field_name="sessionDefaultChannelGrouping",
+                string_filter=Filter.StringFilter(
+                    match_type=Filter.StringFilter.MatchType.EXACT,
+                    value=channel
+                )
+            )
+        )
+    
+    def _run_report(self, request: 'RunReportRequest') -> List[Any]:
+        """Run a report and return every row, paging with offset until row_count is reached"""
+        rows = []
+        request.limit = REPORT_PAGE_SIZE
+        while True:
+            request.offset = len(rows)
+            response = self.client.run_report(request)
+            rows.extend(response.rows)
+            if not response.rows or len(rows) >= response.row_count:
+                return rows
+    
+    def _fetch_direct_traffic_rows(self, start_date, end_date) -> List[Dict[str, Any]]:
+        """Run a single ranged GA4 query for daily direct traffic rows"""
+        request = RunReportRequest(
+            property=self.property_id,
+            dimensions=[
+                Dimension(name="date"),
+                Dimension(name="sessionDefaultChannelGrouping"),
+            ],
+            metrics=[
+                Metric(name="sessions"),
+                Metric(name="totalUsers"),
+                Metric(name="screenPageViews"),
+                Metric(name="bounceRate"),
+                Metric(name="averageSessionDuration")
+            ],
+            date_ranges=[DateRange(
+                start_date=start_date.strftime('%Y-%m-%d'),
+                end_date=end_date.strftime('%Y-%m-%d')
+            )],
+            dimension_filter=self._channel_filter("Direct")
+        )
+        
+        rows = []
+        for row in self._run_report(request):
+            rows.append({
+                'date': row.dimension_values[0].value,
+                'sessions': int(row.metric_values[0].value) if row.metric_values[0].value else 0,
+                'users': int(row.metric_values[1].value) if row.metric_values[1].value else 0,
+                'pageviews': int(row.metric_values[2].value) if row.metric_values[2].value else 0,
+                'bounce_rate': float(row.metric_values[3].value) if row.metric_values[3].value else 0,
+                'average_session_duration': float(row.metric_values[4].value) if row.metric_values[4].value else 0
+            })
+        return rows
+    
+    def _fetch_organic_rows(self, start_date, end_date) -> List[Dict[str, Any]]:
+        """Run a single ranged GA4 query for daily organic search rows by source"""
+        request = RunReportRequest(
+            property=self.property_id,
+            dimensions=[
+                Dimension(name="date"),
+                Dimension(name="sessionDefaultChannelGrouping"),
+                Dimension(name="sessionSource"),
+            ],
+            metrics=[
+                Metric(name="sessions"),
+                Metric(name="totalUsers"),
+                Metric(name="screenPageViews")
+            ],
+            date_ranges=[DateRange(
+                start_date=start_date.strftime('%Y-%m-%d'),
+                end_date=end_date.strftime('%Y-%m-%d')
+            )],
+            dimension_filter=self._channel_filter("Organic Search")
+        )
+        
+        rows = []
+        for row in self._run_report(request):
+            rows.append({
+                'date': row.dimension_values[0].value,
+                'source': row.dimension_values[2].value,
+                'sessions': int(row.metric_values[0].value) if row.metric_values[0].value else 0,
+                'users': int(row.metric_values[1].value) if row.metric_values[1].value else 0,
+                'pageviews': int(row.metric_values[2].value) if row.metric_values[2].value else 0
+            })
+        return rows
+    
+    def _fetch_landing_page_rows(self, start_date, end_date) -> List[Dict[str, Any]]:
+        """Run a single ranged GA4 query for daily direct traffic rows by landing page"""
+        request = RunReportRequest(
+            property=self.property_id,
+            dimensions=[
+                Dimension(name="date"),
+                Dimension(name="landingPage"),
+                Dimension(name="sessionDefaultChannelGrouping"),
+            ],
+            metrics=[
+                Metric(name="sessions"),
+                Metric(name="totalUsers"),
+                Metric(name="bounceRate")
+            ],
+            date_ranges=[DateRange(
+                start_date=start_date.strftime('%Y-%m-%d'),
+                end_date=end_date.strftime('%Y-%m-%d')
+            )],
+            dimension_filter=self._channel_filter("Direct")
+        )
+        
+        rows = []
+        for row in self._run_report(request):
+            rows.append({
+                'date': row.dimension_values[0].value,
+                'landing_page': row.dimension_values[1].value,
+                'sessions': int(row.metric_values[0].value) if row.metric_values[0].value else 0,
+                'users': int(row.metric_values[1].value) if row.metric_values[1].value else 0,
+                'bounce_rate': float(row.metric_values[2].value) if row.metric_values[2].value else 0
+            })
+        return rows
+    
+    def _fetch_range_users(self, start_date, end_date, channel: str,
+                           by_landing_page: bool = False) -> Dict[str, int]:
+        """
+        Distinct users over the whole range for a channel
+        
+        Users are not additive across days (a visitor on five days is one
+        user, not five), so range totals cannot be summed from the stored
+        daily rows and are queried directly.
+        
+        Returns:
+            Dict of landing page -> users, or {'': users} for the channel total
+        """
+        request = RunReportRequest(
+            property=self.property_id,
+            dimensions=[Dimension(name="landingPage")] if by_landing_page else [],
+            metrics=[Metric(name="totalUsers")],
+            date_ranges=[DateRange(
+                start_date=start_date.strftime('%Y-%m-%d'),
+                end_date=end_date.strftime('%Y-%m-%d')
+            )],
+            dimension_filter=self._channel_filter(channel)
+        )
+        
+        users = {}
+        for row in self._run_report(request):
+            key = row.dimension_values[0].value if by_landing_page else ''
+            users[key] = int(row.metric_values[0].value) if row.metric_values[0].value else 0
+        return users
+    
     def get_direct_traffic_data(self, days_back: int = 7) -> Dict[str, Any]:
         """
         Fetch direct traffic data from GA4
@@ -91,67 +255,17 @@ class GoogleAnalyticsIntegration:
             Dict containing direct traffic metrics
         """
         try:
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days_back)
+            start_date, end_date = self._date_window(days_back)
             
-            # Create the request
-            request = RunReportRequest(
-                property=self.property_id,
-                dimensions=[
-                    Dimension(name="date"),
-                    Dimension(name="sessionDefaultChannelGrouping"),
-                ],
-                metrics=[
-                    Metric(name="sessions"),
-                    Metric(name="totalUsers"),
-                    Metric(name="screenPageViews"),
-                    Metric(name="bounceRate"),
-                    Metric(name="averageSessionDuration")
-                ],
-                date_ranges=[DateRange(
-                    start_date=start_date.strftime('%Y-%m-%d'),
-                    end_date=end_date.strftime('%Y-%m-%d')
-                )],
-                dimension_filter=FilterExpression(
-                    filter=Filter(
-                        field_name="sessionDefaultChannelGrouping",
-                        string_filter=Filter.StringFilter(
-                            match_type=Filter.StringFilter.MatchType.EXACT,
-                            value="Direct"
-                        )
-                    )
-                )
+            # Serve stored days locally and fetch only the missing ones
+            direct_traffic_data = self.daily_store.get_or_fetch(
+                self.property_id, DIRECT_TRAFFIC, start_date, end_date,
+                self._fetch_direct_traffic_rows
             )
             
-            # Execute request
-            response = self.client.run_report(request)
-            
-            # Process response
-            direct_traffic_data = []
-            total_sessions = 0
-            total_users = 0
-            total_pageviews = 0
-            
-            for row in response.rows:
-                date_str = row.dimension_values[0].value
-                sessions = int(row.metric_values[0].value) if row.metric_values[0].value else 0
-                users = int(row.metric_values[1].value) if row.metric_values[1].value else 0
-                pageviews = int(row.metric_values[2].value) if row.metric_values[2].value else 0
-                bounce_rate = float(row.metric_values[3].value) if row.metric_values[3].value else 0
-                avg_duration = float(row.metric_values[4].value) if row.metric_values[4].value else 0
-                
-                direct_traffic_data.append({
-                    'date': date_str,
-                    'sessions': sessions,
-                    'users': users,
-                    'pageviews': pageviews,
-                    'bounce_rate': bounce_rate,
-                    'average_session_duration': avg_duration
-                })
-                
-                total_sessions += sessions
-                total_users += users
-                total_pageviews += pageviews
+            total_sessions = sum(row['sessions'] for row in direct_traffic_data)
+            total_users = self._fetch_range_users(start_date, end_date, "Direct").get('', 0)
+            total_pageviews = sum(row['pageviews'] for row in direct_traffic_data)
             
             return {
                 'total_sessions': total_sessions,
@@ -181,61 +295,14 @@ class GoogleAnalyticsIntegration:
             Dict containing branded search metrics
         """
         try:
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days_back)
+            start_date, end_date = self._date_window(days_back)
             
-            # Create filter for organic search traffic
-            organic_filter = FilterExpression(
-                filter=Filter(
-                    field_name="sessionDefaultChannelGrouping",
-                    string_filter=Filter.StringFilter(
-                        match_type=Filter.StringFilter.MatchType.EXACT,
-                        value="Organic Search"
-                    )
-                )
+            daily_data = self.daily_store.get_or_fetch(
+                self.property_id, ORGANIC_BY_SOURCE, start_date, end_date,
+                self._fetch_organic_rows
             )
             
-            request = RunReportRequest(
-                property=self.property_id,
-                dimensions=[
-                    Dimension(name="date"),
-                    Dimension(name="sessionDefaultChannelGrouping"),
-                    Dimension(name="sessionSource"),
-                ],
-                metrics=[
-                    Metric(name="sessions"),
-                    Metric(name="totalUsers"),
-                    Metric(name="screenPageViews")
-                ],
-                date_ranges=[DateRange(
-                    start_date=start_date.strftime('%Y-%m-%d'),
-                    end_date=end_date.strftime('%Y-%m-%d')
-                )],
-                dimension_filter=organic_filter
-            )
-            
-            response = self.client.run_report(request)
-            
-            # Process response and estimate branded search
-            organic_sessions = 0
-            daily_data = []
-            
-            for row in response.rows:
-                date_str = row.dimension_values[0].value
-                source = row.dimension_values[2].value
-                sessions = int(row.metric_values[0].value) if row.metric_values[0].value else 0
-                users = int(row.metric_values[1].value) if row.metric_values[1].value else 0
-                pageviews = int(row.metric_values[2].value) if row.metric_values[2].value else 0
-                
-                daily_data.append({
-                    'date': date_str,
-                    'source': source,
-                    'sessions': sessions,
-                    'users': users,
-                    'pageviews': pageviews
-                })
-                
-                organic_sessions += sessions
+            organic_sessions = sum(row['sessions'] for row in daily_data)
             
             # Estimate branded search (typically 20-40% of organic search for established brands)
             estimated_branded_sessions = int(organic_sessions * 0.3)  # Conservative 30% estimate
@@ -256,65 +323,46 @@ class GoogleAnalyticsIntegration:
             logger.error(f"Error fetching branded search data: {e}")
             raise
     
-    def get_landing_page_data(self, days_back: int = 7) -> Dict[str, Any]:
+    def get_landing_page_data(self, days_back: int = 7, limit: int = 20) -> Dict[str, Any]:
         """
         Fetch landing page data to identify direct traffic patterns
         
         Args:
             days_back: Number of days to look back
+            limit: Number of top landing pages to return
             
         Returns:
             Dict containing landing page metrics for direct traffic
         """
         try:
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days_back)
+            start_date, end_date = self._date_window(days_back)
             
-            request = RunReportRequest(
-                property=self.property_id,
-                dimensions=[
-                    Dimension(name="landingPage"),
-                    Dimension(name="sessionDefaultChannelGrouping"),
-                ],
-                metrics=[
-                    Metric(name="sessions"),
-                    Metric(name="totalUsers"),
-                    Metric(name="bounceRate")
-                ],
-                date_ranges=[DateRange(
-                    start_date=start_date.strftime('%Y-%m-%d'),
-                    end_date=end_date.strftime('%Y-%m-%d')
-                )],
-                dimension_filter=FilterExpression(
-                    filter=Filter(
-                        field_name="sessionDefaultChannelGrouping",
-                        string_filter=Filter.StringFilter(
-                            match_type=Filter.StringFilter.MatchType.EXACT,
-                            value="Direct"
-                        )
-                    )
-                ),
-                limit=20  # Top 20 landing pages
+            daily_rows = self.daily_store.get_or_fetch(
+                self.property_id, LANDING_PAGES, start_date, end_date,
+                self._fetch_landing_page_rows
             )
             
-            response = self.client.run_report(request)
+            # Roll daily rows up per landing page (bounce rate weighted by sessions)
+            pages = {}
+            for row in daily_rows:
+                page = pages.setdefault(row['landing_page'], {'sessions': 0, 'bounces': 0.0})
+                page['sessions'] += row['sessions']
+                page['bounces'] += row['bounce_rate'] * row['sessions']
+            users = self._fetch_range_users(start_date, end_date, "Direct", by_landing_page=True)
             
-            landing_pages = []
-            for row in response.rows:
-                landing_page = row.dimension_values[0].value
-                sessions = int(row.metric_values[0].value) if row.metric_values[0].value else 0
-                users = int(row.metric_values[1].value) if row.metric_values[1].value else 0
-                bounce_rate = float(row.metric_values[2].value) if row.metric_values[2].value else 0
-                
-                landing_pages.append({
+            landing_pages = [
+                {
                     'landing_page': landing_page,
-                    'sessions': sessions,
-                    'users': users,
-                    'bounce_rate': bounce_rate
-                })
+                    'sessions': totals['sessions'],
+                    'users': users.get(landing_page, 0),
+                    'bounce_rate': totals['bounces'] / totals['sessions'] if totals['sessions'] else 0
+                }
+                for landing_page, totals in pages.items()
+            ]
+            landing_pages.sort(key=lambda x: x['sessions'], reverse=True)
             
             return {
-                'landing_pages': landing_pages,
+                'landing_pages': landing_pages[:limit],
                 'date_range': {
                     'start_date': start_date.strftime('%Y-%m-%d'),
                     'end_date': end_date.strftime('%Y-%m-%d')
@@ -326,6 +374,52 @@ class GoogleAnalyticsIntegration:
             logger.error(f"Error fetching landing page data: {e}")
             raise
     
+    def get_daily_trend(self, days_back: int = 90) -> Dict[str, Any]:
+        """
+        Build a long-range daily trend of direct and organic sessions
+        
+        Args:
+            days_back: Number of days to look back
+            
+        Returns:
+            Dict with one entry per day, served from the daily row store
+        """
+        try:
+            start_date, end_date = self._date_window(days_back)
+            
+            direct_rows = self.daily_store.get_or_fetch(
+                self.property_id, DIRECT_TRAFFIC, start_date, end_date,
+                self._fetch_direct_traffic_rows
+            )
+            organic_rows = self.daily_store.get_or_fetch(
+                self.property_id, ORGANIC_BY_SOURCE, start_date, end_date,
+                self._fetch_organic_rows
+            )
+            
+            trend = {}
+            current = start_date
+            while current <= end_date:
+                trend[current.isoformat()] = {'date': current.isoformat(), 'direct_sessions': 0, 'organic_sessions': 0}
+                current += timedelta(days=1)
+            
+            for row in direct_rows:
+                trend[parse_ga4_date(row['date']).isoformat()]['direct_sessions'] += row['sessions']
+            for row in organic_rows:
+                trend[parse_ga4_date(row['date']).isoformat()]['organic_sessions'] += row['sessions']
+            
+            return {
+                'daily_data': list(trend.values()),
+                'date_range': {
+                    'start_date': start_date.strftime('%Y-%m-%d'),
+                    'end_date': end_date.strftime('%Y-%m-%d')
+                },
+                'days_analyzed': days_back
+            }
+            
+        except Exception as e:
+            logger.error(f"Error building GA4 daily trend: {e}")
+            raise
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test the GA4 connection
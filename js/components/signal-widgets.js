@@ -234,7 +234,13 @@ function updateSignalWidgets(metrics) {
         hasData: metrics.attribution_score > 0,
         apiName: null
     }, typeof currentTimeframe !== 'undefined' ? currentTimeframe : '7d');
-    
+
+    // Day-over-day change from the server's score history
+    if (typeof metrics.attribution_score_change === 'number') {
+        const change = metrics.attribution_score_change;
+        updateSignalTrend('attributionScoreTrend', `${change >= 0 ? '+' : ''}${change.toFixed(1)}`);
+    }
+
     // Update the dashboard state for consistency
     dashboardState.signals = {
         brandedSearchVolume: metrics.branded_search_volume || 0,
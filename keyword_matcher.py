@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher for Attribution Dashboard
+One compiled, word-bounded pattern that finds every lexicon hit in a text
+in a single pass (shared by metrics, relevance, classification and sentiment),
+plus PreparedText, the per-mention preprocessing shared by every scorer
+"""
+
+import re
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Whitespace-delimited tokens, matching str.split()
+TOKEN_PATTERN = re.compile(r'\S+')
+
+# Runs of word characters; their edges are exactly the regex word boundaries
+WORD_PATTERN = re.compile(r'\w+')
+
+# Inflected forms that count as a lexicon term ("recommended" is "recommend").
+# Listed per term rather than derived from suffixes, which would also turn
+# "issue" into "issued" and "press" into "pressed"; terms not listed match exactly
+TERM_INFLECTIONS = {
+    'love': ('loves', 'loved', 'loving'),
+    'recommend': ('recommends', 'recommended', 'recommending'),
+    'favorite': ('favorites',),
+    'thank': ('thanks', 'thanked'),
+    'appreciate': ('appreciates', 'appreciated'),
+    'hate': ('hates', 'hated', 'hating'),
+    'disaster': ('disasters',),
+    'nightmare': ('nightmares',),
+    'complaint': ('complaints',),
+    'problem': ('problems',),
+    'issue': ('issues',),
+    'bug': ('bugs',),
+    'error': ('errors',),
+    'crash': ('crashes', 'crashed', 'crashing'),
+    'avoid': ('avoids', 'avoided', 'avoiding'),
+    'contact': ('contacts', 'contacted', 'contacting'),
+    'question': ('questions',),
+    'demo': ('demos',),
+    'trial': ('trials',),
+    'signup': ('signups',),
+    'register': ('registers', 'registered', 'registering'),
+    'buy': ('buys', 'buying'),
+    'app': ('apps',),
+    'tool': ('tools',),
+    'platform': ('platforms',),
+    'service': ('services',),
+    'product': ('products',),
+    'review': ('reviews', 'reviewed', 'reviewing'),
+    'comparison': ('comparisons',),
+    'alternative': ('alternatives',),
+    'experience': ('experiences',),
+    'opinion': ('opinions',),
+    'rating': ('ratings',),
+    'blog': ('blogs',),
+    'article': ('articles',),
+    'post': ('posts',),
+    'forum': ('forums',),
+    'discussion': ('discussions',),
+    'announcement': ('announcements',),
+}
+
+LEXICONS = {
+    # Rule-based sentiment
+    'positive': [
+        'love', 'amazing', 'great', 'awesome', 'excellent', 'fantastic', 'wonderful',
+        'perfect', 'brilliant', 'outstanding', 'impressive', 'incredible', 'superb',
+        'thrilled', 'excited', 'happy', 'satisfied', 'pleased', 'delighted',
+        'recommend', 'best', 'favorite', 'thank', 'grateful', 'appreciate',
+        'helpful', 'useful', 'valuable', 'effective', 'successful'
+    ],
+    'negative': [
+        'hate', 'terrible', 'awful', 'horrible', 'bad', 'worst', 'disgusting',
+        'annoying', 'frustrated', 'angry', 'disappointed', 'upset', 'furious',
+        'broken', 'failed', 'useless', 'worthless', 'disaster', 'nightmare',
+        'complaint', 'problem', 'issue', 'bug', 'error', 'crash',
+        'avoid', 'sucks', 'frustrating', 'expensive', 'overpriced'
+    ],
+    # Dashboard signals
+    'inquiry': ['contact', 'inquiry', 'question', 'demo', 'trial', 'pricing'],
+    'high_intent': ['signup', 'register', 'trial', 'demo', 'pricing', 'buy'],
+    # Relevance context
+    'social_context': ['software', 'app', 'tool', 'platform', 'service', 'product'],
+    'web_context': [
+        'review', 'comparison', 'alternative', 'vs', 'versus',
+        'experience', 'opinion', 'recommend', 'using', 'tried',
+        'features', 'pricing', 'benefits', 'pros', 'cons'
+    ],
+    # Content type classification
+    'review_content': ['review', 'rating', 'stars'],
+    'blog_url': ['blog', 'article', 'post', 'news'],
+    'forum_url': ['forum', 'discussion', 'reddit', 'stackoverflow'],
+    'docs_url': ['docs', 'documentation', 'help', 'support'],
+    'news_url': ['news', 'press', 'announcement'],
+}
+
+
+class KeywordMatcher:
+    """Compiled multi-lexicon matcher using a single alternation regex with word boundaries"""
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]],
+                 inflections: Optional[Dict[str, Iterable[str]]] = None):
+        self.lexicons = {name: [term.lower() for term in terms] for name, terms in lexicons.items()}
+
+        # Map each term to every lexicon it belongs to (e.g. 'trial' is inquiry and high intent)
+        self.term_lexicons: Dict[str, List[str]] = {}
+        for name, terms in self.lexicons.items():
+            for term in terms:
+                term_lexicons = self.term_lexicons.setdefault(term, [])
+                if name not in term_lexicons:
+                    term_lexicons.append(name)
+
+        # Every accepted form (the term and its listed inflections) -> canonical term
+        inflections = TERM_INFLECTIONS if inflections is None else inflections
+        self.word_forms: Dict[str, str] = {term: term for term in self.term_lexicons}
+        for term in self.term_lexicons:
+            for form in inflections.get(term, ()):
+                self.word_forms.setdefault(form.lower(), term)
+
+        # Single-word lexicons are matched by looking every word up in word_forms;
+        # multi-word terms need the alternation regex instead, longest forms first
+        # so longer forms win the alternation.
+        self.single_word = all(WORD_PATTERN.fullmatch(term) for term in self.term_lexicons)
+        alternation = '|'.join(re.escape(form) for form in sorted(self.word_forms, key=len, reverse=True))
+        self.pattern = re.compile(rf'\b({alternation})\b')
+
+    def find_terms(self, text: str, lowercase: bool = True) -> List[str]:
+        """Return the lexicon term of every keyword occurrence in text, in order"""
+        if not text:
+            return []
+        if lowercase:
+            text = text.lower()
+        if self.single_word:
+            word_forms = self.word_forms
+            return [word_forms[word] for word in WORD_PATTERN.findall(text) if word in word_forms]
+        return [self.word_forms[form] for form in self.pattern.findall(text)]
+
+    def group_terms(self, terms: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """Group matched terms into {lexicon: {term: occurrences}}; every lexicon is present"""
+        hits: Dict[str, Dict[str, int]] = {name: {} for name in self.lexicons}
+        term_lexicons = self.term_lexicons
+        for term in terms:
+            for name in term_lexicons[term]:
+                lexicon_hits = hits[name]
+                lexicon_hits[term] = lexicon_hits.get(term, 0) + 1
+        return hits
+
+    def find(self, text: str, lowercase: bool = True) -> Dict[str, Dict[str, int]]:
+        """
+        Find every lexicon hit in a text in one pass
+
+        Args:
+            text: Text to scan
+            lowercase: Lowercase the text first (pass False if it already is)
+
+        Returns:
+            Dict of lexicon name -> {term: occurrences}; every lexicon is present
+        """
+        return self.group_terms(self.find_terms(text, lowercase))
+
+
+# Shared matcher used by every integration
+keyword_matcher = KeywordMatcher(LEXICONS)
+
+
+def find_keywords(text: Union[str, 'PreparedText']) -> Dict[str, Dict[str, int]]:
+    """Find every lexicon hit in text using the shared matcher"""
+    if isinstance(text, PreparedText):
+        return text.hits
+    return keyword_matcher.find(text)
+
+
+class PreparedText:
+    """
+    Text preprocessed once per mention: lowercase form, tokens, token
+    offsets and lexicon hits are computed on first use and then reused
+    by sentiment, relevance, classification and context extraction
+    """
+
+    def __init__(self, text: str, matcher: KeywordMatcher = None):
+        self.text = text or ''
+        self.matcher = matcher or keyword_matcher
+        self._parts: Tuple['PreparedText', ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Whitespace-delimited tokens (str.split())"""
+        return self.text.split()
+
+    @cached_property
+    def lower_tokens(self) -> List[str]:
+        return [token.lower() for token in self.tokens]
+
+    @cached_property
+    def token_offsets(self) -> List[Tuple[int, int]]:
+        """(start, end) character offset of each token in the original text"""
+        return [match.span() for match in TOKEN_PATTERN.finditer(self.text)]
+
+    @property
+    def word_count(self) -> int:
+        return len(self.tokens)
+
+    @cached_property
+    def terms(self) -> List[str]:
+        """Lexicon term of every keyword occurrence, in order"""
+        if self._parts:
+            # Joined text: reuse the parts' matches instead of scanning again
+            return [term for part in self._parts for term in part.terms]
+        return self.matcher.find_terms(self.lower, lowercase=False)
+
+    @cached_property
+    def hits(self) -> Dict[str, Dict[str, int]]:
+        """Lexicon hits for the text (see KeywordMatcher.find)"""
+        return self.matcher.group_terms(self.terms)
+
+    @classmethod
+    def concat(cls, *parts: 'PreparedText', sep: str = '\n') -> 'PreparedText':
+        """
+        Join prepared texts; the result's keyword matches are merged from the parts
+
+        The separator must be whitespace so that no token or keyword spans two parts.
+        """
+        combined = cls(sep.join(part.text for part in parts), parts[0].matcher if parts else None)
+        combined._parts = parts
+        return combined
+
+
+def prepare_text(text: Union[str, PreparedText]) -> PreparedText:
+    """Return text as a PreparedText, reusing it if it already is one"""
+    if isinstance(text, PreparedText):
+        return text
+    return PreparedText(text)
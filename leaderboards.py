@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Leaderboards for Attribution Dashboard
+Top authors, subreddits, domains and hashtags per day window, by mention count
+or engagement, kept up to date as mentions arrive and age out
+"""
+
+import heapq
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Any, Hashable, List, Optional, Tuple
+import logging
+
+from attribution_engine import DEFAULT_WINDOWS, mention_day, mention_key
+from mention_summary import engagement_total, mention_author, mention_domain
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ('author', 'subreddit', 'domain', 'hashtag')
+WEIGHTS = ('count', 'engagement')
+
+# Items tracked per window, dimension and weight before Space-Saving evicts the smallest
+DEFAULT_CAPACITY = 5000
+
+
+def mention_items(mention: Dict[str, Any]) -> Dict[str, List[Hashable]]:
+    """Leaderboard items of a mention for each dimension"""
+    items: Dict[str, List[Hashable]] = {dimension: [] for dimension in DIMENSIONS}
+    author = mention_author(mention)
+    if author:
+        items['author'].append((mention.get('platform') or '', author))
+    if mention.get('subreddit'):
+        items['subreddit'].append(mention['subreddit'])
+    domain = mention_domain(mention)
+    if domain:
+        items['domain'].append(domain)
+    # TikTok hashtags from extract_hashtags ("#name"), counted once per mention
+    hashtags = {str(tag).lstrip('#').lower() for tag in mention.get('hashtags') or () if str(tag).strip('#')}
+    items['hashtag'].extend(sorted(hashtags))
+    return items
+
+
+class SpaceSavingCounter:
+    """
+    Weighted Space-Saving sketch
+
+    Exact while it tracks at most `capacity` items. Beyond that, a new item
+    replaces the smallest one and inherits its count as an error bound, so
+    heavy hitters are never lost and counts are overestimated by at most
+    the recorded error. A lazy min-heap finds the smallest item.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        # item -> [count, error]
+        self._counts: Dict[Hashable, List[float]] = {}
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._pushes = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _push(self, item: Hashable, count: float):
+        # The push counter breaks ties so items themselves are never compared
+        self._pushes += 1
+        heapq.heappush(self._heap, (count, self._pushes, item))
+        if len(self._heap) > 4 * max(self.capacity, len(self._counts)):
+            self._heap = [(entry[0], i, item) for i, (item, entry) in enumerate(self._counts.items())]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[Hashable, List[float]]:
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            entry = self._counts.get(item)
+            if entry is not None and entry[0] == count:
+                return item, entry
+
+    def add(self, item: Hashable, weight: float = 1.0):
+        entry = self._counts.get(item)
+        if entry is None:
+            if len(self._counts) < self.capacity:
+                entry = self._counts[item] = [0.0, 0.0]
+            else:
+                evicted, evicted_entry = self._pop_min()
+                del self._counts[evicted]
+                entry = self._counts[item] = [evicted_entry[0], evicted_entry[0]]
+        entry[0] += weight
+        self._push(item, entry[0])
+
+    def subtract(self, item: Hashable, weight: float = 1.0):
+        """Remove weight from a tracked item (untracked items were already evicted)"""
+        entry = self._counts.get(item)
+        if entry is None:
+            return
+        entry[0] -= weight
+        # Tolerance for float engagement weights that should cancel exactly
+        if entry[0] <= entry[1] + 1e-9:
+            del self._counts[item]
+        else:
+            self._push(item, entry[0])
+
+    def top(self, k: int) -> List[Tuple[Hashable, float, float]]:
+        """(item, count, error) for the k largest counts"""
+        largest = heapq.nlargest(k, self._counts.items(), key=lambda pair: pair[1][0])
+        return [(item, entry[0], entry[1]) for item, entry in largest]
+
+
+class LeaderboardIndex:
+    """
+    Per-window top-K counters for every dimension and weight
+
+    Like the attribution engine, each window's counters cover the days
+    [today - W, today] and are updated as mentions are added and as days
+    roll over (the day leaving a window is subtracted), so a query only
+    selects the top K from counters that are already current. Mentions
+    without a valid timestamp count towards every window.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = DEFAULT_WINDOWS, capacity: int = DEFAULT_CAPACITY):
+        self.windows = tuple(sorted(windows))
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._today = date.today()
+        # day (None for undated) -> (dimension, weight) -> exact Counter
+        self._days: Dict[Optional[date], Dict[Tuple[str, str], Counter]] = {}
+        # window -> (dimension, weight) -> sketch over the window's days
+        self._window_counters = {
+            window: {(dimension, weight): SpaceSavingCounter(capacity)
+                     for dimension in DIMENSIONS for weight in WEIGHTS}
+            for window in self.windows
+        }
+        # mention key -> (day, items, engagement), so re-adding a mention is idempotent
+        self._seen: Dict[str, Tuple[Optional[date], Dict[str, List[Hashable]], float]] = {}
+
+    def _in_window(self, day: Optional[date], window: int) -> bool:
+        return day is None or self._today - timedelta(days=window) <= day <= self._today
+
+    def _apply(self, day: Optional[date], items: Dict[str, List[Hashable]], engagement: float, sign: int):
+        """Add (sign=1) or remove (sign=-1) one mention's items"""
+        if day is not None and day < self._today - timedelta(days=self.windows[-1]):
+            return
+        day_counters = self._days.setdefault(day, {})
+        windows = [window for window in self.windows if self._in_window(day, window)]
+        for dimension, dimension_items in items.items():
+            for item in dimension_items:
+                for weight, amount in (('count', 1.0), ('engagement', engagement)):
+                    if not amount:
+                        continue
+                    day_counters.setdefault((dimension, weight), Counter())[item] += sign * amount
+                    for window in windows:
+                        counter = self._window_counters[window][(dimension, weight)]
+                        if sign > 0:
+                            counter.add(item, amount)
+                        else:
+                            counter.subtract(item, amount)
+
+    def _apply_day(self, day: date, window: int, sign: int):
+        for key, counter in self._days.get(day, {}).items():
+            window_counter = self._window_counters[window][key]
+            for item, amount in counter.items():
+                if amount > 0:
+                    if sign > 0:
+                        window_counter.add(item, amount)
+                    else:
+                        window_counter.subtract(item, amount)
+
+    def _advance(self, today: date):
+        """Roll every window forward to today, subtracting the days that leave it"""
+        while self._today < today:
+            self._today += timedelta(days=1)
+            for window in self.windows:
+                self._apply_day(self._today, window, 1)
+                self._apply_day(self._today - timedelta(days=window + 1), window, -1)
+        cutoff = self._today - timedelta(days=self.windows[-1])
+        for day in [day for day in self._days if day is not None and day < cutoff]:
+            del self._days[day]
+        for key in [key for key, entry in self._seen.items() if entry[0] is not None and entry[0] < cutoff]:
+            del self._seen[key]
+
+    @staticmethod
+    def _entry(mention: Dict[str, Any]) -> Tuple[Optional[date], Dict[str, List[Hashable]], float]:
+        return mention_day(mention), mention_items(mention), engagement_total(mention)
+
+    def _set(self, key: str, entry: Tuple[Optional[date], Dict[str, List[Hashable]], float]) -> bool:
+        """Count a mention as entry, replacing what was counted for its key (lock held)"""
+        previous = self._seen.get(key)
+        if previous == entry:
+            return False
+        if previous is not None:
+            self._apply(*previous, sign=-1)
+            del self._seen[key]
+        if entry[0] is not None and entry[0] < self._today - timedelta(days=self.windows[-1]):
+            # Older than every window; not worth remembering
+            return previous is not None
+        self._apply(*entry, sign=1)
+        self._seen[key] = entry
+        return True
+
+    def add_mention(self, mention: Dict[str, Any]) -> bool:
+        """
+        Add or update one mention
+
+        Returns:
+            True if any counter changed
+        """
+        with self._lock:
+            self._advance(date.today())
+            return self._set(mention_key(mention), self._entry(mention))
+
+    def add_mentions(self, mentions: List[Dict[str, Any]]) -> int:
+        """Add or update many mentions; returns how many changed the counters"""
+        return sum(1 for mention in mentions if self.add_mention(mention))
+
+    def replace_mentions(self, mentions: List[Dict[str, Any]]) -> int:
+        """
+        Make the leaderboards count exactly these mentions
+
+        Used when the mentions cache is rewritten, so mentions dropped from
+        it leave the leaderboards too, as in the attribution engine.
+
+        Returns:
+            Number of mentions added, updated or removed
+        """
+        with self._lock:
+            self._advance(date.today())
+            entries = {mention_key(mention): self._entry(mention) for mention in mentions}
+            changed = 0
+            for key in [key for key in self._seen if key not in entries]:
+                self._apply(*self._seen.pop(key), sign=-1)
+                changed += 1
+            changed += sum(1 for key, entry in entries.items() if self._set(key, entry))
+            return changed
+
+    def has_window(self, window: int) -> bool:
+        return window in self._window_counters
+
+    def top(self, dimension: str, window: int, k: int = 20, weight: str = 'count') -> List[Dict[str, Any]]:
+        """
+        Top k items of a dimension in a window
+
+        Args:
+            dimension: One of DIMENSIONS
+            window: One of the index's windows (days)
+            k: Entries to return
+            weight: 'count' (mentions) or 'engagement' (likes, comments, shares, score)
+
+        Returns:
+            Ranked entries; `error` is the most a count may be overestimated by
+        """
+        with self._lock:
+            self._advance(date.today())
+            ranked = self._window_counters[window][(dimension, weight)].top(k)
+
+        entries = []
+        for rank, (item, value, error) in enumerate(ranked, start=1):
+            entry = {'rank': rank, weight: round(value, 2), 'error': round(error, 2)}
+            if dimension == 'author':
+                entry['platform'], entry['name'] = item
+            else:
+                entry['name'] = item
+            entries.append(entry)
+        return entries
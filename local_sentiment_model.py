@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Local Sentiment Model for Attribution Dashboard
+CPU-only sentiment classifier distilled from cached LLM labels: hashed word
+unigram/bigram features and multinomial logistic regression, stored as
+NumPy arrays. Scores thousands of texts per second with no network.
+
+Usage:
+python local_sentiment_model.py train [sentiment_cache.sqlite3] [model.npz]
+python local_sentiment_model.py report [model.npz] [sentiment_cache.sqlite3]
+
+Installation:
+pip install numpy
+"""
+
+import json
+import sys
+import time
+import zlib
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+import logging
+
+from keyword_matcher import WORD_PATTERN, PreparedText
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LABELS = ('negative', 'neutral', 'positive')
+LABEL_INDEX = {label: i for i, label in enumerate(LABELS)}
+
+# Hashed feature space (2^18 columns)
+N_FEATURES = 1 << 18
+
+# The analyzer only uses the model when it agreed with the LLM this often on held-out labels
+MIN_AGREEMENT = 0.85
+
+# Too few labels make the agreement estimate meaningless
+MIN_TRAINING_EXAMPLES = 50
+
+DEFAULT_CACHE_PATH = 'data_cache/sentiment_cache.sqlite3'
+DEFAULT_MODEL_PATH = 'data_cache/local_sentiment_model.npz'
+
+TextLike = Union[str, PreparedText]
+
+
+def hashed_features(text: TextLike, n_features: int = N_FEATURES) -> Tuple[List[int], List[float]]:
+    """
+    Hashed word unigram and bigram features of a text
+
+    Returns:
+        (column indices, L2-normalized values); CRC32 keeps hashes stable across processes
+    """
+    lower = text.lower if isinstance(text, PreparedText) else (text or '').lower()
+    words = WORD_PATTERN.findall(lower)
+    grams = words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+
+    counts: Dict[int, float] = {}
+    for gram in grams:
+        column = zlib.crc32(gram.encode('utf-8')) % n_features
+        counts[column] = counts.get(column, 0.0) + 1.0
+
+    if not counts:
+        return [], []
+    norm = sum(value * value for value in counts.values()) ** 0.5
+    return list(counts), [value / norm for value in counts.values()]
+
+
+class LocalSentimentModel:
+    """Multinomial logistic regression over hashed n-gram features"""
+
+    def __init__(self, weights: 'np.ndarray', bias: 'np.ndarray', n_features: int = N_FEATURES,
+                 metadata: Optional[Dict[str, Any]] = None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy not available. Install with: pip install numpy")
+        self.weights = weights
+        self.bias = bias
+        self.n_features = n_features
+        self.metadata = metadata or {}
+
+    @staticmethod
+    def _sparse_matrix(texts: Sequence[TextLike], n_features: int) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """COO (rows, columns, values) feature matrix for texts"""
+        rows: List[int] = []
+        columns: List[int] = []
+        values: List[float] = []
+        for row, text in enumerate(texts):
+            text_columns, text_values = hashed_features(text, n_features)
+            rows.extend([row] * len(text_columns))
+            columns.extend(text_columns)
+            values.extend(text_values)
+        return (np.asarray(rows, dtype=np.int64), np.asarray(columns, dtype=np.int64),
+                np.asarray(values, dtype=np.float64))
+
+    @staticmethod
+    def _softmax(logits: 'np.ndarray') -> 'np.ndarray':
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    @staticmethod
+    def _logits(rows, columns, values, weights, bias, n_rows: int) -> 'np.ndarray':
+        logits = np.empty((n_rows, len(LABELS)))
+        for k in range(len(LABELS)):
+            logits[:, k] = np.bincount(rows, weights=values * weights[columns, k], minlength=n_rows)
+        return logits + bias
+
+    @classmethod
+    def _fit(cls, texts: Sequence[TextLike], labels: Sequence[str], n_features: int,
+             epochs: int, learning_rate: float, l2: float) -> Tuple['np.ndarray', 'np.ndarray']:
+        """Full-batch Adam on the cross-entropy loss with L2 regularization"""
+        rows, columns, values = cls._sparse_matrix(texts, n_features)
+        n_rows = len(texts)
+        targets = np.zeros((n_rows, len(LABELS)))
+        targets[np.arange(n_rows), [LABEL_INDEX[label] for label in labels]] = 1.0
+
+        weights = np.zeros((n_features, len(LABELS)))
+        bias = np.zeros(len(LABELS))
+        moment = [np.zeros_like(weights), np.zeros_like(bias)]
+        velocity = [np.zeros_like(weights), np.zeros_like(bias)]
+        beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+
+        for step in range(1, epochs + 1):
+            error = (cls._softmax(cls._logits(rows, columns, values, weights, bias, n_rows)) - targets) / n_rows
+            grad_weights = np.empty_like(weights)
+            for k in range(len(LABELS)):
+                grad_weights[:, k] = np.bincount(columns, weights=values * error[rows, k], minlength=n_features)
+            grad_weights += l2 * weights
+            grad_bias = error.sum(axis=0)
+
+            for i, (param, grad) in enumerate(((weights, grad_weights), (bias, grad_bias))):
+                moment[i] = beta1 * moment[i] + (1 - beta1) * grad
+                velocity[i] = beta2 * velocity[i] + (1 - beta2) * grad * grad
+                corrected_moment = moment[i] / (1 - beta1 ** step)
+                corrected_velocity = velocity[i] / (1 - beta2 ** step)
+                param -= learning_rate * corrected_moment / (np.sqrt(corrected_velocity) + epsilon)
+
+        return weights, bias
+
+    @classmethod
+    def train(cls, texts: Sequence[TextLike], labels: Sequence[str], n_features: int = N_FEATURES,
+              epochs: int = 150, learning_rate: float = 0.05, l2: float = 1e-5,
+              holdout: float = 0.2, seed: int = 0) -> 'LocalSentimentModel':
+        """
+        Fit the model on LLM-labeled texts
+
+        A holdout split measures agreement with the LLM labels first; the
+        returned model is then refit on every example.
+
+        Args:
+            texts: Training texts
+            labels: LLM sentiment label for each text
+            n_features: Size of the hashed feature space
+            epochs: Full-batch optimization steps
+            learning_rate: Adam step size
+            l2: L2 regularization strength
+            holdout: Fraction of examples held out for the agreement report
+            seed: Shuffle seed for the holdout split
+
+        Returns:
+            Trained model whose metadata includes the holdout agreement report
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy not available. Install with: pip install numpy")
+        labels = [label if label in LABEL_INDEX else 'neutral' for label in labels]
+        if len(texts) < MIN_TRAINING_EXAMPLES:
+            raise ValueError(f"Need at least {MIN_TRAINING_EXAMPLES} labeled texts, got {len(texts)}")
+
+        order = np.random.default_rng(seed).permutation(len(texts))
+        n_holdout = max(1, int(len(texts) * holdout))
+        held_out, kept = order[:n_holdout], order[n_holdout:]
+
+        weights, bias = cls._fit([texts[i] for i in kept], [labels[i] for i in kept],
+                                 n_features, epochs, learning_rate, l2)
+        report = cls(weights, bias, n_features).agreement_report(
+            [texts[i] for i in held_out], [labels[i] for i in held_out]
+        )
+
+        weights, bias = cls._fit(texts, labels, n_features, epochs, learning_rate, l2)
+        return cls(weights, bias, n_features, metadata={
+            'trained_at': time.time(),
+            'training_examples': len(texts),
+            'label_distribution': {label: labels.count(label) for label in LABELS},
+            'agreement': report
+        })
+
+    def predict_proba(self, texts: Sequence[TextLike]) -> 'np.ndarray':
+        """Class probabilities (columns ordered as LABELS) for each text"""
+        rows, columns, values = self._sparse_matrix(texts, self.n_features)
+        return self._softmax(self._logits(rows, columns, values, self.weights, self.bias, len(texts)))
+
+    def predict(self, texts: Sequence[TextLike]) -> Tuple[List[str], 'np.ndarray']:
+        """Predicted label and its probability for each text"""
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [LABELS[i] for i in best], probabilities[np.arange(len(texts)), best]
+
+    def agreement_report(self, texts: Sequence[TextLike], labels: Sequence[str]) -> Dict[str, Any]:
+        """How often the model's labels match the LLM labels, overall and per LLM label"""
+        if not texts:
+            return {'examples': 0, 'agreement': 0.0, 'per_label': {}}
+        predicted, _ = self.predict(texts)
+        per_label = {}
+        for label in LABELS:
+            matches = [p == l for p, l in zip(predicted, labels) if l == label]
+            if matches:
+                per_label[label] = {'examples': len(matches), 'agreement': round(sum(matches) / len(matches), 3)}
+        agreed = sum(p == l for p, l in zip(predicted, labels))
+        return {
+            'examples': len(texts),
+            'agreement': round(agreed / len(texts), 3),
+            'per_label': per_label
+        }
+
+    @property
+    def agreement(self) -> float:
+        """Holdout agreement with the LLM measured at training time"""
+        return self.metadata.get('agreement', {}).get('agreement', 0.0)
+
+    @property
+    def version(self) -> str:
+        """Identifies the training run, recorded as the model of its results"""
+        return f"local-{int(self.metadata.get('trained_at', 0))}"
+
+    def is_trusted(self, min_agreement: float = MIN_AGREEMENT) -> bool:
+        """Whether the model agreed with the LLM often enough to replace it"""
+        return self.agreement >= min_agreement
+
+    def save(self, path: str):
+        """Write the model as a compressed NumPy archive"""
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            n_features=np.asarray(self.n_features),
+                            metadata=np.asarray(json.dumps(self.metadata)))
+
+    @classmethod
+    def load(cls, path: str) -> 'LocalSentimentModel':
+        """Read a model written by save()"""
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy not available. Install with: pip install numpy")
+        with np.load(path) as archive:
+            return cls(archive['weights'], archive['bias'], int(archive['n_features']),
+                       json.loads(str(archive['metadata'])))
+
+
+def main():
+    """Train the local model from the sentiment cache, or report its agreement"""
+    from sentiment_cache import SentimentCache
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('train', 'report'):
+        print("Usage: python local_sentiment_model.py train [sentiment_cache.sqlite3] [model.npz]")
+        print("       python local_sentiment_model.py report [model.npz] [sentiment_cache.sqlite3]")
+        sys.exit(1)
+
+    if sys.argv[1] == 'train':
+        cache_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CACHE_PATH
+        model_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_MODEL_PATH
+        pairs = SentimentCache(cache_path).labeled_texts()
+        print(f"Training on {len(pairs)} LLM-labeled texts from {cache_path}...")
+        started = time.time()
+        model = LocalSentimentModel.train([text for text, _ in pairs], [label for _, label in pairs])
+        model.save(model_path)
+        print(f"Trained in {time.time() - started:.1f}s, saved to {model_path}")
+    else:
+        model_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MODEL_PATH
+        cache_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_CACHE_PATH
+        model = LocalSentimentModel.load(model_path)
+        pairs = SentimentCache(cache_path).labeled_texts()
+        print(f"Cached labels ({len(pairs)} texts, includes training data):")
+        print(json.dumps(model.agreement_report([text for text, _ in pairs], [label for _, label in pairs]), indent=2))
+
+    print("Holdout agreement at training time:")
+    print(json.dumps(model.metadata.get('agreement', {}), indent=2))
+    status = 'used' if model.is_trusted() else 'NOT used'
+    print(f"Agreement {model.agreement:.1%} vs required {MIN_AGREEMENT:.0%}: model will be {status} by the analyzer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Mention Search Index for Attribution Dashboard
+SQLite FTS5 full-text index over mention titles, content and full page text, kept up to date
+as mentions are stored, with BM25-ranked, filtered and paginated search per brand
+"""
+
+import html
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+import logging
+
+from attribution_engine import mention_key
+from web_mention_store import published_timestamp
+
+logger = logging.getLogger(__name__)
+
+# BM25 column weights: a term in the title counts more than one in the body
+TITLE_WEIGHT = 2.0
+CONTENT_WEIGHT = 1.0
+BODY_WEIGHT = 1.0
+
+# Words around each match in a result snippet
+SNIPPET_WORDS = 16
+
+# Private-use characters snippet() puts around matches; the text is HTML-escaped
+# before they become <mark> tags, so mention text can never inject markup
+MATCH_START = '\ue000'
+MATCH_END = '\ue001'
+
+# Quoted phrases, or words with an optional trailing * for prefix search
+QUERY_TERM_PATTERN = re.compile(r'"([^"]*)"|(\w+)(\*?)')
+
+
+def _indexed_text(text: Optional[str]) -> str:
+    """Text as stored in the FTS table, without the match marker characters"""
+    return (text or '').replace(MATCH_START, '').replace(MATCH_END, '')
+
+
+def snippet_html(snippet: Optional[str]) -> str:
+    """HTML-safe snippet with matches wrapped in <mark>"""
+    return html.escape(snippet or '', quote=False).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn user input into an FTS5 query that matches every term
+
+    Words and "quoted phrases" are quoted for FTS5, so operators and
+    punctuation in the input are never interpreted; word* searches a prefix.
+
+    Raises:
+        ValueError: If the input has no searchable terms
+    """
+    terms = []
+    for phrase, word, prefix in QUERY_TERM_PATTERN.findall(text or ''):
+        if phrase.strip():
+            terms.append('"{}"'.format(' '.join(re.findall(r'\w+', phrase))))
+        elif word:
+            terms.append(f'"{word}"{prefix}')
+    if not terms:
+        raise ValueError("Search query has no words")
+    return ' '.join(terms)
+
+
+class MentionSearchIndex:
+    """
+    Full-text index of stored mentions per brand, keyed like the attribution
+    engine (brand plus mention_key)
+    """
+
+    def __init__(self, db_path: str = ':memory:'):
+        """
+        Initialize the index
+
+        Args:
+            db_path: SQLite database path (':memory:' keeps the index for the process lifetime)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(mentions)")]
+        fts_columns = [row[1] for row in self._conn.execute("PRAGMA table_info(mention_fts)")]
+        if columns and ('brand' not in columns or 'body' not in fts_columns):
+            # Index from before mentions were kept per brand or full page text was indexed;
+            # it is rebuilt from the mentions cache
+            logger.info("Rebuilding mention search index")
+            self._conn.executescript("DROP TABLE mentions; DROP TABLE IF EXISTS mention_fts;")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS mentions (
+                id INTEGER PRIMARY KEY,
+                brand TEXT NOT NULL,
+                mention_key TEXT NOT NULL,
+                platform TEXT,
+                published_at REAL,
+                mention_json TEXT NOT NULL,
+                UNIQUE (brand, mention_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_mentions_brand_platform_published
+                ON mentions (brand, platform, published_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS mention_fts USING fts5(
+                title, content, body, tokenize = 'porter unicode61'
+            );
+        """)
+        self._conn.commit()
+
+    def upsert_mentions(self, mentions: Iterable[Dict[str, Any]], brand: str) -> int:
+        """
+        Insert new mentions and re-index changed ones
+
+        Args:
+            mentions: Mentions to index
+            brand: Brand the mentions were found for
+
+        Returns:
+            Number of mentions inserted or updated
+        """
+        with self._lock:
+            with self._conn:
+                changed = self._upsert(mentions, brand)
+        if changed:
+            logger.info(f"Indexed {changed} new or changed mentions")
+        return changed
+
+    def replace_mentions(self, mentions: Iterable[Dict[str, Any]], brand: str) -> int:
+        """
+        Make the brand's indexed mentions exactly these, deleting the others
+
+        Used when the mentions cache is rewritten, so search only returns
+        mentions that are still stored.
+
+        Returns:
+            Number of mentions inserted, updated or deleted
+        """
+        mentions = list(mentions)
+        keep = {mention_key(mention) for mention in mentions}
+        with self._lock:
+            with self._conn:
+                changed = self._upsert(mentions, brand)
+                stale = [(rowid,) for rowid, key in self._conn.execute(
+                    "SELECT id, mention_key FROM mentions WHERE brand = ?", (brand,)
+                ) if key not in keep]
+                self._conn.executemany("DELETE FROM mention_fts WHERE rowid = ?", stale)
+                self._conn.executemany("DELETE FROM mentions WHERE id = ?", stale)
+        if changed or stale:
+            logger.info(f"Indexed {changed} new or changed mentions, removed {len(stale)}")
+        return changed + len(stale)
+
+    def _upsert(self, mentions: Iterable[Dict[str, Any]], brand: str) -> int:
+        changed = 0
+        for mention in mentions:
+            key = mention_key(mention)
+            data = json.dumps(mention, sort_keys=True, default=str)
+            row = self._conn.execute(
+                "SELECT id, mention_json FROM mentions WHERE brand = ? AND mention_key = ?", (brand, key)
+            ).fetchone()
+            if row and row[1] == data:
+                continue
+
+            values = (mention.get('platform') or '', published_timestamp(mention.get('timestamp')), data)
+            if row:
+                rowid = row[0]
+                self._conn.execute(
+                    "UPDATE mentions SET platform = ?, published_at = ?, mention_json = ? WHERE id = ?",
+                    values + (rowid,)
+                )
+                self._conn.execute("DELETE FROM mention_fts WHERE rowid = ?", (rowid,))
+            else:
+                rowid = self._conn.execute(
+                    "INSERT INTO mentions (brand, mention_key, platform, published_at, mention_json) "
+                    "VALUES (?, ?, ?, ?, ?)", (brand, key) + values
+                ).lastrowid
+            # Web mentions keep only an excerpt in content; their full page text is searched as the body
+            content = mention.get('content') or ''
+            full_content = mention.get('full_content') or ''
+            self._conn.execute(
+                "INSERT INTO mention_fts (rowid, title, content, body) VALUES (?, ?, ?, ?)",
+                (rowid, _indexed_text(mention.get('title')), _indexed_text(content),
+                 _indexed_text(full_content if full_content != content else ''))
+            )
+            changed += 1
+        return changed
+
+    def search(self, query: str, brand: str, platform: Optional[str] = None, days_back: Optional[int] = None,
+               limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        Ranked full-text search over a brand's indexed mentions
+
+        Args:
+            query: Words and "phrases" that must all appear (word* for prefixes)
+            brand: Brand whose mentions are searched
+            platform: Only mentions from this platform ('all' or None for every platform)
+            days_back: Only mentions from the last days_back days (undated mentions are kept)
+            limit: Page size
+            offset: Results to skip
+
+        Returns:
+            Total match count and one page of mentions, best first, each with
+            `search_score` (higher is better) and a `search_snippet` (escaped HTML,
+            matches in <mark>)
+
+        Raises:
+            ValueError: If the query has no searchable terms
+        """
+        conditions = ["mention_fts MATCH ?", "m.brand = ?"]
+        params: List[Any] = [fts_query(query), brand]
+        if platform and platform != 'all':
+            conditions.append("m.platform = ?")
+            params.append(platform)
+        if days_back is not None:
+            conditions.append("(m.published_at >= ? OR m.published_at IS NULL)")
+            params.append(time.time() - days_back * 86400)
+        where = ' AND '.join(conditions)
+
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM mention_fts CROSS JOIN mentions m ON m.id = mention_fts.rowid WHERE {where}",
+                params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT m.mention_json, bm25(mention_fts, {TITLE_WEIGHT}, {CONTENT_WEIGHT}, {BODY_WEIGHT}) AS rank, "
+                f"snippet(mention_fts, -1, '{MATCH_START}', '{MATCH_END}', '…', {SNIPPET_WORDS}) "
+                f"FROM mention_fts CROSS JOIN mentions m ON m.id = mention_fts.rowid "
+                f"WHERE {where} ORDER BY rank LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+
+        results = []
+        for data, rank, snippet in rows:
+            mention = json.loads(data)
+            # bm25() is lower for better matches
+            mention['search_score'] = round(-rank, 4)
+            mention['search_snippet'] = snippet_html(snippet)
+            results.append(mention)
+        return {'total': total, 'results': results}
+
+    def get_stats(self, brand: Optional[str] = None) -> Dict[str, Any]:
+        """Indexed mention count, for one brand or overall"""
+        with self._lock:
+            if brand is None:
+                mentions = self._conn.execute("SELECT COUNT(*) FROM mentions").fetchone()[0]
+            else:
+                mentions = self._conn.execute("SELECT COUNT(*) FROM mentions WHERE brand = ?", (brand,)).fetchone()[0]
+        return {'mentions': mentions}
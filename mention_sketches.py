@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Mention Sketches for Attribution Dashboard
+Constant-memory, mergeable per-day sketches (HyperLogLog for unique authors,
+Count-Min for hashtag and keyword frequency, t-digest for views, likes,
+score and engagement percentiles) combined into day-window statistics
+"""
+
+import hashlib
+import heapq
+import math
+import threading
+from array import array
+from datetime import date, timedelta
+from operator import add
+from typing import Dict, Any, Hashable, Iterable, List, Optional, Set, Tuple
+import logging
+
+from attribution_engine import DEFAULT_WINDOWS, mention_day, mention_key
+from keyword_matcher import find_keywords
+from leaderboards import mention_items
+from mention_summary import engagement_total
+
+logger = logging.getLogger(__name__)
+
+# 2^12 registers: ~1.6% standard error on distinct counts, 4 KB per sketch
+HLL_PRECISION = 12
+
+# Count-Min over-counts by at most e/width of the total with probability 1 - e^-depth
+CMS_WIDTH = 1024
+CMS_DEPTH = 4
+
+# Items per day remembered as heavy-hitter candidates for a Count-Min sketch
+CMS_CANDIDATES = 200
+
+# t-digest centroid budget (about this many centroids are kept)
+TDIGEST_COMPRESSION = 200
+
+FREQUENCIES = ('hashtags', 'keywords')
+DISTRIBUTIONS = ('views', 'likes', 'score', 'engagement')
+PERCENTILES = (50, 90, 99)
+
+
+def _hash128(item: Hashable) -> Tuple[int, int]:
+    digest = hashlib.blake2b(repr(item).encode('utf-8'), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+
+
+class HyperLogLog:
+    """Distinct-count sketch; merging two sketches gives the sketch of the union"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item: Hashable):
+        value = _hash128(item)[0]
+        suffix_bits = 64 - self.precision
+        index = value >> suffix_bits
+        rank = suffix_bits - (value & ((1 << suffix_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """
+    Frequency sketch that never under-counts
+
+    Items are hashed into `depth` rows with double hashing. Since the sketch
+    cannot list its items, the heaviest ones seen are kept as candidates so
+    a window can report its most frequent items.
+    """
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH, candidates: int = CMS_CANDIDATES):
+        self.width = width
+        self.depth = depth
+        self.max_candidates = candidates
+        self.table = array('Q', bytes(8 * width * depth))
+        self.total = 0
+        self.candidates: Set[Hashable] = set()
+
+    def _cells(self, item: Hashable) -> List[int]:
+        first, second = _hash128(item)
+        return [row * self.width + (first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, item: Hashable, count: int = 1):
+        for cell in self._cells(item):
+            self.table[cell] += count
+        self.total += count
+        self.candidates.add(item)
+        if len(self.candidates) > 2 * self.max_candidates:
+            self._trim_candidates()
+
+    def _trim_candidates(self):
+        self.candidates = set(heapq.nlargest(self.max_candidates, self.candidates, key=self.estimate))
+
+    def estimate(self, item: Hashable) -> int:
+        return min(self.table[cell] for cell in self._cells(item))
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        self.table = array('Q', map(add, self.table, other.table))
+        self.total += other.total
+        self.candidates |= other.candidates
+        return self
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        """(item, estimated count) for the k most frequent candidates"""
+        estimates = ((item, self.estimate(item)) for item in self.candidates)
+        return heapq.nlargest(k, estimates, key=lambda pair: pair[1])
+
+
+class TDigest:
+    """
+    Merging t-digest for quantiles of a stream of values
+
+    Values are buffered and periodically merged into centroids whose size
+    is bounded by the arcsine scale function, so quantiles near the tails
+    stay accurate with about `compression` centroids.
+    """
+
+    def __init__(self, compression: int = TDIGEST_COMPRESSION):
+        self.compression = compression
+        # (mean, weight), sorted by mean after each compress
+        self.centroids: List[Tuple[float, float]] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) > 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        other._compress()
+        self._buffer.extend(other.centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _scale(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        merged = []
+        mean, weight = points[0]
+        before = 0.0
+        for point_mean, point_weight in points[1:]:
+            if self._scale((before + weight + point_weight) / self.count) - self._scale(before / self.count) <= 1:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                before += weight
+                mean, weight = point_mean, point_weight
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile q (0-1), or None if no values were added"""
+        self._compress()
+        if not self.centroids:
+            return None
+        target = q * self.count
+        # Interpolate between centroid centres, anchored at the observed min and max
+        previous_position, previous_value = 0.0, self.min
+        position = 0.0
+        for mean, weight in self.centroids:
+            centre = position + weight / 2
+            if target <= centre:
+                if centre == previous_position:
+                    return mean
+                fraction = (target - previous_position) / (centre - previous_position)
+                return previous_value + fraction * (mean - previous_value)
+            previous_position, previous_value = centre, mean
+            position += weight
+        if self.count == previous_position:
+            return self.max
+        fraction = (target - previous_position) / (self.count - previous_position)
+        return previous_value + min(fraction, 1.0) * (self.max - previous_value)
+
+
+class DaySketches:
+    """Every sketch for the mentions of one day (or of all undated mentions)"""
+
+    def __init__(self):
+        self.mentions = 0
+        self.authors = HyperLogLog()
+        self.frequencies = {name: CountMinSketch() for name in FREQUENCIES}
+        self.distributions = {name: TDigest() for name in DISTRIBUTIONS}
+        # Mention keys counted here, so each mention is sketched once
+        self.keys: Set[str] = set()
+
+    def merge(self, other: 'DaySketches') -> 'DaySketches':
+        self.mentions += other.mentions
+        self.authors.merge(other.authors)
+        for name, sketch in self.frequencies.items():
+            sketch.merge(other.frequencies[name])
+        for name, digest in self.distributions.items():
+            digest.merge(other.distributions[name])
+        return self
+
+    def add(self, key: str, mention: Dict[str, Any]):
+        """Sketch one mention's authors, hashtags, keywords and values"""
+        items = mention_items(mention)
+        self.mentions += 1
+        for platform, author in items['author']:
+            self.authors.add(f'{platform}:{author}')
+        for hashtag in items['hashtag']:
+            self.frequencies['hashtags'].add(hashtag)
+        for keyword in mention_keywords(mention):
+            self.frequencies['keywords'].add(keyword)
+        for name, value in mention_values(mention).items():
+            self.distributions[name].add(value)
+        self.keys.add(key)
+
+
+def mention_values(mention: Dict[str, Any]) -> Dict[str, float]:
+    """Distribution values a mention reports (web mentions carry no engagement)"""
+    engagement = mention.get('engagement') or {}
+    values = {}
+    # TikTok reports plays, YouTube views
+    for name, fields in (('views', ('views', 'plays')), ('likes', ('likes',)), ('score', ('score',))):
+        for field in fields:
+            if isinstance(engagement.get(field), (int, float)):
+                values[name] = float(engagement[field])
+                break
+    if engagement:
+        values['engagement'] = engagement_total(mention)
+    return values
+
+
+def mention_keywords(mention: Dict[str, Any]) -> Set[str]:
+    """Distinct lexicon terms in a mention's title and content"""
+    text = f"{mention.get('title') or ''}\n{mention.get('content') or ''}"
+    return {term for terms in find_keywords(text).values() for term in terms}
+
+
+def mention_signature(mention: Dict[str, Any]) -> int:
+    """Hash of everything a mention contributes to the sketches, to tell whether it changed"""
+    return hash((repr(sorted(mention_items(mention).items())), mention.get('title') or '',
+                 mention.get('content') or '', tuple(sorted(mention_values(mention).items()))))
+
+
+class WindowedSketches:
+    """
+    Per-day mention sketches combined into the dashboard's day windows
+
+    Each day keeps fixed-size sketches, and a window [today - W, today]
+    is answered by merging at most W + 1 of them (plus the undated
+    mentions, which count towards every window, as in the attribution
+    engine). Memory and query time depend on the window length, not on
+    how many mentions were ingested. Sketches cannot forget a value, so
+    add_mention counts a mention with the values it had when first added;
+    replace_mentions rebuilds every day whose mentions changed instead.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = DEFAULT_WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self._lock = threading.Lock()
+        self._today = date.today()
+        self._days: Dict[date, DaySketches] = {}
+        self._undated = DaySketches()
+        # mention key -> (day it was counted on, mention_signature)
+        self._seen: Dict[str, Tuple[Optional[date], int]] = {}
+        # window -> (today, version, merged sketches); invalidated by any add
+        self._version = 0
+        self._merged: Dict[int, Tuple[date, int, DaySketches]] = {}
+
+    def _advance(self, today: date):
+        """Move to today and drop the days every window has left"""
+        if today <= self._today:
+            return
+        self._today = today
+        cutoff = today - timedelta(days=self.windows[-1])
+        for day in [day for day in self._days if day < cutoff]:
+            for key in self._days.pop(day).keys:
+                self._seen.pop(key, None)
+
+    def add_mention(self, mention: Dict[str, Any]) -> bool:
+        """
+        Sketch one mention
+
+        Returns:
+            True if the mention was new
+        """
+        key = mention_key(mention)
+        day = mention_day(mention)
+
+        with self._lock:
+            self._advance(date.today())
+            if key in self._seen:
+                return False
+            if day is None:
+                sketches = self._undated
+            elif day < self._today - timedelta(days=self.windows[-1]):
+                return False
+            else:
+                sketches = self._days.setdefault(day, DaySketches())
+
+            sketches.add(key, mention)
+            self._seen[key] = (day, mention_signature(mention))
+            self._version += 1
+            return True
+
+    def add_mentions(self, mentions: Iterable[Dict[str, Any]]) -> int:
+        """Sketch many mentions; returns how many were new"""
+        return sum(1 for mention in mentions if self.add_mention(mention))
+
+    def replace_mentions(self, mentions: Iterable[Dict[str, Any]]) -> int:
+        """
+        Make the sketches cover exactly these mentions
+
+        Used when the mentions cache is rewritten. Each day with a mention
+        added, removed or changed (undated mentions count as one more day)
+        is rebuilt from the given mentions; the other days are kept as they
+        are. Mentions dropped from the cache, undated ones included, are
+        forgotten, so the index stays bounded by the cache.
+
+        Returns:
+            Number of days rebuilt
+        """
+        with self._lock:
+            self._advance(date.today())
+            cutoff = self._today - timedelta(days=self.windows[-1])
+            entries: Dict[str, Tuple[Optional[date], int]] = {}
+            by_day: Dict[Optional[date], List[Tuple[str, Dict[str, Any]]]] = {}
+            for mention in mentions:
+                key = mention_key(mention)
+                day = mention_day(mention)
+                if key in entries or (day is not None and day < cutoff):
+                    continue
+                entries[key] = (day, mention_signature(mention))
+                by_day.setdefault(day, []).append((key, mention))
+
+            affected = {day for key, (day, _) in self._seen.items() if entries.get(key) != self._seen[key]}
+            affected.update(day for key, (day, _) in entries.items() if self._seen.get(key) != entries[key])
+            for day in affected:
+                sketches = DaySketches()
+                for key, mention in by_day.get(day, ()):
+                    sketches.add(key, mention)
+                if day is None:
+                    self._undated = sketches
+                elif sketches.mentions:
+                    self._days[day] = sketches
+                else:
+                    self._days.pop(day, None)
+
+            self._seen = entries
+            if affected:
+                self._version += 1
+            return len(affected)
+
+    def has_window(self, window: int) -> bool:
+        return window in self.windows
+
+    def _window(self, window: int) -> DaySketches:
+        cached = self._merged.get(window)
+        if cached and cached[0] == self._today and cached[1] == self._version:
+            return cached[2]
+        merged = DaySketches().merge(self._undated)
+        first_day = self._today - timedelta(days=window)
+        for day, sketches in self._days.items():
+            if first_day <= day <= self._today:
+                merged.merge(sketches)
+        self._merged[window] = (self._today, self._version, merged)
+        return merged
+
+    def get_stats(self, window: int, k: int = 10) -> Dict[str, Any]:
+        """
+        Sketch statistics for a window
+
+        Args:
+            window: One of the windows (days)
+            k: Hashtags and keywords to return
+
+        Returns:
+            Estimated unique authors, top hashtags and keywords (counts never
+            under-estimated) and percentiles of views, likes, score and engagement
+        """
+        with self._lock:
+            self._advance(date.today())
+            sketches = self._window(window)
+
+            distributions = {}
+            for name, digest in sketches.distributions.items():
+                distributions[name] = {
+                    'count': int(digest.count),
+                    **{f'p{percentile}': (round(digest.quantile(percentile / 100), 2) if digest.count else None)
+                       for percentile in PERCENTILES}
+                }
+
+            return {
+                'mentions': sketches.mentions,
+                'unique_authors': sketches.authors.count(),
+                'top_hashtags': [{'name': name, 'count': count}
+                                 for name, count in sketches.frequencies['hashtags'].top(k)],
+                'top_keywords': [{'name': name, 'count': count}
+                                 for name, count in sketches.frequencies['keywords'].top(k)],
+                'distributions': distributions
+            }
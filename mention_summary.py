@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Mention Summary for Attribution Dashboard
+Single-pass, mergeable summary statistics over mentions from any source:
+counts, sentiment/platform/content-type breakdowns, top domains, authors and
+subreddits, and mean relevance, confidence and engagement
+"""
+
+import heapq
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 10
+
+# Relevance and confidence above this count as high
+HIGH_SCORE_THRESHOLD = 0.7
+
+# Interactions summed into a mention's engagement (views and plays measure reach, not engagement)
+ENGAGEMENT_FIELDS = ('likes', 'comments', 'shares', 'score')
+
+UNKNOWN_AUTHORS = ('', 'unknown')
+
+
+def mention_domain(mention: Dict[str, Any]) -> str:
+    """Site of a web mention (Exa `domain`, else the URL host); empty for social posts"""
+    domain = mention.get('domain')
+    if not domain and mention.get('platform') == 'web':
+        domain = mention.get('source') or urlparse(mention.get('url') or '').netloc
+    return (domain or '').lower()
+
+
+def mention_author(mention: Dict[str, Any]) -> str:
+    """Author name, or empty when the source does not know it"""
+    author = str(mention.get('author') or '').strip()
+    return '' if author.lower() in UNKNOWN_AUTHORS else author
+
+
+def engagement_total(mention: Dict[str, Any]) -> float:
+    """Likes, comments, shares and Reddit score of a mention (0 for web mentions)"""
+    engagement = mention.get('engagement') or {}
+    total = 0.0
+    for field in ENGAGEMENT_FIELDS:
+        value = engagement.get(field)
+        if isinstance(value, (int, float)):
+            total += value
+    return total
+
+
+def top_k(counter: Counter, k: int) -> List[Tuple[Any, int]]:
+    """The k most common items, ties in first-seen order (as a stable sort would give)"""
+    return heapq.nlargest(k, counter.items(), key=itemgetter(1))
+
+
+class SummaryAccumulator:
+    """
+    Running summary of a stream of mentions
+
+    add() touches each mention once; merge() combines accumulators built
+    over disjoint parts of the data (e.g. per source or per worker), so the
+    result is the same however the mentions were split.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.sentiments: Counter = Counter()
+        self.platforms: Counter = Counter()
+        self.content_types: Counter = Counter()
+        self.emotions: Counter = Counter()
+        self.domains: Counter = Counter()
+        self.authors: Counter = Counter()
+        self.subreddits: Counter = Counter()
+        # field -> [sum, count, count above HIGH_SCORE_THRESHOLD]
+        self.scores: Dict[str, List[float]] = {'relevance_score': [0.0, 0, 0], 'confidence': [0.0, 0, 0]}
+        self.engagement = 0.0
+        self.earliest: Optional[str] = None
+        self.latest: Optional[str] = None
+
+    def add(self, mention: Dict[str, Any]) -> 'SummaryAccumulator':
+        """Add one mention (or sentiment result)"""
+        self.total += 1
+        self.sentiments[mention.get('sentiment') or 'neutral'] += 1
+        if mention.get('platform'):
+            self.platforms[mention['platform']] += 1
+        if mention.get('content_type'):
+            self.content_types[mention['content_type']] += 1
+        self.emotions.update(mention.get('emotional_categories') or ())
+
+        domain = mention_domain(mention)
+        if domain:
+            self.domains[domain] += 1
+        author = mention_author(mention)
+        if author:
+            self.authors[(mention.get('platform') or '', author)] += 1
+        if mention.get('subreddit'):
+            self.subreddits[mention['subreddit']] += 1
+
+        for field, totals in self.scores.items():
+            value = mention.get(field)
+            if isinstance(value, (int, float)):
+                totals[0] += value
+                totals[1] += 1
+                totals[2] += value > HIGH_SCORE_THRESHOLD
+        self.engagement += engagement_total(mention)
+
+        timestamp = mention.get('timestamp') or mention.get('created_at') or mention.get('published_date')
+        if timestamp:
+            timestamp = str(timestamp)
+            if self.earliest is None or timestamp < self.earliest:
+                self.earliest = timestamp
+            if self.latest is None or timestamp > self.latest:
+                self.latest = timestamp
+        return self
+
+    def add_many(self, mentions: Iterable[Dict[str, Any]]) -> 'SummaryAccumulator':
+        for mention in mentions:
+            self.add(mention)
+        return self
+
+    def merge(self, other: 'SummaryAccumulator') -> 'SummaryAccumulator':
+        """Fold another accumulator's counts into this one"""
+        self.total += other.total
+        for name in ('sentiments', 'platforms', 'content_types', 'emotions', 'domains', 'authors', 'subreddits'):
+            getattr(self, name).update(getattr(other, name))
+        for field, totals in other.scores.items():
+            mine = self.scores[field]
+            for i, value in enumerate(totals):
+                mine[i] += value
+        self.engagement += other.engagement
+        for timestamp in (other.earliest, other.latest):
+            if timestamp is not None:
+                self.earliest = timestamp if self.earliest is None else min(self.earliest, timestamp)
+                self.latest = timestamp if self.latest is None else max(self.latest, timestamp)
+        return self
+
+    def _mean(self, field: str) -> float:
+        total, count, _ = self.scores[field]
+        return total / count if count else 0.0
+
+    def result(self, k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
+        """Summary with the top k domains, authors and subreddits"""
+        def percent(count: int) -> float:
+            return round(count / self.total * 100, 1) if self.total else 0.0
+
+        return {
+            'total': self.total,
+            'sentiment_breakdown': dict(self.sentiments),
+            'sentiment_percent': {sentiment: percent(count) for sentiment, count in self.sentiments.items()},
+            'platform_breakdown': dict(self.platforms),
+            'content_type_breakdown': dict(self.content_types),
+            'emotion_distribution': dict(self.emotions),
+            'unique_domains': len(self.domains),
+            'unique_authors': len(self.authors),
+            'top_domains': [{'name': name, 'count': count} for name, count in top_k(self.domains, k)],
+            'top_authors': [{'name': author, 'platform': platform, 'count': count}
+                            for (platform, author), count in top_k(self.authors, k)],
+            'top_subreddits': [{'name': name, 'count': count} for name, count in top_k(self.subreddits, k)],
+            'average_relevance_score': round(self._mean('relevance_score'), 3),
+            'high_relevance_count': int(self.scores['relevance_score'][2]),
+            'average_confidence': round(self._mean('confidence'), 3),
+            'high_confidence_count': int(self.scores['confidence'][2]),
+            'total_engagement': self.engagement,
+            'average_engagement': round(self.engagement / self.total, 2) if self.total else 0.0,
+            'earliest': self.earliest,
+            'latest': self.latest
+        }
+
+
+def summarize_mentions(mentions: Iterable[Dict[str, Any]], k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
+    """One-pass summary of a collection of mentions"""
+    return SummaryAccumulator().add_many(mentions).result(k)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection for Attribution Dashboard
+Clusters syndicated articles, AMP/canonical URL variants and cross-posts across
+every source: canonical URL normalization plus 64-bit SimHash fingerprints
+indexed with LSH bands, so each distinct piece of content is kept (and
+enriched) once with a count of its duplicates
+"""
+
+import hashlib
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qsl, urlencode
+import logging
+
+from keyword_matcher import WORD_PATTERN
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# Fingerprints within this Hamming distance are near-duplicates
+MAX_HAMMING_DISTANCE = 6
+
+# Bands of the fingerprint used as LSH keys; more bands than the allowed distance
+# means two near-duplicates always share at least one band exactly
+LSH_BANDS = 8
+
+# Word shingle size for SimHash features
+SHINGLE_SIZE = 3
+
+# Texts shorter than this (in words) only match exactly, and only for the same author:
+# SimHash is too noisy on them, and different people post the same short caption
+MIN_SIMHASH_WORDS = 12
+
+# Duplicate URLs kept on a representative
+MAX_DUPLICATE_URLS = 10
+
+HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.', 'old.', 'new.')
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+                   'ref', 'ref_src', 'ref_url', 'si', 'feature', 'share_id', 'amp', 'outputtype'}
+AMP_PATH_PATTERN = re.compile(r'(?:/amp(?:\.html)?|\.amp)/?$')
+REDDIT_POST_PATTERN = re.compile(r'^/r/[^/]+/comments/([a-z0-9]+)', re.IGNORECASE)
+YOUTUBE_SHORTS_PATTERN = re.compile(r'^/(?:shorts|live|embed)/([\w-]+)')
+
+
+def canonical_url(url: Optional[str]) -> str:
+    """
+    Normalize a URL so variants of one page compare equal
+
+    Drops the scheme, www/mobile/AMP host prefixes, AMP path suffixes,
+    tracking parameters, fragments and trailing slashes; maps YouTube and
+    Reddit link forms to one per video or post.
+    """
+    if not url:
+        return ''
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = AMP_PATH_PATTERN.sub('', parsed.path) or '/'
+    params = [(key, value) for key, value in parse_qsl(parsed.query)
+              if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')]
+
+    if host == 'youtu.be':
+        host, path, params = 'youtube.com', '/watch', [('v', path.strip('/'))]
+    elif host == 'youtube.com':
+        shorts = YOUTUBE_SHORTS_PATTERN.match(path)
+        if shorts:
+            path, params = '/watch', [('v', shorts.group(1))]
+        elif path == '/watch':
+            params = [(key, value) for key, value in params if key == 'v']
+    elif host == 'reddit.com' or host == 'redd.it':
+        post = REDDIT_POST_PATTERN.match(path)
+        if post:
+            host, path, params = 'reddit.com', f'/comments/{post.group(1).lower()}', []
+        elif host == 'redd.it':
+            host, path = 'reddit.com', f'/comments/{path.strip("/").lower()}'
+
+    canonical = host + path.rstrip('/')
+    if params:
+        canonical += '?' + urlencode(sorted(params))
+    return canonical
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(words: List[str]) -> int:
+    """64-bit SimHash of a text's word shingles"""
+    if len(words) < SHINGLE_SIZE:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    features = [_feature_hash(shingle) for shingle in shingles]
+    if NUMPY_AVAILABLE:
+        # Set bits per position across all features at once
+        bits = np.asarray(features, dtype=np.uint64)[:, None] >> np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+        weights = (2 * (bits & np.uint64(1)).sum(axis=0, dtype=np.int64) - len(features)).tolist()
+    else:
+        weights = [0] * FINGERPRINT_BITS
+        for feature in features:
+            for bit in range(FINGERPRINT_BITS):
+                weights[bit] += 1 if feature >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def mention_text(mention: Dict[str, Any]) -> str:
+    """Title and body of a processed mention or a raw search result"""
+    title = mention.get('title') or ''
+    body = mention.get('content') or mention.get('text') or ''
+    if title and not body.startswith(title.rstrip('.')):
+        return f'{title}\n{body}'
+    return body
+
+
+def mention_author(mention: Dict[str, Any]) -> str:
+    """Normalized author handle or name of a mention ('' when unknown)"""
+    author = mention.get('author_username') or mention.get('author') or ''
+    author = str(author).strip().lstrip('@').lower()
+    return '' if author == 'unknown' else author
+
+
+class NearDuplicateIndex:
+    """
+    Incremental index of distinct mentions
+
+    A mention joins an existing cluster when its canonical URL matches, when
+    a short text by the same author matches exactly, or when its SimHash is within
+    MAX_HAMMING_DISTANCE of a clustered fingerprint. Candidates come from
+    LSH band buckets, so lookups do not scan every fingerprint.
+    """
+
+    def __init__(self, max_distance: int = MAX_HAMMING_DISTANCE, bands: int = LSH_BANDS):
+        if max_distance >= bands:
+            raise ValueError("LSH needs more bands than the allowed Hamming distance")
+        self.max_distance = max_distance
+        self.bands = bands
+        self.band_bits = FINGERPRINT_BITS // bands
+        self.representatives: List[Dict[str, Any]] = []
+        self._by_url: Dict[str, int] = {}
+        self._by_text: Dict[str, int] = {}
+        self._buckets: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [fingerprint >> (band * self.band_bits) & mask for band in range(self.bands)]
+
+    def _find_similar(self, fingerprint: int) -> Optional[int]:
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            for candidate, cluster in self._buckets[band].get(key, ()):
+                if bin(candidate ^ fingerprint).count('1') <= self.max_distance:
+                    return cluster
+        return None
+
+    def add(self, mention: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Add a mention, merging it into a matching cluster
+
+        Returns:
+            (the cluster's representative, whether the mention was a duplicate)
+        """
+        url = canonical_url(mention.get('url'))
+        words = WORD_PATTERN.findall(mention_text(mention).lower())
+        fingerprint = None
+        text_key = None
+
+        cluster = self._by_url.get(url) if url else None
+        if cluster is None and words:
+            if len(words) < MIN_SIMHASH_WORDS:
+                # Short texts without a known author are only merged by URL
+                author = mention_author(mention)
+                if author:
+                    text_key = author + '\x00' + ' '.join(words)
+                    cluster = self._by_text.get(text_key)
+            else:
+                fingerprint = simhash(words)
+                cluster = self._find_similar(fingerprint)
+
+        if cluster is not None:
+            representative = self.representatives[cluster]
+            # The mention may itself represent earlier duplicates
+            representative['duplicate_count'] = (representative.get('duplicate_count', 0)
+                                                 + 1 + mention.get('duplicate_count', 0))
+            duplicate_urls = representative.setdefault('duplicate_urls', [])
+            for duplicate_url in [mention.get('url')] + mention.get('duplicate_urls', []):
+                if duplicate_url and duplicate_url != representative.get('url') \
+                        and duplicate_url not in duplicate_urls and len(duplicate_urls) < MAX_DUPLICATE_URLS:
+                    duplicate_urls.append(duplicate_url)
+            if url:
+                self._by_url.setdefault(url, cluster)
+            return representative, True
+
+        cluster = len(self.representatives)
+        mention.setdefault('duplicate_count', 0)
+        self.representatives.append(mention)
+        if url:
+            self._by_url[url] = cluster
+        if text_key is not None:
+            self._by_text[text_key] = cluster
+        if fingerprint is not None:
+            for band, key in enumerate(self._band_keys(fingerprint)):
+                self._buckets[band].setdefault(key, []).append((fingerprint, cluster))
+        return mention, False
+
+
+def cluster_mentions(mentions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse near-duplicate mentions
+
+    Returns:
+        One representative per cluster (the first seen), in input order, with
+        `duplicate_count` and `duplicate_urls` covering the rest of its cluster
+    """
+    index = NearDuplicateIndex()
+    for mention in mentions:
+        index.add(mention)
+    removed = len(mentions) - len(index.representatives)
+    if removed:
+        logger.info(f"Collapsed {removed} near-duplicate mentions into {len(index.representatives)} distinct")
+    return index.representatives
@@ -1,38 +1,229 @@
 import os
+import re
 import json
 import time
+import threading
 import requests
-from typing import Dict, List, Optional, Any
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Any, Tuple, Union
 import logging
 
+from keyword_matcher import PreparedText, find_keywords, prepare_text
+from batch_scoring import NUMPY_AVAILABLE, fallback_sentiment_scores
+from rate_limiting import AdaptiveConcurrencyLimiter, THROTTLE_STATUS_CODES, parse_retry_after
+from sentiment_cache import LLM_METHOD_PREFIX, SentimentCache, text_hash
+from local_sentiment_model import LocalSentimentModel
+from mention_summary import summarize_mentions
+
+# Bump whenever the prompt templates change so cached results are not reused
+PROMPT_VERSION = 'v2'
+
+# Compact instructions sent as the system message; the mention is the user message
+SYSTEM_PROMPT = (
+    "Classify the sentiment of a {platform} mention about {brand}. "
+    "Account for sarcasm, irony, slang, negation and platform context. "
+    "Reply with JSON only: sentiment, confidence (0-1), reasoning (one short sentence), "
+    "emotional_categories (up to 3 single words), intensity, context_awareness (short, or empty)."
+)
+BATCH_SYSTEM_PROMPT = (
+    "Classify the sentiment of each {platform} mention about {brand}; mentions are given one per line as "
+    "[index] \"text\". Account for sarcasm, irony, slang, negation and platform context. "
+    "Reply with JSON only: {{\"results\": [...]}} with one object per mention: index, sentiment, "
+    "confidence (0-1), reasoning (one short sentence), emotional_categories (up to 3 single words), "
+    "intensity, context_awareness (short, or empty)."
+)
+
+# JSON schema for structured outputs (response_format) where the model supports them
+SENTIMENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'sentiment': {'type': 'string', 'enum': ['positive', 'negative', 'neutral']},
+        'confidence': {'type': 'number', 'minimum': 0, 'maximum': 1},
+        'reasoning': {'type': 'string'},
+        'emotional_categories': {'type': 'array', 'items': {'type': 'string'}},
+        'intensity': {'type': 'string', 'enum': ['low', 'medium', 'high']},
+        'context_awareness': {'type': 'string'}
+    },
+    'required': ['sentiment', 'confidence', 'reasoning', 'emotional_categories', 'intensity', 'context_awareness'],
+    'additionalProperties': False
+}
+BATCH_SENTIMENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'results': {
+            'type': 'array',
+            'items': {
+                **SENTIMENT_SCHEMA,
+                'properties': {'index': {'type': 'integer'}, **SENTIMENT_SCHEMA['properties']},
+                'required': ['index'] + SENTIMENT_SCHEMA['required']
+            }
+        }
+    },
+    'required': ['results'],
+    'additionalProperties': False
+}
+
+# Longest a caller waits for the credential probe (matches the probe's request timeout)
+PROBE_TIMEOUT = 10
+
+# Cascade: rule-based results at or above this confidence skip the LLM
+DEFAULT_CASCADE_THRESHOLD = 0.6
+
+# Marks an argument that was not passed, where None is a meaningful value
+_UNSET: Any = object()
+
+# Local model predictions at or above this probability skip the LLM
+LOCAL_MODEL_THRESHOLD = 0.75
+
+# Cues the keyword counts cannot handle, so the text always goes to the LLM
+NEGATION_PATTERN = re.compile(
+    r"\b(?:not|no|never|nothing|nobody|hardly|barely|without|neither|nor)\b|n't\b|\b(?:dont|doesnt|didnt|isnt|wasnt|cant|wont)\b"
+)
+SARCASM_PATTERN = re.compile(
+    r"(?:^|\s)/s\b|\byeah,? right\b|\bas if\b|\boh (?:great|wonderful|perfect|joy)\b|\bthanks a lot\b|\bjust what i needed\b|🙄|🙃"
+)
+
+# Batched prompts: at most this many mentions, and roughly this many prompt tokens, per request
+BATCH_SIZE = 20
+BATCH_PROMPT_TOKEN_BUDGET = 3000
+# Completion tokens allowed for a single result, and per mention in a batched response
+SINGLE_MAX_TOKENS = 120
+BATCH_TOKENS_PER_ITEM = 90
+
+VALID_SENTIMENTS = ('positive', 'negative', 'neutral')
+
+# Result methods that did not come from a working model (rule-based fallbacks, empty text, errors)
+UNSCORED_METHODS = ('rule_based_fallback', 'fallback', 'default', 'error')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class OpenRouterAPIError(Exception):
+    """Non-200 response from the OpenRouter API"""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"OpenRouter API error: {status_code} - {message}")
+        self.status_code = status_code
+
+
 class OpenRouterSentimentAnalyzer:
     """Enhanced sentiment analysis using OpenRouter API with multiple AI models"""
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, cache: Optional[SentimentCache] = None,
+                 pool_size: Optional[int] = None, cascade_threshold: Optional[float] = _UNSET,
+                 local_model: Optional[LocalSentimentModel] = None):
         self.api_key = api_key or os.getenv('OPENROUTER_API_KEY')
         self.model = model or os.getenv('OPENROUTER_MODEL', 'google/gemini-2.0-flash-exp')
         self.base_url = 'https://openrouter.ai/api/v1'
         self.initialized = False
         self.fallback_enabled = True
         
-        if self.api_key:
-            self._initialize_openrouter()
-        else:
+        # Requests in flight across all threads adapt to 429/5xx responses and latency
+        self.max_concurrency = max_concurrency or int(os.getenv('OPENROUTER_MAX_CONCURRENCY', '4'))
+        self.limiter = AdaptiveConcurrencyLimiter(max_limit=self.max_concurrency)
+        self.max_retries = 2
+        
+        # Keep-alive connections shared by every worker thread; headers are built once
+        self.pool_size = pool_size or int(os.getenv('OPENROUTER_POOL_SIZE', '0')) or self.max_concurrency
+        self.session = self._create_session()
+        
+        # AI results keyed by (text hash, model, prompt version)
+        self.cache = cache or SentimentCache()
+        
+        # Ask for schema-constrained JSON; switched off if the model rejects response_format
+        self.structured_output = os.getenv('OPENROUTER_STRUCTURED_OUTPUT', 'true').lower() != 'false'
+        self._usage_lock = threading.Lock()
+        self._usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'parse_failures': 0}
+        
+        # Confidence-gated cascade: None sends every text to the LLM. SENTIMENT_CASCADE_THRESHOLD
+        # only replaces the default; an explicit argument (including None) always wins
+        if cascade_threshold is _UNSET:
+            env_threshold = os.getenv('SENTIMENT_CASCADE_THRESHOLD')
+            cascade_threshold = float(env_threshold) if env_threshold else DEFAULT_CASCADE_THRESHOLD
+        self.cascade_threshold = cascade_threshold
+        
+        # Model distilled from cached LLM labels; only trusted if it agreed with the LLM
+        self.local_model = local_model
+        if local_model and not local_model.is_trusted():
+            logging.warning(f"Local sentiment model agreement {local_model.agreement:.1%} is too low; "
+                            f"it is only used when requested with method='local_model'")
+        
+        self._tier_lock = threading.Lock()
+        self._tier_stats = {
+            'cache': 0,
+            'rule_based': 0,
+            'local_model': 0,
+            'llm': 0,
+            'escalated_low_confidence': 0,
+            'escalated_negation': 0,
+            'escalated_sarcasm': 0,
+            'escalated_mixed': 0
+        }
+        
+        # Credentials are probed in the background on first use, never in the constructor
+        self._probe_lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_done = threading.Event()
+        
+        if not self.api_key:
             logging.warning("OpenRouter API key not found. Using fallback sentiment analysis.")
     
+    def _create_session(self) -> requests.Session:
+        """Pooled HTTP session for OpenRouter with the request headers prebuilt"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+            'HTTP-Referer': 'https://attribution-dashboard.local',
+            'X-Title': 'Attribution Dashboard'
+        })
+        return session
+    
+    def start_probe(self):
+        """Start validating credentials in a background thread (once)"""
+        with self._probe_lock:
+            if self._probe_thread is not None or self._probe_done.is_set():
+                return
+            if not self.api_key:
+                self._probe_done.set()
+                return
+            self._probe_thread = threading.Thread(
+                target=self._run_probe, name='openrouter-probe', daemon=True
+            )
+            self._probe_thread.start()
+    
+    def _run_probe(self):
+        try:
+            self._initialize_openrouter()
+        finally:
+            self._probe_done.set()
+    
+    def ensure_ready(self, timeout: Optional[float] = PROBE_TIMEOUT) -> bool:
+        """
+        Start the credential probe if needed and wait for it to finish
+        
+        Returns:
+            True if the OpenRouter API is usable
+        """
+        self.start_probe()
+        self._probe_done.wait(timeout)
+        return self.initialized
+    
     def _initialize_openrouter(self):
         """Initialize OpenRouter API client"""
         try:
-            # Test the API connection with a simple request
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             # Make a simple test request to validate credentials
-            test_response = requests.get(
+            # (this also opens the first pooled connection)
+            test_response = self.session.get(
                 f'{self.base_url}/models',
-                headers=headers,
                 timeout=10
             )
             
@@ -47,117 +238,178 @@ class OpenRouterSentimentAnalyzer:
             logging.error(f"Failed to initialize OpenRouter: {e}")
             self.initialized = False
     
-    def analyze_sentiment(self, text: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+    def analyze_sentiment(self, text: Union[str, PreparedText], context: Dict[str, Any] = None,
+                          method: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze sentiment of given text using OpenRouter AI models
         
         Args:
-            text: Text to analyze
+            text: Text to analyze (or a PreparedText shared with other scorers)
             context: Optional context (platform, brand, etc.)
+            method: 'local_model' scores with the local model only, no network
             
         Returns:
             Dict with sentiment, confidence, reasoning, and categories
         """
-        if not text or not text.strip():
+        prepared = prepare_text(text)
+        if not prepared.text.strip():
             return self._get_neutral_result("Empty text")
         
-        if self.initialized:
-            try:
-                return self._analyze_with_openrouter(text, context)
-            except Exception as e:
-                logging.error(f"OpenRouter analysis failed: {e}")
-                if self.fallback_enabled:
-                    return self._analyze_with_fallback(text)
-                else:
-                    return self._get_error_result(str(e))
+        if method == 'local_model':
+            if self.local_model is None:
+                logging.warning("No local sentiment model loaded; using rule-based analysis")
+                return self._analyze_with_fallback(prepared)
+            return self._analyze_with_local_model([prepared])[0]
+        
+        if self.ensure_ready():
+            cached = self._get_cached(prepared.text, context)
+            if cached:
+                self._count_tier('cache')
+                return cached
+            settled = self._try_rule_based(prepared) or self._try_local_model([prepared])[0]
+            if settled:
+                return settled
+            return self._analyze_with_llm(prepared, context)
+        elif self._local_model_trusted():
+            return self._analyze_with_local_model([prepared])[0]
         else:
-            return self._analyze_with_fallback(text)
+            return self._analyze_with_fallback(prepared)
     
-    def _analyze_with_openrouter(self, text: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Perform sentiment analysis using OpenRouter API"""
-        
-        # Construct prompt with context
-        brand_name = context.get('brand', 'the brand') if context else 'the brand'
-        platform = context.get('platform', 'social media') if context else 'social media'
-        
-        prompt = f"""Analyze the sentiment of this {platform} mention about {brand_name}:
-
-"{text}"
-
-Provide your analysis in this exact JSON format:
-{{
-    "sentiment": "positive|negative|neutral",
-    "confidence": 0.0-1.0,
-    "reasoning": "brief explanation of why this sentiment was chosen",
-    "emotional_categories": ["excited", "frustrated", "curious", "satisfied", "concerned", "enthusiastic"],
-    "intensity": "low|medium|high",
-    "context_awareness": "any cultural, sarcastic, or contextual notes"
-}}
-
-Consider:
-- Sarcasm and irony
-- Cultural context and slang
-- Brand-specific implications
-- Emotional nuance beyond basic positive/negative
-- Context of the platform and conversation
-
-Return only the JSON, no additional text."""
-        
-        # Prepare OpenRouter API request
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json',
-            'HTTP-Referer': 'https://attribution-dashboard.local',
-            'X-Title': 'Attribution Dashboard'
+    def _analyze_with_llm(self, prepared: PreparedText, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Analyze one text with OpenRouter and cache the result"""
+        self._count_tier('llm')
+        try:
+            result = self._analyze_with_openrouter(prepared.text, context)
+            self._store_cached(prepared.text, context, result)
+            return result
+        except Exception as e:
+            logging.error(f"OpenRouter analysis failed: {e}")
+            if self.fallback_enabled:
+                return self._analyze_with_fallback(prepared)
+            else:
+                return self._get_error_result(str(e))
+    
+    def _count_tier(self, tier: str):
+        with self._tier_lock:
+            self._tier_stats[tier] += 1
+    
+    def _escalation_reason(self, prepared: PreparedText, result: Dict[str, Any]) -> Optional[str]:
+        """Why a rule-based result needs the LLM, or None if it can stand"""
+        if SARCASM_PATTERN.search(prepared.lower):
+            return 'sarcasm'
+        if NEGATION_PATTERN.search(prepared.lower):
+            return 'negation'
+        if prepared.hits['positive'] and prepared.hits['negative']:
+            return 'mixed'
+        if result['confidence'] < self.cascade_threshold:
+            return 'low_confidence'
+        return None
+    
+    def _try_rule_based(self, prepared: PreparedText) -> Optional[Dict[str, Any]]:
+        """
+        First cascade tier: return the rule-based result if it is confident and
+        free of negation, sarcasm and mixed-polarity cues, otherwise None
+        """
+        if self.cascade_threshold is None:
+            return None
+        result = self._analyze_with_fallback(prepared)
+        reason = self._escalation_reason(prepared, result)
+        if reason:
+            self._count_tier(f'escalated_{reason}')
+            return None
+        self._count_tier('rule_based')
+        result['method'] = 'rule_based_cascade'
+        return result
+    
+    def _local_model_trusted(self) -> bool:
+        return self.local_model is not None and self.local_model.is_trusted()
+    
+    def _analyze_with_local_model(self, prepared: List[PreparedText]) -> List[Dict[str, Any]]:
+        """Score texts with the local model in one vectorized pass"""
+        labels, confidences = self.local_model.predict(prepared)
+        now = time.time()
+        return [
+            {
+                'sentiment': label,
+                'confidence': round(float(confidence), 3),
+                'reasoning': 'Local model distilled from LLM labels',
+                'emotional_categories': [],
+                'intensity': 'medium' if confidence > 0.6 else 'low',
+                'context_awareness': 'Limited context awareness with local model',
+                'method': 'local_model',
+                'model': self.local_model.version,
+                'text_length': len(item),
+                'timestamp': now
+            }
+            for item, label, confidence in zip(prepared, labels, confidences)
+        ]
+    
+    def _try_local_model(self, prepared: List[PreparedText]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Second cascade tier: local model results confident enough to skip the
+        LLM, or None for texts that still need it (or if the model is not trusted)
+        """
+        if self.cascade_threshold is None or not self._local_model_trusted():
+            return [None] * len(prepared)
+        settled = []
+        for result in self._analyze_with_local_model(prepared):
+            if result['confidence'] >= LOCAL_MODEL_THRESHOLD:
+                self._count_tier('local_model')
+                settled.append(result)
+            else:
+                settled.append(None)
+        return settled
+    
+    def get_cascade_stats(self) -> Dict[str, Any]:
+        """Texts answered by each tier and why texts were escalated to the LLM"""
+        with self._tier_lock:
+            stats = dict(self._tier_stats)
+        answered = stats['cache'] + stats['rule_based'] + stats['local_model'] + stats['llm']
+        return {
+            'threshold': self.cascade_threshold,
+            'answered': answered,
+            'rule_based_rate': round(stats['rule_based'] / answered, 3) if answered else 0.0,
+            **stats
         }
-        
-        data = {
-            'model': self.model,
-            'messages': [
-                {
-                    'role': 'user',
-                    'content': prompt
-                }
-            ],
-            'temperature': 0.3,  # Lower temperature for more consistent analysis
-            'max_tokens': 500,
-            'top_p': 0.9
+    
+    def _get_cached(self, text: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Cached AI result for text under the current model and prompt version"""
+        return self.cache.get(text_hash(text, context), self.model, PROMPT_VERSION)
+    
+    def _store_cached(self, text: str, context: Dict[str, Any], result: Dict[str, Any]):
+        """Cache an AI result; rule-based fallbacks are not cached so they are retried later"""
+        if result.get('method', '').startswith(LLM_METHOD_PREFIX):
+            self.cache.put(text_hash(text, context), self.model, PROMPT_VERSION, result, text=text)
+    
+    @staticmethod
+    def _prompt_context(context: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        return {
+            'brand': context.get('brand', 'the brand') if context else 'the brand',
+            'platform': context.get('platform', 'social media') if context else 'social media'
         }
+    
+    def _analyze_with_openrouter(self, text: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Perform sentiment analysis using OpenRouter API"""
+        messages = [
+            {'role': 'system', 'content': SYSTEM_PROMPT.format(**self._prompt_context(context))},
+            {'role': 'user', 'content': text}
+        ]
         
         try:
-            response = requests.post(
-                f'{self.base_url}/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
-            
-            result_data = response.json()
-            
-            if 'choices' not in result_data or not result_data['choices']:
-                raise Exception("No response choices from OpenRouter API")
-            
-            content = result_data['choices'][0]['message']['content'].strip()
+            content, usage = self._request_completion(messages, SINGLE_MAX_TOKENS, SENTIMENT_SCHEMA)
             
             # Parse JSON response
             try:
-                # Extract JSON from response if it contains other text
-                if '```json' in content:
-                    content = content.split('```json')[1].split('```')[0].strip()
-                elif '{' in content:
-                    start = content.find('{')
-                    end = content.rfind('}') + 1
-                    content = content[start:end]
-                
-                result = json.loads(content)
+                result = json.loads(self._extract_json(content, '{', '}'))
                 
                 # Validate and normalize result
-                return self._normalize_ai_result(result, text)
+                normalized = self._normalize_ai_result(result, text)
+                normalized['prompt_tokens'] = usage['prompt_tokens']
+                normalized['completion_tokens'] = usage['completion_tokens']
+                return normalized
                 
-            except (json.JSONDecodeError, KeyError) as e:
+            except (json.JSONDecodeError, KeyError, AttributeError, TypeError, ValueError) as e:
+                self._record_parse_failure()
                 logging.error(f"Failed to parse OpenRouter response: {e}")
                 logging.error(f"Raw response: {content}")
                 return self._analyze_with_fallback(text)
@@ -166,6 +418,106 @@ Return only the JSON, no additional text."""
             logging.error(f"OpenRouter API request failed: {e}")
             return self._analyze_with_fallback(text)
     
+    def _request_completion(self, messages: List[Dict[str, str]], max_tokens: int,
+                            schema: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, int]]:
+        """
+        Send one chat completion request
+        
+        Args:
+            messages: Chat messages
+            max_tokens: Completion token cap
+            schema: JSON schema for a structured-output response, if supported
+            
+        Returns:
+            (response text, {'prompt_tokens', 'completion_tokens'})
+        """
+        data = {
+            'model': self.model,
+            'messages': messages,
+            'temperature': 0.3,  # Lower temperature for more consistent analysis
+            'max_tokens': max_tokens,
+            'top_p': 0.9
+        }
+        if schema and self.structured_output:
+            data['response_format'] = {
+                'type': 'json_schema',
+                'json_schema': {'name': 'sentiment', 'strict': True, 'schema': schema}
+            }
+        
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.post(
+                    f'{self.base_url}/chat/completions',
+                    json=data,
+                    timeout=30
+                )
+            except requests.exceptions.RequestException:
+                self.limiter.release(None, time.monotonic() - started)
+                raise
+            self.limiter.release(response.status_code, time.monotonic() - started,
+                                 parse_retry_after(response.headers.get('Retry-After')))
+            
+            # Throttled or overloaded: the limiter has backed off, so try again
+            if response.status_code in THROTTLE_STATUS_CODES and attempt < self.max_retries:
+                continue
+            
+            # Model without structured-output support: ask for plain JSON from now on
+            if response.status_code == 400 and 'response_format' in data and 'response_format' in response.text:
+                logging.warning(f"Model {self.model} does not support structured outputs; using plain JSON")
+                self.structured_output = False
+                del data['response_format']
+                continue
+            break
+        
+        if response.status_code != 200:
+            raise OpenRouterAPIError(response.status_code, response.text)
+        
+        result_data = response.json()
+        
+        if 'choices' not in result_data or not result_data['choices']:
+            raise Exception("No response choices from OpenRouter API")
+        
+        usage = result_data.get('usage') or {}
+        usage = {
+            'prompt_tokens': int(usage.get('prompt_tokens', 0)),
+            'completion_tokens': int(usage.get('completion_tokens', 0))
+        }
+        with self._usage_lock:
+            self._usage['requests'] += 1
+            self._usage['prompt_tokens'] += usage['prompt_tokens']
+            self._usage['completion_tokens'] += usage['completion_tokens']
+        
+        return result_data['choices'][0]['message']['content'].strip(), usage
+    
+    def _record_parse_failure(self):
+        with self._usage_lock:
+            self._usage['parse_failures'] += 1
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Requests, prompt/completion tokens and unparseable responses since startup"""
+        with self._usage_lock:
+            usage = dict(self._usage)
+        requests_made = usage['requests']
+        return {
+            **usage,
+            'structured_output': self.structured_output,
+            'avg_prompt_tokens': round(usage['prompt_tokens'] / requests_made, 1) if requests_made else 0.0,
+            'avg_completion_tokens': round(usage['completion_tokens'] / requests_made, 1) if requests_made else 0.0
+        }
+    
+    @staticmethod
+    def _extract_json(content: str, open_char: str, close_char: str) -> str:
+        """Extract the JSON object or array from a response that may contain other text"""
+        if '```json' in content:
+            return content.split('```json')[1].split('```')[0].strip()
+        if open_char in content:
+            start = content.find(open_char)
+            end = content.rfind(close_char) + 1
+            return content[start:end]
+        return content
+    
     def _normalize_ai_result(self, result: Dict[str, Any], original_text: str) -> Dict[str, Any]:
         """Normalize and validate AI analysis result"""
         
@@ -185,33 +537,18 @@ Return only the JSON, no additional text."""
             'intensity': result.get('intensity', 'medium'),
             'context_awareness': result.get('context_awareness', ''),
             'method': f'openrouter_{self.model.replace("/", "_")}',
+            'model': self.model,
             'text_length': len(original_text),
             'timestamp': time.time()
         }
     
-    def _analyze_with_fallback(self, text: str) -> Dict[str, Any]:
+    def _analyze_with_fallback(self, text: Union[str, PreparedText]) -> Dict[str, Any]:
         """Fallback to rule-based sentiment analysis"""
         
-        text_lower = text.lower()
-        
-        # Enhanced keyword lists
-        positive_words = [
-            'love', 'amazing', 'great', 'awesome', 'excellent', 'fantastic', 'wonderful',
-            'perfect', 'brilliant', 'outstanding', 'impressive', 'incredible', 'superb',
-            'thrilled', 'excited', 'happy', 'satisfied', 'pleased', 'delighted',
-            'recommend', 'best', 'favorite', 'thank', 'grateful', 'appreciate'
-        ]
-        
-        negative_words = [
-            'hate', 'terrible', 'awful', 'horrible', 'bad', 'worst', 'disgusting',
-            'annoying', 'frustrated', 'angry', 'disappointed', 'upset', 'furious',
-            'broken', 'failed', 'useless', 'worthless', 'disaster', 'nightmare',
-            'complaint', 'problem', 'issue', 'bug', 'error', 'crash'
-        ]
-        
-        # Count sentiment words
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        # Count sentiment keywords in a single pass
+        hits = find_keywords(text)
+        positive_count = len(hits['positive'])
+        negative_count = len(hits['negative'])
         
         # Determine sentiment
         if positive_count > negative_count:
@@ -264,15 +601,225 @@ Return only the JSON, no additional text."""
             'timestamp': time.time()
         }
     
-    def analyze_batch(self, texts: List[str], context: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Analyze multiple texts for sentiment"""
-        results = []
-        for text in texts:
-            result = self.analyze_sentiment(text, context)
-            results.append(result)
-            # Add small delay to respect API limits
-            if self.initialized:
-                time.sleep(0.2)  # Slightly longer delay for OpenRouter
+    def analyze_batch(self, texts: List[Union[str, PreparedText]], context: Dict[str, Any] = None,
+                      batch_size: int = BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Analyze multiple texts for sentiment
+        
+        Cached texts and texts the rule-based tier or the local model settle
+        confidently are answered without a request. The rest are packed
+        into multi-text prompts (up to batch_size texts and
+        BATCH_PROMPT_TOKEN_BUDGET prompt tokens each) that run concurrently,
+        up to the limiter's current bound. Items missing from a batched
+        response, or malformed, are re-run individually as their own tasks;
+        a batch whose request fails outright (after the client's retries)
+        falls back to rule-based analysis as a whole instead.
+        
+        Args:
+            texts: Texts to analyze
+            context: Optional context shared by every text (platform, brand, etc.)
+            batch_size: Maximum texts per request (1 sends one request per text)
+            
+        Returns:
+            One result per text, in input order
+        """
+        prepared = [prepare_text(text) for text in texts]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(prepared)
+        ready = self.ensure_ready()
+        pending = []
+        for index, item in enumerate(prepared):
+            if not item.text.strip():
+                results[index] = self._get_neutral_result("Empty text")
+            elif not ready:
+                pending.append(index)
+            else:
+                results[index] = self._get_cached(item.text, context)
+                if results[index] is not None:
+                    self._count_tier('cache')
+                    continue
+                results[index] = self._try_rule_based(item)
+                if results[index] is None:
+                    pending.append(index)
+        
+        if pending and not ready:
+            if self._local_model_trusted():
+                local_results = self._analyze_with_local_model([prepared[index] for index in pending])
+            else:
+                local_results = [self._analyze_with_fallback(prepared[index]) for index in pending]
+            for index, result in zip(pending, local_results):
+                results[index] = result
+            return results
+        
+        # Local model tier, vectorized over every text the rule-based tier escalated
+        if pending:
+            local_results = self._try_local_model([prepared[index] for index in pending])
+            for index, result in zip(pending, local_results):
+                results[index] = result
+            pending = [index for index in pending if results[index] is None]
+        
+        if pending:
+            self._run_concurrent(prepared, pending, results, context, batch_size)
+        
+        return results
+    
+    def _run_concurrent(self, prepared: List[PreparedText], pending: List[int],
+                        results: List[Optional[Dict[str, Any]]], context: Dict[str, Any], batch_size: int):
+        """Analyze the pending texts on a worker pool, filling results in place"""
+        
+        def analyze_group(indices: List[int]) -> Dict[int, Dict[str, Any]]:
+            if len(indices) == 1:
+                return {indices[0]: self._analyze_with_llm(prepared[indices[0]], context)}
+            batch_results = self._analyze_batch_with_openrouter([prepared[index].text for index in indices], context)
+            for position, result in batch_results.items():
+                self._count_tier('llm')
+                self._store_cached(prepared[indices[position]].text, context, result)
+            return {indices[position]: result for position, result in batch_results.items()}
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = {}
+            for batch in self._plan_batches([prepared[index].text for index in pending], batch_size):
+                indices = [pending[position] for position in batch]
+                futures[pool.submit(analyze_group, indices)] = indices
+            
+            retried = 0
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    indices = futures.pop(future)
+                    try:
+                        group_results = future.result()
+                    except Exception as e:
+                        # The request itself failed: re-sending each item would only repeat it
+                        logging.error(f"Sentiment task failed for {len(indices)} texts: {e}")
+                        group_results = {
+                            index: self._analyze_with_fallback(prepared[index]) if self.fallback_enabled
+                            else self._get_error_result(str(e))
+                            for index in indices
+                        }
+                    
+                    for index in indices:
+                        if index in group_results:
+                            results[index] = group_results[index]
+                        else:
+                            # Missing or malformed in a batched response
+                            retried += 1
+                            futures[pool.submit(analyze_group, [index])] = [index]
+        
+        if retried:
+            logging.info(f"Analyzed {retried} of {len(pending)} texts individually")
+    
+    @staticmethod
+    def _plan_batches(texts: List[str], batch_size: int) -> List[List[int]]:
+        """Group text positions into batches bounded by count and estimated prompt tokens"""
+        batches = []
+        current: List[int] = []
+        current_tokens = 0
+        for position, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (len(current) >= batch_size or current_tokens + tokens > BATCH_PROMPT_TOKEN_BUDGET):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(position)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _analyze_batch_with_openrouter(self, texts: List[str], context: Dict[str, Any] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Analyze several texts in one chat completion
+        
+        Returns:
+            Dict of position -> normalized result for every well-formed item;
+            missing or malformed items are left out
+            
+        Raises:
+            Exception: When the request fails (after the client's retries)
+        """
+        mentions = '\n'.join(f'[{index}] {json.dumps(text)}' for index, text in enumerate(texts))
+        messages = [
+            {'role': 'system', 'content': BATCH_SYSTEM_PROMPT.format(**self._prompt_context(context))},
+            {'role': 'user', 'content': mentions}
+        ]
+        
+        content, _ = self._request_completion(messages, BATCH_TOKENS_PER_ITEM * len(texts) + 50,
+                                              BATCH_SENTIMENT_SCHEMA)
+        
+        try:
+            parsed = json.loads(self._extract_json(content, '{', '}') if content.lstrip().startswith('{')
+                                else self._extract_json(content, '[', ']'))
+        except json.JSONDecodeError as e:
+            self._record_parse_failure()
+            logging.error(f"Failed to parse OpenRouter batch response: {e}")
+            return {}
+        
+        # {"results": [...]} with structured outputs, a bare array otherwise
+        items = parsed.get('results') if isinstance(parsed, dict) else parsed
+        if not isinstance(items, list):
+            self._record_parse_failure()
+            logging.error("OpenRouter batch response has no results array")
+            return {}
+        
+        results = {}
+        for item in items:
+            if not self._is_valid_ai_result(item):
+                continue
+            index = item.get('index')
+            if not isinstance(index, int) or not 0 <= index < len(texts) or index in results:
+                continue
+            results[index] = self._normalize_ai_result(item, texts[index])
+        return results
+    
+    @staticmethod
+    def _is_valid_ai_result(result: Any) -> bool:
+        """Whether a parsed AI result has a usable sentiment and confidence"""
+        if not isinstance(result, dict):
+            return False
+        if str(result.get('sentiment', '')).lower() not in VALID_SENTIMENTS:
+            return False
+        try:
+            float(result.get('confidence', 0.5))
+        except (TypeError, ValueError):
+            return False
+        return True
+    
+    def analyze_batch_fallback(self, texts: List[Union[str, PreparedText]]) -> Dict[str, Any]:
+        """
+        Rule-based sentiment for many texts at once, without any API calls
+        
+        Returns:
+            Dict of arrays (sentiment, confidence, positive_count, negative_count)
+            matching _analyze_with_fallback for each text
+        """
+        if NUMPY_AVAILABLE:
+            return fallback_sentiment_scores(texts)
+        
+        results = [
+            self._analyze_with_fallback(text) if prepare_text(text).text.strip() else self._get_neutral_result("Empty text")
+            for text in texts
+        ]
+        return {
+            'sentiment': [r['sentiment'] for r in results],
+            'confidence': [r['confidence'] for r in results]
+        }
+    
+    def analyze_batch_local(self, texts: List[Union[str, PreparedText]]) -> List[Dict[str, Any]]:
+        """
+        Score many texts with the local model in one vectorized pass, without any API calls
+        
+        Falls back to rule-based analysis when no local model is loaded.
+        """
+        prepared = [prepare_text(text) for text in texts]
+        if self.local_model is None:
+            logging.warning("No local sentiment model loaded; using rule-based analysis")
+            return [self._analyze_with_fallback(item) if item.text.strip() else self._get_neutral_result("Empty text")
+                    for item in prepared]
+        
+        non_empty = [index for index, item in enumerate(prepared) if item.text.strip()]
+        results = [self._get_neutral_result("Empty text")] * len(prepared)
+        for index, result in zip(non_empty, self._analyze_with_local_model([prepared[index] for index in non_empty])):
+            results[index] = result
         return results
     
     def get_sentiment_summary(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -280,48 +827,30 @@ Return only the JSON, no additional text."""
         if not results:
             return {'total': 0, 'positive': 0, 'negative': 0, 'neutral': 0, 'avg_confidence': 0.0}
         
-        total = len(results)
-        positive = sum(1 for r in results if r['sentiment'] == 'positive')
-        negative = sum(1 for r in results if r['sentiment'] == 'negative')
-        neutral = sum(1 for r in results if r['sentiment'] == 'neutral')
-        avg_confidence = sum(r['confidence'] for r in results) / total
-        
-        # Collect emotional categories
-        all_emotions = []
-        for r in results:
-            all_emotions.extend(r.get('emotional_categories', []))
-        
-        emotion_counts = {}
-        for emotion in all_emotions:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
+        summary = summarize_mentions(results)
+        breakdown = summary['sentiment_breakdown']
+        total = summary['total']
         return {
             'total': total,
-            'positive': positive,
-            'negative': negative,
-            'neutral': neutral,
-            'positive_percent': (positive / total) * 100,
-            'negative_percent': (negative / total) * 100,
-            'neutral_percent': (neutral / total) * 100,
-            'avg_confidence': round(avg_confidence, 3),
-            'emotion_distribution': emotion_counts,
-            'high_confidence_count': sum(1 for r in results if r['confidence'] > 0.7)
+            'positive': breakdown.get('positive', 0),
+            'negative': breakdown.get('negative', 0),
+            'neutral': breakdown.get('neutral', 0),
+            'positive_percent': breakdown.get('positive', 0) / total * 100,
+            'negative_percent': breakdown.get('negative', 0) / total * 100,
+            'neutral_percent': breakdown.get('neutral', 0) / total * 100,
+            'avg_confidence': summary['average_confidence'],
+            'emotion_distribution': summary['emotion_distribution'],
+            'high_confidence_count': summary['high_confidence_count']
         }
     
     def get_available_models(self) -> List[Dict[str, str]]:
         """Get list of available models from OpenRouter"""
-        if not self.initialized:
+        if not self.ensure_ready():
             return []
         
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.get(
+            response = self.session.get(
                 f'{self.base_url}/models',
-                headers=headers,
                 timeout=10
             )
             
@@ -346,11 +875,53 @@ Return only the JSON, no additional text."""
             return []
 
 
-# Global instance for use in other modules
-openrouter_sentiment = OpenRouterSentimentAnalyzer()
+# Shared analyzer, created on first use (see get_analyzer)
+_shared_analyzer: Optional[OpenRouterSentimentAnalyzer] = None
+_shared_analyzer_lock = threading.Lock()
+
+
+def get_analyzer() -> OpenRouterSentimentAnalyzer:
+    """
+    Return the process-wide analyzer, creating it on first use
+    
+    Construction does no network I/O, so importing this module never waits on
+    OpenRouter; the credential probe starts in the background.
+    """
+    global _shared_analyzer
+    with _shared_analyzer_lock:
+        if _shared_analyzer is None:
+            _shared_analyzer = OpenRouterSentimentAnalyzer()
+            _shared_analyzer.start_probe()
+        return _shared_analyzer
+
+
+def configure_analyzer(api_key: Optional[str] = None, model: Optional[str] = None,
+                       max_concurrency: Optional[int] = None,
+                       cache: Optional[SentimentCache] = None,
+                       local_model: Optional[LocalSentimentModel] = None) -> OpenRouterSentimentAnalyzer:
+    """
+    Replace the process-wide analyzer with one built from explicit settings
+    
+    Returns:
+        The new shared analyzer (its credential probe runs in the background)
+    """
+    global _shared_analyzer
+    analyzer = OpenRouterSentimentAnalyzer(api_key, model, max_concurrency=max_concurrency, cache=cache,
+                                           local_model=local_model)
+    analyzer.start_probe()
+    with _shared_analyzer_lock:
+        _shared_analyzer = analyzer
+    return analyzer
+
 
+def __getattr__(name: str):
+    # `openrouter_sentiment` used to be a module-level instance built at import time
+    if name == 'openrouter_sentiment':
+        return get_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def analyze_sentiment_enhanced(text: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+
+def analyze_sentiment_enhanced(text: Union[str, PreparedText], context: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Enhanced sentiment analysis function for backward compatibility
     
@@ -361,10 +932,10 @@ def analyze_sentiment_enhanced(text: str, context: Dict[str, Any] = None) -> Dic
     Returns:
         Enhanced sentiment analysis result
     """
-    return openrouter_sentiment.analyze_sentiment(text, context)
+    return get_analyzer().analyze_sentiment(text, context)
 
 
-def get_sentiment_only(text: str) -> str:
+def get_sentiment_only(text: Union[str, PreparedText]) -> str:
     """
     Simple function that returns only sentiment classification for backward compatibility
     
@@ -374,7 +945,7 @@ def get_sentiment_only(text: str) -> str:
     Returns:
         Sentiment classification: 'positive', 'negative', or 'neutral'
     """
-    result = openrouter_sentiment.analyze_sentiment(text)
+    result = get_analyzer().analyze_sentiment(text)
     return result['sentiment']
 
 
@@ -388,9 +959,8 @@ def set_model(model: str) -> bool:
     Returns:
         True if model was set successfully
     """
-    global openrouter_sentiment
     try:
-        openrouter_sentiment.model = model
+        get_analyzer().model = model
         logging.info(f"OpenRouter model set to: {model}")
         return True
     except Exception as e:
@@ -400,4 +970,32 @@ def set_model(model: str) -> bool:
 
 def get_current_model() -> str:
     """Get the currently configured model"""
-    return openrouter_sentiment.model if openrouter_sentiment else 'rule_based_fallback'
\ No newline at end of file
+    return get_analyzer().model
+
+
+def mention_sentiment_fields(result: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fields stored on a mention for a sentiment result
+    
+    Args:
+        result: Result of analyze_sentiment, analyze_batch or a rule-based fallback
+        model: LLM of the analyzer that produced it (defaults to the shared analyzer's),
+            for LLM results cached before results recorded their model
+        
+    Returns:
+        sentiment, sentiment_confidence, sentiment_method and sentiment_model: the
+        LLM or local model version that scored it, None for rule-based results
+    """
+    method = result.get('method') or ''
+    if 'model' in result:
+        result_model = result['model']
+    elif method.startswith('openrouter_'):
+        result_model = model or get_current_model()
+    else:
+        result_model = None
+    return {
+        'sentiment': result['sentiment'],
+        'sentiment_confidence': result.get('confidence'),
+        'sentiment_method': method or None,
+        'sentiment_model': result_model
+    }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Rate Limiting for Attribution Dashboard
+Adaptive concurrency limiting and shared request-rate limits for outbound API
+calls made from worker threads
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean the API is overloaded or rate limiting us
+THROTTLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds in-flight requests and adapts the bound to how the API responds
+
+    The limit shrinks by half on a throttling response (429/5xx) or a
+    request failure and grows by one after a success that came back within
+    the latency target (additive increase, multiplicative decrease). A
+    throttling response also pauses new requests for an exponential backoff,
+    or for the server's Retry-After when given.
+    """
+
+    def __init__(self, max_limit: int = 8, initial_limit: Optional[int] = None, min_limit: int = 1,
+                 latency_target: float = 5.0, backoff_seconds: float = 1.0, max_backoff_seconds: float = 30.0):
+        """
+        Initialize the limiter
+
+        Args:
+            max_limit: Most requests ever allowed in flight
+            initial_limit: Starting limit (defaults to half of max_limit)
+            min_limit: Fewest requests allowed in flight after backing off
+            latency_target: Successes slower than this (seconds) do not grow the limit
+            backoff_seconds: First pause after a throttling response
+            max_backoff_seconds: Longest pause after repeated throttling responses
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_target = latency_target
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self.limit = initial_limit if initial_limit is not None else max(self.min_limit, self.max_limit // 2)
+        self.limit = max(self.min_limit, min(self.limit, self.max_limit))
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._consecutive_throttles = 0
+        self._stats = {'requests': 0, 'throttled': 0, 'failed': 0}
+
+    def acquire(self):
+        """Block until a request may start"""
+        with self._condition:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait <= 0 and self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, status_code: Optional[int], latency: float, retry_after: Optional[float] = None):
+        """
+        Finish a request and adapt the limit
+
+        Args:
+            status_code: HTTP status of the response, or None if the request failed
+            latency: Seconds the request took
+            retry_after: Server-requested pause in seconds, if any
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._stats['requests'] += 1
+
+            if status_code is None or status_code in THROTTLE_STATUS_CODES:
+                self.limit = max(self.min_limit, self.limit // 2)
+                if status_code is None:
+                    self._stats['failed'] += 1
+                else:
+                    self._stats['throttled'] += 1
+                    self._consecutive_throttles += 1
+                    backoff = min(self.max_backoff_seconds,
+                                  self.backoff_seconds * 2 ** (self._consecutive_throttles - 1))
+                    if retry_after is not None:
+                        backoff = min(self.max_backoff_seconds, max(backoff, retry_after))
+                    self._resume_at = max(self._resume_at, time.monotonic() + backoff)
+                    logger.warning(f"API throttled ({status_code}); limit {self.limit}, pausing {backoff:.1f}s")
+            else:
+                self._consecutive_throttles = 0
+                if latency <= self.latency_target and self.limit < self.max_limit:
+                    self.limit += 1
+
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current limit, in-flight requests and outcome counters"""
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'max_limit': self.max_limit,
+                'in_flight': self._in_flight,
+                'paused_seconds': round(max(0.0, self._resume_at - time.monotonic()), 2),
+                **self._stats
+            }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header given in seconds (HTTP dates are ignored)"""
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe request-rate limiter
+
+    Allows bursts of up to `burst` requests, refilled at `rate` requests
+    per second. Each caller reserves its slot under the lock and sleeps
+    outside it, so waiting callers never block each other.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize the limiter
+
+        Args:
+            rate: Sustained requests per second
+            burst: Requests allowed back to back after an idle period
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._stats = {'requests': 0, 'delayed': 0, 'waited_seconds': 0.0}
+
+    def acquire(self) -> float:
+        """
+        Block until a request may start
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Taking a token may leave the bucket negative: that debt is this caller's wait
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self._stats['requests'] += 1
+            if wait > 0:
+                self._stats['delayed'] += 1
+                self._stats['waited_seconds'] += wait
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Configured rate and counters since startup"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['waited_seconds'] = round(stats['waited_seconds'], 2)
+        return {'rate': self.rate, 'burst': self.burst, **stats}
+
+
+_shared_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def shared_rate_limiter(service: str, api_key: str, rate: float, burst: int = 1) -> TokenBucketRateLimiter:
+    """
+    The process-wide limiter for one API key of a service
+
+    Every client created with the same key shares one budget, matching how
+    the API enforces its limits. The key is hashed so it is not kept in the
+    registry in plain text; rate and burst apply when the limiter is created.
+    """
+    registry_key = f"{service}:{hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()}"
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(registry_key)
+        if limiter is None:
+            limiter = _shared_limiters[registry_key] = TokenBucketRateLimiter(rate, burst)
+        return limiter
@@ -17,13 +17,19 @@ import json
 import csv
 import os
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import logging
 import time
 
+from keyword_matcher import PreparedText, find_keywords, prepare_text
+from brand_matcher import BrandMatcher
+from batch_scoring import NUMPY_AVAILABLE, social_relevance_scores
+from near_duplicates import cluster_mentions
+from mention_summary import summarize_mentions
+
 # Import enhanced sentiment analysis
 try:
-    from openrouter_sentiment_integration import analyze_sentiment_enhanced, get_sentiment_only
+    from openrouter_sentiment_integration import analyze_sentiment_enhanced, get_sentiment_only, mention_sentiment_fields
     ENHANCED_SENTIMENT_AVAILABLE = True
 except ImportError:
     ENHANCED_SENTIMENT_AVAILABLE = False
@@ -33,9 +39,11 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class ScrapeCreatorsIntegration:
-    def __init__(self, api_key: str, brand_name: str):
+    def __init__(self, api_key: str, brand_name: str, brand_matcher: Optional[BrandMatcher] = None):
         self.api_key = api_key
         self.brand_name = brand_name
+        # Name, aliases, handles and (with BRAND_MAX_EDITS) misspellings, for relevance and search queries
+        self.brand_matcher = brand_matcher or BrandMatcher.from_config(brand_name)
         self.base_url = "https://api.scrapecreators.com"
         self.session = requests.Session()
         self.session.headers.update({
@@ -212,14 +220,13 @@ class ScrapeCreatorsIntegration:
             logger.error(f"JSON decode error: {e}")
             raise
     
-    def fetch_youtube_mentions(self, days_back: int = 7, max_results: int = 100) -> List[Dict[str, Any]]:
-        """Fetch brand mentions from YouTube"""
+    def fetch_youtube_mentions(self, days_back: int = 7, max_results: int = 100,
+                              sentiment: bool = True) -> List[Dict[str, Any]]:
+        """Fetch brand mentions from YouTube (sentiment=False leaves sentiment to add_sentiment, after clustering)"""
         all_mentions = []
         
         # Build search queries with brand variations
-        search_queries = [
-            self.brand_name,
-            f'"{self.brand_name}"',  # Exact match
+        search_queries = self.brand_matcher.search_terms() + [
             f'{self.brand_name} review',
             f'{self.brand_name} tutorial',
             f'{self.brand_name} unboxing'
@@ -291,16 +298,16 @@ class ScrapeCreatorsIntegration:
             if video_id and video_id not in unique_mentions:
                 unique_mentions[video_id] = mention
         
-        return list(unique_mentions.values())
+        mentions = self._score_relevance(list(unique_mentions.values()))
+        return self.add_sentiment(mentions) if sentiment else mentions
     
-    def fetch_reddit_mentions(self, days_back: int = 7, max_results: int = 100) -> List[Dict[str, Any]]:
-        """Fetch brand mentions from Reddit"""
+    def fetch_reddit_mentions(self, days_back: int = 7, max_results: int = 100,
+                              sentiment: bool = True) -> List[Dict[str, Any]]:
+        """Fetch brand mentions from Reddit (sentiment=False leaves sentiment to add_sentiment, after clustering)"""
         all_mentions = []
         
         # Build search queries with brand variations
-        search_queries = [
-            self.brand_name,
-            f'"{self.brand_name}"',  # Exact match
+        search_queries = self.brand_matcher.search_terms() + [
             f'{self.brand_name} review',
             f'{self.brand_name} opinion',
             f'{self.brand_name} experience'
@@ -377,19 +384,16 @@ class ScrapeCreatorsIntegration:
             if post_id and post_id not in unique_mentions:
                 unique_mentions[post_id] = mention
         
-        return list(unique_mentions.values())
+        mentions = self._score_relevance(list(unique_mentions.values()))
+        return self.add_sentiment(mentions) if sentiment else mentions
     
-    def fetch_tiktok_mentions(self, days_back: int = 7, max_results: int = 100) -> List[Dict[str, Any]]:
-        """Fetch brand mentions from TikTok"""
+    def fetch_tiktok_mentions(self, days_back: int = 7, max_results: int = 100,
+                              sentiment: bool = True) -> List[Dict[str, Any]]:
+        """Fetch brand mentions from TikTok (sentiment=False leaves sentiment to add_sentiment, after clustering)"""
         all_mentions = []
         
         # Build search queries with brand variations
-        search_queries = [
-            self.brand_name,
-            f'#{self.brand_name.lower()}',
-            f'@{self.brand_name.lower()}',
-            f'"{self.brand_name}"'  # Exact match
-        ]
+        search_queries = self.brand_matcher.search_terms(handles=True)
         
         for query in search_queries:
             try:
@@ -445,7 +449,8 @@ class ScrapeCreatorsIntegration:
             if video_id and video_id not in unique_mentions:
                 unique_mentions[video_id] = mention
         
-        return list(unique_mentions.values())
+        mentions = self._score_relevance(list(unique_mentions.values()))
+        return self.add_sentiment(mentions) if sentiment else mentions
     
     def process_youtube_mention(self, youtube_item: Dict[str, Any], content_type: str) -> Optional[Dict[str, Any]]:
         """Process YouTube video/short/live data into standardized mention format"""
@@ -467,8 +472,9 @@ class ScrapeCreatorsIntegration:
             else:
                 created_at = datetime.now().isoformat()
             
-            # Get video title and description
+            # Get video title and description (prepared once for every scorer)
             title = youtube_item.get('title', '')
+            prepared = PreparedText(title)
             
             # Extract view count
             view_count = youtube_item.get('viewCountInt', 0)
@@ -498,8 +504,7 @@ class ScrapeCreatorsIntegration:
                 'published_time_text': youtube_item.get('publishedTimeText', ''),
                 'view_count_text': youtube_item.get('viewCountText', ''),
                 'length_text': youtube_item.get('lengthText', ''),
-                'sentiment': self.analyze_sentiment(title),
-                'relevance_score': self.calculate_relevance(title),
+                '_prepared': prepared,  # reused by _score_relevance and add_sentiment, never cached
                 'extracted_at': datetime.now().isoformat(),
                 'raw_data': youtube_item  # Keep original data for debugging
             }
@@ -538,6 +543,7 @@ class ScrapeCreatorsIntegration:
             title = reddit_post.get('title', '')
             selftext = reddit_post.get('selftext', '')
             content = f"{title}\n{selftext}".strip() if selftext else title
+            prepared = PreparedText(content)
             
             # Extract engagement metrics
             score = reddit_post.get('score', 0)
@@ -579,8 +585,7 @@ class ScrapeCreatorsIntegration:
                 'stickied': reddit_post.get('stickied', False),
                 'gilded': reddit_post.get('gilded', 0),
                 'total_awards': reddit_post.get('total_awards_received', 0),
-                'sentiment': self.analyze_sentiment(content),
-                'relevance_score': self.calculate_relevance(content),
+                '_prepared': prepared,  # reused by _score_relevance and add_sentiment, never cached
                 'extracted_at': datetime.now().isoformat(),
                 'raw_data': reddit_post  # Keep original data for debugging
             }
@@ -611,6 +616,7 @@ class ScrapeCreatorsIntegration:
             
             # Get video description/content
             content = aweme_info.get('desc', '')
+            prepared = PreparedText(content)
             
             processed = {
                 'id': video_id,
@@ -629,8 +635,7 @@ class ScrapeCreatorsIntegration:
                 },
                 'video_duration': aweme_info.get('video', {}).get('duration', 0) / 1000,  # Convert to seconds
                 'hashtags': self.extract_hashtags(aweme_info.get('text_extra', [])),
-                'sentiment': self.analyze_sentiment(content),
-                'relevance_score': self.calculate_relevance(content),
+                '_prepared': prepared,  # reused by _score_relevance and add_sentiment, never cached
                 'extracted_at': datetime.now().isoformat(),
                 'raw_data': tiktok_item  # Keep original data for debugging
             }
@@ -662,35 +667,33 @@ class ScrapeCreatorsIntegration:
             logger.info(f"Fetching mentions from {platform}...")
             try:
                 if platform.lower() == 'youtube':
-                    mentions = self.fetch_youtube_mentions(days_back=days_back)
+                    mentions = self.fetch_youtube_mentions(days_back=days_back, sentiment=False)
                 elif platform.lower() == 'tiktok':
-                    mentions = self.fetch_tiktok_mentions(days_back=days_back)
+                    mentions = self.fetch_tiktok_mentions(days_back=days_back, sentiment=False)
                 elif platform.lower() == 'reddit':
-                    mentions = self.fetch_reddit_mentions(days_back=days_back)
+                    mentions = self.fetch_reddit_mentions(days_back=days_back, sentiment=False)
                 else:
                     # For other platforms, use the existing method
                     end_date = datetime.now()
                     start_date = end_date - timedelta(days=days_back)
-                    mentions = self.search_platform(platform, start_date, end_date)
+                    mentions = self.search_platform(platform, start_date, end_date, sentiment=False)
                 
                 all_mentions.extend(mentions)
                 logger.info(f"Found {len(mentions)} mentions on {platform}")
             except Exception as e:
                 logger.error(f"Error fetching from {platform}: {e}")
         
-        return all_mentions
+        # Cross-posts and re-uploads across platforms count once, and only the
+        # representative of each cluster is sent for sentiment
+        return self.add_sentiment(cluster_mentions(all_mentions))
     
-    def search_platform(self, platform: str, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """Search for brand mentions on specific platform"""
+    def search_platform(self, platform: str, start_date: datetime, end_date: datetime,
+                        sentiment: bool = True) -> List[Dict[str, Any]]:
+        """Search for brand mentions on specific platform (sentiment=False leaves sentiment to add_sentiment)"""
         endpoint = f"{self.base_url}/search/{platform}"
         
         # Build search query with brand variations
-        search_terms = [
-            self.brand_name,
-            self.brand_name.lower(),
-            f'"{self.brand_name}"',  # Exact match
-            f'@{self.brand_name.lower()}',  # Handle mentions
-        ]
+        search_terms = self.brand_matcher.search_terms(handles=True)
         
         params = {
             'query': ' OR '.join(search_terms),
@@ -715,7 +718,8 @@ class ScrapeCreatorsIntegration:
                 if processed_mention:
                     processed_mentions.append(processed_mention)
             
-            return processed_mentions
+            processed_mentions = self._score_relevance(processed_mentions)
+            return self.add_sentiment(processed_mentions) if sentiment else processed_mentions
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed for {platform}: {e}")
@@ -728,10 +732,11 @@ class ScrapeCreatorsIntegration:
         """Process and standardize mention data"""
         try:
             # Extract common fields across platforms
+            prepared = PreparedText(mention.get('text', mention.get('content', '')))
             processed = {
                 'id': mention.get('id', ''),
                 'platform': platform,
-                'content': mention.get('text', mention.get('content', '')),
+                'content': prepared.text,
                 'author': mention.get('author', {}).get('username', 'Unknown'),
                 'author_followers': mention.get('author', {}).get('followers_count', 0),
                 'created_at': mention.get('created_at', ''),
@@ -741,8 +746,7 @@ class ScrapeCreatorsIntegration:
                     'shares': mention.get('retweet_count', mention.get('share_count', 0)),
                     'comments': mention.get('reply_count', mention.get('comment_count', 0))
                 },
-                'sentiment': self.analyze_sentiment(mention.get('text', mention.get('content', '')), platform),
-                'relevance_score': self.calculate_relevance(mention.get('text', mention.get('content', ''))),
+                '_prepared': prepared,  # reused by _score_relevance and add_sentiment, never cached
                 'extracted_at': datetime.now().isoformat()
             }
             
@@ -763,7 +767,7 @@ class ScrapeCreatorsIntegration:
             logger.error(f"Error processing mention: {e}")
             return None
     
-    def analyze_sentiment(self, text: str, platform: str = None) -> str:
+    def analyze_sentiment(self, text: Union[str, PreparedText], platform: str = None) -> str:
         """Enhanced sentiment analysis with Gemini Flash 2 or fallback to rule-based"""
         if not text:
             return 'neutral'
@@ -782,7 +786,19 @@ class ScrapeCreatorsIntegration:
         else:
             return self._analyze_sentiment_fallback(text)
     
-    def analyze_sentiment_detailed(self, text: str, platform: str = None) -> Dict[str, Any]:
+    def sentiment_fields(self, text: Union[str, PreparedText], platform: str = None) -> Dict[str, Any]:
+        """Sentiment of a mention with its confidence and the method and model that produced it"""
+        result = self.analyze_sentiment_detailed(text, platform)
+        if ENHANCED_SENTIMENT_AVAILABLE:
+            return mention_sentiment_fields(result)
+        return {
+            'sentiment': result['sentiment'],
+            'sentiment_confidence': result.get('confidence'),
+            'sentiment_method': result.get('method'),
+            'sentiment_model': None
+        }
+    
+    def analyze_sentiment_detailed(self, text: Union[str, PreparedText], platform: str = None) -> Dict[str, Any]:
         """Get detailed sentiment analysis with confidence and reasoning"""
         if not text:
             return {
@@ -805,15 +821,14 @@ class ScrapeCreatorsIntegration:
         else:
             return self._analyze_sentiment_detailed_fallback(text)
     
-    def _analyze_sentiment_fallback(self, text: str) -> str:
+    def _count_sentiment_keywords(self, text: Union[str, PreparedText]):
+        """Count distinct positive and negative keywords in a single pass"""
+        hits = find_keywords(text)
+        return len(hits['positive']), len(hits['negative'])
+    
+    def _analyze_sentiment_fallback(self, text: Union[str, PreparedText]) -> str:
         """Fallback rule-based sentiment analysis"""
-        text_lower = text.lower()
-        
-        positive_words = ['love', 'great', 'awesome', 'excellent', 'amazing', 'fantastic', 'recommend', 'best']
-        negative_words = ['hate', 'terrible', 'awful', 'worst', 'bad', 'disappointed', 'avoid', 'sucks']
-        
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        positive_count, negative_count = self._count_sentiment_keywords(text)
         
         if positive_count > negative_count:
             return 'positive'
@@ -822,16 +837,15 @@ class ScrapeCreatorsIntegration:
         else:
             return 'neutral'
     
-    def _analyze_sentiment_detailed_fallback(self, text: str) -> Dict[str, Any]:
+    def _analyze_sentiment_detailed_fallback(self, text: Union[str, PreparedText]) -> Dict[str, Any]:
         """Detailed fallback sentiment analysis"""
-        sentiment = self._analyze_sentiment_fallback(text)
-        text_lower = text.lower()
-        
-        positive_words = ['love', 'great', 'awesome', 'excellent', 'amazing', 'fantastic', 'recommend', 'best']
-        negative_words = ['hate', 'terrible', 'awful', 'worst', 'bad', 'disappointed', 'avoid', 'sucks']
+        positive_count, negative_count = self._count_sentiment_keywords(text)
         
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        sentiment = 'neutral'
+        if positive_count > negative_count:
+            sentiment = 'positive'
+        elif negative_count > positive_count:
+            sentiment = 'negative'
         
         confidence = 0.3
         if positive_count > negative_count:
@@ -851,33 +865,55 @@ class ScrapeCreatorsIntegration:
             'timestamp': time.time()
         }
     
-    def calculate_relevance(self, text: str) -> float:
+    def calculate_relevance(self, text: Union[str, PreparedText]) -> float:
         """Calculate how relevant the mention is to the brand"""
         if not text:
             return 0.0
         
-        text_lower = text.lower()
-        brand_lower = self.brand_name.lower()
+        prepared = prepare_text(text)
         
         # Basic relevance scoring
         score = 0.0
         
-        # Direct brand mention
-        if brand_lower in text_lower:
-            score += 0.8
+        # Direct brand mention, scaled by match strength (alias, hashtag, misspelling)
+        score += 0.8 * self.brand_matcher.strength(prepared)
         
-        # Context relevance keywords (customize based on your industry)
-        context_keywords = ['software', 'app', 'tool', 'platform', 'service', 'product']
-        for keyword in context_keywords:
-            if keyword in text_lower:
-                score += 0.1
+        # Context relevance keywords (customize social_context in keyword_matcher.LEXICONS)
+        score += 0.1 * len(prepared.hits['social_context'])
         
         # Length penalty for very short mentions
-        if len(text.split()) < 5:
+        if prepared.word_count < 5:
             score *= 0.7
         
         return min(score, 1.0)
     
+    def calculate_relevance_batch(self, texts: List[Union[str, PreparedText]]):
+        """
+        Calculate relevance for many mentions at once (same scores as calculate_relevance)
+        
+        Returns:
+            NumPy array of scores, or a list when NumPy is not installed
+        """
+        if NUMPY_AVAILABLE:
+            return social_relevance_scores(texts, self.brand_matcher)
+        return [self.calculate_relevance(text) for text in texts]
+    
+    def _score_relevance(self, mentions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Set relevance_score on processed mentions in one batch, after de-duplication so each is scored once"""
+        # Score the texts prepared during processing instead of re-scanning the content
+        texts = [mention.get('_prepared') or mention.get('content', '') for mention in mentions]
+        scores = self.calculate_relevance_batch(texts)
+        for mention, score in zip(mentions, scores):
+            mention['relevance_score'] = float(score)
+        return mentions
+    
+    def add_sentiment(self, mentions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Set sentiment fields on processed mentions, reusing the text prepared during processing"""
+        for mention in mentions:
+            prepared = mention.pop('_prepared', None) or PreparedText(mention.get('content', ''))
+            mention.update(self.sentiment_fields(prepared, mention.get('platform')))
+        return mentions
+    
     def save_to_csv(self, mentions: List[Dict[str, Any]], filename: str = None) -> str:
         """Save mentions to CSV file"""
         if not filename:
@@ -975,6 +1011,12 @@ class ScrapeCreatorsIntegration:
         
         logger.info(f"Generated dashboard CSV: {filename}")
         return filename
+    
+    def generate_summary_report(self, mentions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Generate summary statistics for the mentions (platforms, sentiment, top authors and subreddits)"""
+        if not mentions:
+            return {}
+        return summarize_mentions(mentions)
 
 def main():
     """Main execution function"""
@@ -1002,17 +1044,13 @@ def main():
         dashboard_csv = scraper.generate_dashboard_csv(mentions)
         
         # Print summary
-        platforms = set(m.get('platform') for m in mentions)
-        sentiments = {}
-        for mention in mentions:
-            sentiment = mention.get('sentiment', 'neutral')
-            sentiments[sentiment] = sentiments.get(sentiment, 0) + 1
+        summary = scraper.generate_summary_report(mentions)
         
         print("\n=== EXTRACTION SUMMARY ===")
         print(f"Brand: {BRAND_NAME}")
-        print(f"Total Mentions: {len(mentions)}")
-        print(f"Platforms: {', '.join(platforms)}")
-        print(f"Sentiment Breakdown: {dict(sentiments)}")
+        print(f"Total Mentions: {summary['total']}")
+        print(f"Platforms: {', '.join(summary['platform_breakdown'])}")
+        print(f"Sentiment Breakdown: {summary['sentiment_breakdown']}")
         print(f"\nFiles Generated:")
         print(f"  - Detailed CSV: {csv_file}")
         print(f"  - JSON Data: {json_file}")
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Sentiment Benchmark for Attribution Dashboard
+Runs the sentiment paths against a local stand-in for the OpenRouter API
+(configurable latency, error rate and malformed-JSON rate) over a fixed
+corpus, and reports throughput, request latency, fallback rate and label
+agreement so changes to the sentiment path can be compared to a baseline.
+
+Usage:
+python sentiment_benchmark.py [--texts 300] [--latency 0.05] [--error-rate 0.02]
+                              [--malformed-rate 0.02] [--throttle-rate 0.0]
+                              [--modes sequential,concurrent,batch,cascade]
+                              [--output results.json] [--baseline baseline.json]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+from openrouter_sentiment_integration import OpenRouterSentimentAnalyzer
+from sentiment_cache import SentimentCache
+
+logger = logging.getLogger(__name__)
+
+# Templates for the synthetic corpus: {brand} and {thing} are filled in per mention
+CORPUS_TEMPLATES = {
+    'positive': [
+        "Just tried {brand} for our {thing} and honestly it's amazing, highly recommend",
+        "{brand} support fixed my issue in minutes, really impressed",
+        "Switched to {brand} last month. Best decision for our {thing} so far",
+        "Love how simple {brand} makes {thing}. Great job team",
+        "{brand} has been a game changer for our {thing}",
+    ],
+    'negative': [
+        "{brand} crashed again during our {thing}, so frustrating",
+        "Not happy with {brand}. The {thing} feature is broken and support is slow",
+        "Oh great, {brand} is down again right before our {thing} 🙄",
+        "Cancelled {brand} today, way too expensive for what it does",
+        "{brand} lost all our {thing} data. Avoid",
+    ],
+    'neutral': [
+        "Has anyone used {brand} for {thing}? Looking for opinions",
+        "{brand} released a new version with {thing} support",
+        "Comparing {brand} and a few alternatives for {thing}",
+        "Webinar on {thing} with the {brand} team next Tuesday",
+        "{brand} pricing page lists three plans for {thing}",
+    ],
+}
+CORPUS_THINGS = ['onboarding', 'reporting', 'analytics', 'team workflow', 'product launch', 'customer support']
+
+BATCH_ITEM_PATTERN = re.compile(r'^\[(\d+)\] (".*")$', re.MULTILINE)
+
+
+def build_corpus(size: int, brand: str = 'Acme', seed: int = 0) -> List[Tuple[str, str]]:
+    """Deterministic (text, true sentiment) pairs; every text is unique"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        label = rng.choice(list(CORPUS_TEMPLATES))
+        template = rng.choice(CORPUS_TEMPLATES[label])
+        text = template.format(brand=brand, thing=rng.choice(CORPUS_THINGS))
+        corpus.append((f"{text} (#{i})", label))
+    return corpus
+
+
+class MockOpenRouterServer:
+    """
+    Local stand-in for the OpenRouter API
+
+    Answers GET /api/v1/models and POST /api/v1/chat/completions for both the
+    single-text and the batched prompt. Labels come from the corpus, so the
+    mock plays a perfectly accurate model; latency, errors, throttling and
+    malformed responses are injected at the configured rates.
+    """
+
+    def __init__(self, labels: Dict[str, str], latency: float = 0.05, error_rate: float = 0.0,
+                 malformed_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 0):
+        self.labels = labels
+        self.latency = latency
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # Headers and body are separate writes
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Any):
+                payload = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path.endswith('/models'):
+                    self._send(200, {'data': []})
+                else:
+                    self._send(404, {'error': 'not found'})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                status, body = server._complete(request)
+                self._send(status, body)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self._httpd.server_address[1]}/api/v1'
+
+    def _roll(self) -> float:
+        with self._rng_lock:
+            self.requests += 1
+            return self._rng.random()
+
+    def _label(self, text: str) -> str:
+        return self.labels.get(text, 'neutral')
+
+    def _complete(self, request: Dict[str, Any]) -> Tuple[int, Any]:
+        roll = self._roll()
+        time.sleep(self.latency)
+
+        if roll < self.throttle_rate:
+            return 429, {'error': 'rate limited'}
+        roll -= self.throttle_rate
+        if roll < self.error_rate:
+            return 500, {'error': 'internal error'}
+        roll -= self.error_rate
+        malformed = roll < self.malformed_rate
+
+        # The mention (or the numbered batch of mentions) is the last message
+        messages = request.get('messages', [{}])
+        prompt = messages[-1].get('content', '')
+        items = BATCH_ITEM_PATTERN.findall(prompt)
+        if items:
+            results = [
+                {'index': int(index), 'sentiment': self._label(json.loads(text)), 'confidence': 0.9}
+                for index, text in items
+            ]
+            # Structured outputs wrap the array in an object
+            content = json.dumps({'results': results} if request.get('response_format') else results)
+        else:
+            content = json.dumps({'sentiment': self._label(prompt), 'confidence': 0.9,
+                                  'reasoning': 'mock', 'intensity': 'medium'})
+        prompt_length = sum(len(message.get('content', '')) for message in messages)
+
+        if malformed:
+            # Truncated JSON, as when a response is cut off
+            content = content[:len(content) // 2]
+
+        return 200, {
+            'choices': [{'message': {'content': content}}],
+            'usage': {'prompt_tokens': prompt_length // 4, 'completion_tokens': len(content) // 4}
+        }
+
+    def start(self) -> 'MockOpenRouterServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-openrouter', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+# Benchmark modes: how texts are fed to the analyzer, and analyzer settings
+MODES = {
+    'sequential': {'call': 'single', 'cascade_threshold': None},
+    'concurrent': {'call': 'batch', 'batch_size': 1, 'cascade_threshold': None},
+    'batch': {'call': 'batch', 'cascade_threshold': None},
+    'cascade': {'call': 'batch'},
+}
+
+
+def run_mode(mode: str, corpus: List[Tuple[str, str]], server: MockOpenRouterServer,
+             brand: str = 'Acme') -> Dict[str, Any]:
+    """Run one benchmark mode over the corpus with a fresh analyzer and empty cache"""
+    settings = MODES[mode]
+    options = {'cascade_threshold': settings['cascade_threshold']} if 'cascade_threshold' in settings else {}
+    analyzer = OpenRouterSentimentAnalyzer('benchmark-key', 'mock/model', cache=SentimentCache(), **options)
+    analyzer.base_url = server.base_url
+    analyzer.limiter.backoff_seconds = min(analyzer.limiter.backoff_seconds, 0.1)
+    analyzer.ensure_ready()
+
+    # Time every API request the analyzer makes
+    request_latencies: List[float] = []
+    latency_lock = threading.Lock()
+    request_completion = analyzer._request_completion
+
+    def timed_request(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return request_completion(*args, **kwargs)
+        finally:
+            with latency_lock:
+                request_latencies.append(time.perf_counter() - started)
+    analyzer._request_completion = timed_request
+
+    texts = [text for text, _ in corpus]
+    context = {'brand': brand, 'platform': 'social media'}
+    requests_before = server.requests
+    started = time.perf_counter()
+    if settings['call'] == 'single':
+        results = [analyzer.analyze_sentiment(text, context) for text in texts]
+    else:
+        results = analyzer.analyze_batch(texts, context, **({'batch_size': settings['batch_size']}
+                                                           if 'batch_size' in settings else {}))
+    elapsed = time.perf_counter() - started
+
+    agreed = sum(result['sentiment'] == label for result, (_, label) in zip(results, corpus))
+    fallbacks = sum(result['method'] == 'rule_based_fallback' for result in results)
+    return {
+        'mode': mode,
+        'texts': len(texts),
+        'seconds': round(elapsed, 3),
+        'texts_per_second': round(len(texts) / elapsed, 1) if elapsed else 0.0,
+        'api_requests': server.requests - requests_before,
+        'request_latency_p50': round(percentile(request_latencies, 0.50), 4),
+        'request_latency_p95': round(percentile(request_latencies, 0.95), 4),
+        'request_latency_p99': round(percentile(request_latencies, 0.99), 4),
+        'fallback_rate': round(fallbacks / len(texts), 3) if texts else 0.0,
+        'agreement': round(agreed / len(texts), 3) if texts else 0.0,
+        'tokens': analyzer.get_usage_stats(),
+        'tiers': analyzer.get_cascade_stats(),
+        'limiter': analyzer.limiter.get_stats()
+    }
+
+
+def print_report(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None):
+    """Print a results table, with the change from a baseline run where available"""
+    columns = [('texts_per_second', 'texts/s'), ('api_requests', 'requests'),
+               ('request_latency_p50', 'p50 s'), ('request_latency_p95', 'p95 s'),
+               ('request_latency_p99', 'p99 s'), ('fallback_rate', 'fallback'), ('agreement', 'agreement')]
+    print(f"{'mode':<12}" + ''.join(f"{title:>12}" for _, title in columns))
+    for result in results:
+        print(f"{result['mode']:<12}" + ''.join(f"{result[key]:>12}" for key, _ in columns))
+        previous = (baseline or {}).get(result['mode'])
+        if previous:
+            deltas = []
+            for key, _ in columns:
+                change = result[key] - previous.get(key, 0)
+                deltas.append(f"{change:>+12.3f}" if isinstance(change, float) else f"{change:>+12}")
+            print(f"{'  vs base':<12}" + ''.join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sentiment paths against a mock OpenRouter server')
+    parser.add_argument('--texts', type=int, default=300, help='Corpus size')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mock response latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Fraction of requests answered with 500')
+    parser.add_argument('--malformed-rate', type=float, default=0.02, help='Fraction of responses with truncated JSON')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated modes to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON (usable as a later --baseline)')
+    parser.add_argument('--baseline', help='Compare against results written by an earlier --output')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    corpus = build_corpus(args.texts, seed=args.seed)
+    server = MockOpenRouterServer(dict(corpus), latency=args.latency, error_rate=args.error_rate,
+                                  malformed_rate=args.malformed_rate, throttle_rate=args.throttle_rate,
+                                  seed=args.seed).start()
+    try:
+        results = [run_mode(mode.strip(), corpus, server) for mode in args.modes.split(',') if mode.strip()]
+    finally:
+        server.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = {result['mode']: result for result in json.load(f)['results']}
+
+    print(f"Corpus: {args.texts} texts, latency {args.latency}s, errors {args.error_rate:.0%}, "
+          f"malformed {args.malformed_rate:.0%}, throttled {args.throttle_rate:.0%}")
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Sentiment Cache for Attribution Dashboard
+Persists AI sentiment results keyed by (normalized text hash, model, prompt
+version) so text that was analyzed before never costs another API call
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Hits update last_used in memory; pending updates are written in one transaction
+# once this many have accumulated or this many seconds have passed, and before eviction
+TOUCH_FLUSH_SIZE = 500
+TOUCH_FLUSH_INTERVAL = 30.0
+
+# Method prefix of results that came from the LLM, the only ones fit to train the local model on
+LLM_METHOD_PREFIX = 'openrouter_'
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize text and collapse whitespace so trivially different copies share a key"""
+    return WHITESPACE_PATTERN.sub(' ', unicodedata.normalize('NFKC', text or '')).strip()
+
+
+def text_hash(text: str, context: Optional[Dict[str, Any]] = None) -> str:
+    """
+    SHA-256 of the normalized text and the prompt context
+
+    The brand and platform are part of the prompt, so they are part of the key.
+    """
+    key = normalize_text(text)
+    if context:
+        key += '\x00' + json.dumps({k: context.get(k) for k in ('brand', 'platform')}, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class SentimentCache:
+    """
+    SQLite-backed LRU cache of sentiment results
+
+    A hit only records its time in memory; last_used is written in batches,
+    so reads do not commit. Recency is only approximate between flushes,
+    which is all LRU eviction needs, and pending times are flushed before
+    evicting.
+    """
+
+    def __init__(self, db_path: str = ':memory:', max_entries: int = 50000):
+        """
+        Initialize the sentiment cache
+
+        Args:
+            db_path: SQLite database path (':memory:' keeps results for the process lifetime)
+            max_entries: Least recently used results are evicted beyond this many
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ':memory:':
+            # Commits append to the write-ahead log without an fsync each
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sentiment_cache (
+                text_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                result_json TEXT NOT NULL,
+                text TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (text_hash, model, prompt_version)
+            );
+            CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used
+                ON sentiment_cache (last_used);
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sentiment_cache)")]
+        if 'text' not in columns:
+            # Caches created before texts were kept for training the local model
+            self._conn.execute("ALTER TABLE sentiment_cache ADD COLUMN text TEXT")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        # (text_hash, model, prompt_version) -> last hit time not yet written
+        self._touched: Dict[Tuple[str, str, str], float] = {}
+        self._last_flush = time.time()
+
+    def _flush_touched(self):
+        """Write pending last_used times (caller holds the lock)"""
+        if self._touched:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE sentiment_cache SET last_used = ? "
+                    "WHERE text_hash = ? AND model = ? AND prompt_version = ?",
+                    [(used,) + entry for entry, used in self._touched.items()]
+                )
+            self._touched.clear()
+        self._last_flush = time.time()
+
+    def flush(self):
+        """Write pending last_used times now"""
+        with self._lock:
+            self._flush_touched()
+
+    def get(self, key: str, model: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a text hash, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result_json FROM sentiment_cache "
+                "WHERE text_hash = ? AND model = ? AND prompt_version = ?",
+                (key, model, prompt_version)
+            ).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+
+            self._stats['hits'] += 1
+            now = time.time()
+            self._touched[(key, model, prompt_version)] = now
+            if len(self._touched) >= TOUCH_FLUSH_SIZE or now - self._last_flush >= TOUCH_FLUSH_INTERVAL:
+                self._flush_touched()
+
+        result = json.loads(row[0])
+        result['cached'] = True
+        return result
+
+    def put(self, key: str, model: str, prompt_version: str, result: Dict[str, Any], text: Optional[str] = None):
+        """
+        Store a result, evicting the least recently used entries beyond max_entries
+
+        The normalized text is kept alongside the result when given, as a
+        labeled example for the local sentiment model.
+        """
+        now = time.time()
+        with self._lock:
+            # The insert below sets last_used; other pending times must be written before evicting
+            self._touched.pop((key, model, prompt_version), None)
+            if self._entries >= self.max_entries:
+                self._flush_touched()
+            with self._conn:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM sentiment_cache WHERE text_hash = ? AND model = ? AND prompt_version = ?",
+                    (key, model, prompt_version)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sentiment_cache "
+                    "(text_hash, model, prompt_version, result_json, text, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, prompt_version, json.dumps(result, default=str),
+                     normalize_text(text) if text is not None else None, now, now)
+                )
+                self._stats['writes'] += 1
+                if not exists:
+                    self._entries += 1
+
+                excess = self._entries - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM sentiment_cache WHERE rowid IN "
+                        "(SELECT rowid FROM sentiment_cache ORDER BY last_used LIMIT ?)",
+                        (excess,)
+                    )
+                    self._stats['evictions'] += excess
+                    self._entries -= excess
+
+    def labeled_texts(self, model: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        (text, sentiment) pairs for every cached LLM result that kept its text
+
+        Results from any other tier (rule-based, local model) are skipped, so the
+        local model is never trained on its own or the keyword rules' labels.
+
+        Args:
+            model: Only results from this model (default: every model)
+        """
+        query = "SELECT text, result_json FROM sentiment_cache WHERE text IS NOT NULL"
+        params: Tuple[Any, ...] = ()
+        if model:
+            query += " AND model = ?"
+            params = (model,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        results = [(text, json.loads(result_json)) for text, result_json in rows]
+        return [(text, result.get('sentiment', 'neutral')) for text, result in results
+                if str(result.get('method', '')).startswith(LLM_METHOD_PREFIX)]
+
+    def clear(self):
+        """Remove every cached result"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM sentiment_cache")
+            self._entries = 0
+            self._touched.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry count, hit rate and counters since startup"""
+        with self._lock:
+            entries = self._entries
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0,
+            **stats
+        }
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Sentiment Re-scoring for Attribution Dashboard
+Background job that re-scores stored mentions in chunks through the batched
+sentiment path, checkpointing progress so it resumes after a crash or restart
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Any, Optional
+import logging
+
+from attribution_engine import mention_key
+from openrouter_sentiment_integration import UNSCORED_METHODS, OpenRouterSentimentAnalyzer, mention_sentiment_fields
+
+logger = logging.getLogger(__name__)
+
+# Prompt context platform used at ingest, where it differs from the mention's platform
+INGEST_PLATFORMS = {'web': 'web_content'}
+
+
+def mention_text(mention: Dict[str, Any]) -> str:
+    """
+    Text a mention's sentiment was scored from at ingest
+
+    Web mentions are scored on the full page text followed by the title, not
+    the display excerpt; matching ingest exactly lets re-scoring reuse its
+    cached results.
+    """
+    if mention.get('platform') == 'web':
+        page_text = mention.get('full_content') or mention.get('content') or ''
+        return f"{page_text} {mention.get('title') or ''}".strip()
+    return mention.get('content') or mention.get('title') or ''
+
+
+def sentiment_platform(mention: Dict[str, Any]) -> str:
+    """Prompt context platform a mention was scored under at ingest (part of the sentiment cache key)"""
+    platform = mention.get('platform') or 'social_media'
+    return INGEST_PLATFORMS.get(platform, platform)
+
+
+def write_json_atomic(path: str, data: Any):
+    """Write JSON to a temporary file and rename it over path"""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(temp_path, path)
+
+
+class SentimentRescoringJob:
+    """
+    Re-scores the mentions cache with the analyzer's current model
+
+    Each re-scored mention records `sentiment_method`, `sentiment_model` and
+    `sentiment_confidence`, as mentions do when they are ingested. The target
+    mention keys are fixed when a job starts and saved to a checkpoint with
+    the position reached, so an interrupted job continues where it stopped
+    instead of starting over.
+    """
+
+    def __init__(self, analyzer: OpenRouterSentimentAnalyzer, mentions_file: str, checkpoint_file: str,
+                 brand_name: str = 'the brand', chunk_size: int = 100,
+                 on_chunk: Optional[Callable[[List[Dict[str, Any]], Optional[str]], None]] = None,
+                 cache_lock: Optional[threading.Lock] = None):
+        """
+        Initialize the job
+
+        Args:
+            analyzer: Sentiment analyzer whose current model re-scores the mentions
+            mentions_file: Mentions cache (JSON with a `mentions` list)
+            checkpoint_file: Where progress is saved between chunks
+            brand_name: Brand passed to the sentiment prompt when the cache does not name one
+            chunk_size: Mentions re-scored and saved per chunk
+            on_chunk: Called with the updated mentions and the cache's brand after each saved chunk
+            cache_lock: Lock held by every writer of mentions_file while it reads and rewrites it
+        """
+        self.analyzer = analyzer
+        self.mentions_file = mentions_file
+        self.checkpoint_file = checkpoint_file
+        self.brand_name = brand_name
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+        self.cache_lock = cache_lock or threading.Lock()
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._status: Dict[str, Any] = {'state': 'idle'}
+
+    def is_current(self, mention: Dict[str, Any]) -> bool:
+        """Whether a mention was already scored by the current model"""
+        method = mention.get('sentiment_method')
+        if method in (None,) + UNSCORED_METHODS:
+            return False
+        if method == 'rule_based_cascade':
+            # Confident rule-based results do not depend on the model
+            return True
+        local_model = self.analyzer.local_model
+        if method == 'local_model':
+            return local_model is not None and mention.get('sentiment_model') == local_model.version
+        return mention.get('sentiment_model') == self.analyzer.model
+
+    def _read_mentions(self) -> Dict[str, Any]:
+        with open(self.mentions_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load_mentions(self) -> Dict[str, Any]:
+        with self.cache_lock:
+            return self._read_mentions()
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Ignoring unreadable re-scoring checkpoint: {e}")
+            return None
+
+    def resumable(self) -> Optional[Dict[str, Any]]:
+        """The unfinished checkpoint for the current model, if any"""
+        checkpoint = self._load_checkpoint()
+        if checkpoint and checkpoint.get('model') == self.analyzer.model \
+                and checkpoint['position'] < len(checkpoint['target_keys']):
+            return checkpoint
+        return None
+
+    def start(self, only_stale: bool = True) -> Dict[str, Any]:
+        """
+        Start (or resume) re-scoring in a background thread
+
+        Args:
+            only_stale: Target only mentions whose method/model differs from the
+                current model; False re-scores every mention. Ignored when an
+                unfinished checkpoint for the current model is resumed.
+
+        Returns:
+            Job status
+
+        Raises:
+            ValueError: If chunk_size is less than 1
+        """
+        if self.chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return self.status()
+
+            checkpoint = self.resumable()
+            if checkpoint:
+                logger.info(f"Resuming sentiment re-scoring at {checkpoint['position']}/{len(checkpoint['target_keys'])}")
+            else:
+                mentions = self._load_mentions().get('mentions', [])
+                targets = [m for m in mentions if not (only_stale and self.is_current(m))]
+                checkpoint = {
+                    'model': self.analyzer.model,
+                    'only_stale': only_stale,
+                    'started_at': time.time(),
+                    'target_keys': [mention_key(m) for m in targets],
+                    'position': 0
+                }
+                write_json_atomic(self.checkpoint_file, checkpoint)
+
+            self._stop.clear()
+            self._status = {
+                'state': 'running',
+                'model': checkpoint['model'],
+                'only_stale': checkpoint['only_stale'],
+                'total': len(checkpoint['target_keys']),
+                'processed': checkpoint['position'],
+                'changed': 0,
+                'started_at': checkpoint['started_at']
+            }
+            self._thread = threading.Thread(target=self._run, args=(checkpoint,),
+                                            name='sentiment-rescoring', daemon=True)
+            self._thread.start()
+            return self.status()
+
+    def stop(self):
+        """Stop after the current chunk; the checkpoint keeps the position"""
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        status = dict(self._status)
+        if status.get('total'):
+            status['percent'] = round(status['processed'] / status['total'] * 100, 1)
+        return status
+
+    def _run(self, checkpoint: Dict[str, Any]):
+        try:
+            target_keys = checkpoint['target_keys']
+            while checkpoint['position'] < len(target_keys):
+                if self._stop.is_set():
+                    self._status['state'] = 'stopped'
+                    return
+                chunk_keys = target_keys[checkpoint['position']:checkpoint['position'] + self.chunk_size]
+                self._status['changed'] += self._rescore_chunk(set(chunk_keys))
+                checkpoint['position'] += len(chunk_keys)
+                write_json_atomic(self.checkpoint_file, checkpoint)
+                self._status['processed'] = checkpoint['position']
+
+            self._status['state'] = 'completed'
+            self._status['completed_at'] = time.time()
+            logger.info(f"Sentiment re-scoring completed: {self._status['changed']} of "
+                        f"{len(target_keys)} mentions changed sentiment")
+        except Exception as e:
+            logger.error(f"Sentiment re-scoring failed: {e}")
+            self._status['state'] = 'failed'
+            self._status['error'] = str(e)
+
+    def _rescore_chunk(self, keys: set) -> int:
+        """Re-score the mentions with these keys and save them; returns how many changed sentiment"""
+        cache_data = self._load_mentions()
+        brand_name = cache_data.get('brand_name') or self.brand_name
+        mentions = [m for m in cache_data.get('mentions', []) if mention_key(m) in keys]
+
+        # One batched call per platform so the prompt context matches each mention's ingest
+        by_platform: Dict[str, List[Dict[str, Any]]] = {}
+        for mention in mentions:
+            by_platform.setdefault(sentiment_platform(mention), []).append(mention)
+
+        updates: Dict[str, Dict[str, Any]] = {}
+        for platform, platform_mentions in by_platform.items():
+            texts = [mention_text(m) for m in platform_mentions]
+            results = self.analyzer.analyze_batch(texts, {'brand': brand_name, 'platform': platform})
+            for mention, result in zip(platform_mentions, results):
+                updates[mention_key(mention)] = mention_sentiment_fields(result, self.analyzer.model)
+
+        # Re-read under the cache lock so a refresh saving meanwhile is neither lost nor overwritten
+        with self.cache_lock:
+            cache_data = self._read_mentions()
+            modified_at = os.path.getmtime(self.mentions_file)
+            changed = 0
+            updated_mentions = []
+            for mention in cache_data.get('mentions', []):
+                update = updates.get(mention_key(mention))
+                if update:
+                    changed += mention.get('sentiment') != update['sentiment']
+                    mention.update(update)
+                    updated_mentions.append(mention)
+            write_json_atomic(self.mentions_file, cache_data)
+            # Cache freshness is judged by file age; re-scoring does not fetch anything new
+            os.utime(self.mentions_file, (time.time(), modified_at))
+
+        if self.on_chunk and updated_mentions:
+            self.on_chunk(updated_mentions, cache_data.get('brand_name'))
+        return changed
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Web Mention Store for Attribution Dashboard
+Remembers which published-date window each Exa query already covered and keeps
+the relevant web mentions found, so refreshes only search the uncovered interval
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def published_timestamp(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of an ISO published date (naive dates are local time), or None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class WebMentionStore:
+    """SQLite store of per-(brand, query) search coverage and the mentions found"""
+
+    def __init__(self, db_path: str = ':memory:'):
+        """
+        Initialize the store
+
+        Args:
+            db_path: SQLite database path (':memory:' keeps coverage for the process lifetime)
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS search_coverage (
+                brand TEXT NOT NULL,
+                query TEXT NOT NULL,
+                covered_start REAL NOT NULL,
+                covered_end REAL NOT NULL,
+                PRIMARY KEY (brand, query)
+            );
+            CREATE TABLE IF NOT EXISTS web_mentions (
+                brand TEXT NOT NULL,
+                url TEXT NOT NULL,
+                published_at REAL,
+                mention_json TEXT NOT NULL,
+                PRIMARY KEY (brand, url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_web_mentions_published
+                ON web_mentions (brand, published_at);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _brand_key(brand: str) -> str:
+        return (brand or '').strip().lower()
+
+    def get_coverage(self, brand: str, query: str) -> Optional[Tuple[float, float]]:
+        """(start, end) epoch seconds already searched for a query, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT covered_start, covered_end FROM search_coverage WHERE brand = ? AND query = ?",
+                (self._brand_key(brand), query)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def set_coverage(self, brand: str, query: str, start: float, end: float):
+        """Record that a query has been searched from start to end (epoch seconds)"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_coverage (brand, query, covered_start, covered_end) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self._brand_key(brand), query, start, end)
+                )
+
+    def add_mentions(self, brand: str, mentions: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update mentions by URL
+
+        Returns:
+            Number of mentions that were not stored before
+        """
+        rows = [
+            (self._brand_key(brand), mention['url'],
+             published_timestamp(mention.get('published_date') or mention.get('extracted_at')),
+             json.dumps(mention, default=str))
+            for mention in mentions if mention.get('url')
+        ]
+        with self._lock:
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO web_mentions (brand, url, published_at, mention_json) "
+                    "VALUES (?, ?, ?, ?)", rows
+                )
+                added = self._conn.total_changes - before
+                self._conn.executemany(
+                    "UPDATE web_mentions SET published_at = ?, mention_json = ? WHERE brand = ? AND url = ?",
+                    [(published_at, data, brand_key, url) for brand_key, url, published_at, data in rows]
+                )
+        return added
+
+    def get_mentions(self, brand: str, since: float) -> List[Dict[str, Any]]:
+        """Stored mentions for a brand published at or after since (epoch seconds)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT mention_json FROM web_mentions WHERE brand = ? AND published_at >= ?",
+                (self._brand_key(brand), since)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def prune(self, before: float):
+        """Forget mentions published before a time and clip coverage to match"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM web_mentions WHERE published_at < ?", (before,))
+                self._conn.execute("DELETE FROM search_coverage WHERE covered_end < ?", (before,))
+                self._conn.execute(
+                    "UPDATE search_coverage SET covered_start = ? WHERE covered_start < ?", (before, before)
+                )
+
+    def get_stats(self, brand: Optional[str] = None) -> Dict[str, Any]:
+        """Stored mention and covered query counts"""
+        where, params = ("WHERE brand = ?", (self._brand_key(brand),)) if brand else ("", ())
+        with self._lock:
+            mentions = self._conn.execute(f"SELECT COUNT(*) FROM web_mentions {where}", params).fetchone()[0]
+            queries = self._conn.execute(f"SELECT COUNT(*) FROM search_coverage {where}", params).fetchone()[0]
+        return {'mentions': mentions, 'covered_queries': queries}